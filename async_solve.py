@@ -0,0 +1,76 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+import registry
+from solve_session import SolveResult
+
+# asyncio front-end: `await solve_async('nurikabe', puzzle=..., height=..., width=...)` does not block the event loop.
+# Solves run in the threads of a bounded executor, each one in its own z3 context (z3 releases the GIL while checking):
+# any number of solves can be awaited at the same time, at most max_workers of them run, the others wait for a thread.
+# Cancelling the awaiting task stops the solve: its z3 context is interrupted.
+
+MAX_WORKERS = os.cpu_count() or 1
+# An interrupt is lost if it comes before z3 starts checking: it is repeated (every INTERRUPT_PERIOD seconds) until
+# the solve is over. No check is started after a cancellation anyway (see solve_session.SolveSession).
+INTERRUPT_PERIOD = 0.1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# the executor used when none is given: created the first time it is needed
+def default_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(MAX_WORKERS, thread_name_prefix='solve_async')
+    return _executor
+
+def _interrupt(loop, future, ctx):
+    if not future.done():
+        ctx.interrupt()
+        loop.call_later(INTERRUPT_PERIOD, _interrupt, loop, future, ctx)
+
+def _unknown_result(kind, reason, started):
+    elapsed = time.monotonic() - started
+    return SolveResult(None, {'kind': kind, 'status': 'unknown', 'reason_unknown': reason, 'total_time': elapsed},
+            status='unknown', elapsed=elapsed)
+
+# Same as registry.run (options: check_unique, rlimit, sink and the arguments of the solver), awaited.
+# timeout (seconds): deadline of the request, counted from the call: the time waiting for a thread is part of it.
+# The checks get what is left of it: then the result is unknown (reason 'timeout'). If the deadline is reached while
+# the constraints are being built, the solve is stopped at its first check (reason 'canceled').
+# executor: runs the solves (default: default_executor()). A process executor can not be used: the solve is
+# cancelled through a z3 context and an event shared with the thread.
+async def solve_async(kind, *, timeout=None, executor=None, **options):
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    deadline = None if timeout is None else started + timeout
+    cancelled = threading.Event()
+    from z3 import Context
+    ctx = Context()
+    def run():
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if cancelled.is_set() or (remaining is not None and remaining <= 0):
+            return _unknown_result(kind, 'canceled' if cancelled.is_set() else 'timeout', started)
+        return registry.run(kind, timeout=remaining, cancelled=cancelled, ctx=ctx, **options)
+    solving = (executor or default_executor()).submit(run) # solving.cancel() fails once the solve has started
+    future = asyncio.wrap_future(solving)
+    def cancel():
+        cancelled.set()
+        _interrupt(loop, solving, ctx)
+    try:
+        if deadline is None:
+            return await asyncio.shield(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if solving.cancel(): # still waiting for a thread
+                return _unknown_result(kind, 'timeout', started)
+            cancel()
+            return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        if not solving.cancel():
+            cancel()
+        raise
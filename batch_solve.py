@@ -0,0 +1,102 @@
+import argparse
+import functools
+import json
+import multiprocessing
+import sys
+import registry
+from solve_session import NoSolution
+
+# A puzzle record is a dict:
+# {'id': <anything json-able>, 'type': 'nurikabe', 'kwargs': {'puzzle': ..., 'height': 10, 'width': 10}}
+# 'type' is one of registry.kinds(): the name of the solver file without the 'solve-' prefix.
+
+# with_stats: the solve is instrumented (see registry.run) and the statistics are part of the result
+# check_unique: the result tells whether the solution is unique
+# max_solutions: the result has the list of the solutions (up to max_solutions) instead of one solution. Its status
+#  is 'unknown' if the budget ran out before the enumeration was over (the solutions found until then are listed).
+# timeout (seconds), rlimit: budget of each solve. The result has a status: 'sat', 'unsat' or 'unknown' (see registry.run)
+def solve_record(record, *, with_stats=False, check_unique=False, max_solutions=None, timeout=None, rlimit=None):
+    # imported here: the parent process never needs z3
+    from more_z3 import as_python
+    res = {'id': record.get('id'), 'type': record.get('type')}
+    limits = {'timeout': timeout, 'rlimit': rlimit}
+    if 'error' in record: # an invalid line (see read_records)
+        res['error'] = record['error']
+        return res
+    try:
+        if max_solutions is not None:
+            res['solutions'] = []
+            try:
+                for solution in registry.iter_solutions(record['type'], limit=max_solutions, **limits, **record.get('kwargs', {})):
+                    res['solutions'].append(as_python(solution))
+                res['status'] = 'sat' if res['solutions'] else 'unsat'
+            except NoSolution as e: # out of budget: the solutions found so far are reported, the status tells why
+                res['status'] = e.status
+                res['reason_unknown'] = e.reason
+        elif with_stats or check_unique or timeout is not None or rlimit is not None:
+            result = registry.run(record['type'], check_unique=check_unique, with_counts=with_stats, **limits,
+                    **record.get('kwargs', {}))
+            res['status'] = result.status
+            res['elapsed'] = result.elapsed
+            res['solution'] = as_python(result.solution)
+            if with_stats:
+                res['stats'] = result.stats
+            if check_unique:
+                res['unique'] = result.unique
+        else:
+            solution = registry.solve(record['type'], **record.get('kwargs', {}))
+            res['solution'] = as_python(solution)
+    except Exception as e: # one bad puzzle should not bring down the whole batch
+        res['error'] = f'{type(e).__name__}: {e}'
+    return res
+
+# Solutions are yielded in completion order (not in the order of records).
+# Each worker is a separate process: so it has its own z3 (main) context.
+# Solvers are loaded lazily by each worker, unless they are preloaded.
+# options: of solve_record (with_stats, check_unique, max_solutions, timeout, rlimit)
+def solve_batch(records, *, processes=None, chunksize=1, preload=(), **options):
+    solve_ = functools.partial(solve_record, **options)
+    with multiprocessing.Pool(processes, initializer=registry.preload, initargs=(list(preload),)) as pool:
+        yield from pool.imap_unordered(solve_, records, chunksize)
+
+# the options of solve_record, shared with the command line of solve_daemon.py
+def add_solve_arguments(parser):
+    parser.add_argument('--preload', nargs='*', default=[], choices=registry.kinds(), metavar='TYPE', help='puzzle types to load when a worker starts')
+    parser.add_argument('--stats', action='store_true', help='add timings and z3 statistics to each result')
+    parser.add_argument('--check-unique', action='store_true', help='tell whether each solution is unique')
+    parser.add_argument('--max-solutions', type=int, default=None, metavar='N', help='list up to N solutions of each puzzle')
+    parser.add_argument('--timeout', type=float, default=None, metavar='SECONDS', help='time budget of each puzzle')
+    parser.add_argument('--rlimit', type=int, default=None, help='z3 resource budget of each puzzle')
+
+def solve_options(args):
+    return {'with_stats': args.stats, 'check_unique': args.check_unique, 'max_solutions': args.max_solutions,
+            'timeout': args.timeout, 'rlimit': args.rlimit}
+
+# ValueError if line is not a record (a json object)
+def parse_record(line):
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError('a record is a json object')
+    return record
+
+# An invalid line is read as the record {'error': ...}: its result is that error.
+def read_records(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            try:
+                yield parse_record(line)
+            except ValueError as e: # one bad line should not bring down the whole batch
+                yield {'error': f'{type(e).__name__}: {e}'}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Solve a stream of puzzles (json lines) using a pool of processes.')
+    parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin)
+    parser.add_argument('-j', '--processes', type=int, default=None, help='number of worker processes (default: number of cpus)')
+    parser.add_argument('--chunksize', type=int, default=1)
+    add_solve_arguments(parser)
+    args = parser.parse_args()
+
+    for res in solve_batch(read_records(args.input), processes=args.processes, chunksize=args.chunksize,
+            preload=args.preload, **solve_options(args)):
+        print(json.dumps(res), flush=True)
@@ -0,0 +1,237 @@
+import argparse
+import ast
+import contextlib
+import inspect
+import io
+import itertools
+import json
+import platform
+import random
+import statistics
+import sys
+import more_z3
+import registry
+
+# The corpus: the instances found in the __main__ block of every solve-*.py file
+# (janko.at puzzles mostly) and scaled synthetic instances.
+# An instance is a record as read by batch_solve.py: {'id': ..., 'type': ..., 'kwargs': {...}}
+
+def collect_instances(kind):
+    solver = registry.get_solver(kind)
+    path = inspect.getsourcefile(solver)
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    main_blocks = [ node for node in tree.body
+            if isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+            and isinstance(node.test.left, ast.Name) and node.test.left.id == '__name__' ]
+    instances = []
+    def record(*args, **kwargs):
+        # positional arguments (e.g. solve_puzzle_range(puzzle, height=..., width=...)) are given by name
+        instances.append(inspect.signature(solver).bind(*args, **kwargs).arguments)
+    # The __main__ block is run in (a copy of) the module namespace with the solver replaced by record
+    namespace = dict(solver.__globals__)
+    namespace[solver.__name__] = record
+    for block in main_blocks:
+        for stmt in block.body:
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    exec(compile(ast.Module([stmt], type_ignores=[]), path, 'exec'), namespace)
+            except Exception:
+                # statements displaying a solution fail: record returns no solution
+                pass
+    return [ {'id': f'{kind}#{i}', 'type': kind, 'kwargs': kwargs}
+            for i, kwargs in enumerate(instances) ]
+
+# Synthetic instances of a given size. All of them are solvable: the clues are computed from a random solution.
+
+def random_latin_square(order, rnd):
+    rows = [ [ (l + c) % order + 1 for c in range(order) ] for l in range(order) ]
+    rnd.shuffle(rows)
+    cols = list(range(order))
+    rnd.shuffle(cols)
+    return [ [ row[c] for c in cols ] for row in rows ]
+
+def nb_visible(heights):
+    highest, res = 0, 0
+    for height in heights:
+        if height > highest:
+            highest, res = height, res + 1
+    return res
+
+def synthetic_towers(size, rnd):
+    square = random_latin_square(size, rnd)
+    cols = [ list(col) for col in zip(*square) ]
+    return {'n': size,
+            'top': [ nb_visible(col) for col in cols ],
+            'bottom': [ nb_visible(col[::-1]) for col in cols ],
+            'left': [ nb_visible(row) for row in square ],
+            'right': [ nb_visible(row[::-1]) for row in square ]}
+
+def synthetic_pattern(size, rnd):
+    picture = [ [ rnd.random() < 0.5 for _ in range(size) ] for _ in range(size) ]
+    def runs(line):
+        return tuple( len(list(grp)) for black, grp in itertools.groupby(line) if black )
+    return {'height': size, 'width': size,
+            'runs_rowwise': [ runs(row) for row in picture ],
+            'runs_columnwise': [ runs(col) for col in zip(*picture) ]}
+
+def synthetic_unequal(size, rnd):
+    square = random_latin_square(size, rnd)
+    # about half of the orthogonally adjacent pairs get their inequality sign
+    pairs = [ ((l, c), neigh)
+            for l, c in itertools.product(range(size), repeat=2)
+            for neigh in [(l + 1, c), (l, c + 1)]
+            if max(neigh) < size and rnd.random() < 0.5 ]
+    lt_inequalities = [ (a, b) if square[a[0]][a[1]] < square[b[0]][b[1]] else (b, a)
+            for a, b in pairs ]
+    return {'order': size,
+            'puzzle': [ [0] * size for _ in range(size) ],
+            'lt_inequalities': lt_inequalities}
+
+def synthetic_str8ts(size, rnd):
+    # (l + c) % size + 1 (flipped): every line counts up (or down) cyclically, the cells of value size are black.
+    # So are some random cells. Every stripe of white cells is then consecutive.
+    flip_l, flip_c = rnd.random() < 0.5, rnd.random() < 0.5
+    square = [ [ ((size - 1 - l if flip_l else l) + (size - 1 - c if flip_c else c)) % size + 1 for c in range(size) ]
+            for l in range(size) ]
+    black = [ [ val == size or rnd.random() < 0.05 for val in row ] for row in square ]
+    instance = [ [ val if rnd.random() < (0.3 if is_black else 0.2) else 0 for val, is_black in zip(row, black_row) ]
+            for row, black_row in zip(square, black) ]
+    def stripes(lines):
+        ids, nb = [], 0
+        for line in lines:
+            ids.append([])
+            for c, is_black in enumerate(line):
+                if not is_black and (c == 0 or line[c - 1]):
+                    nb += 1
+                ids[-1].append(0 if is_black else nb)
+        return ids
+    return {'height': size, 'width': size, 'order': size,
+            'instance': instance,
+            'horiz_cages': stripes(black),
+            'vertic_cages': stripes(zip(*black))}
+
+SYNTHETIC = {
+        'towers': (synthetic_towers, [5, 6, 7, 8, 9]),
+        'pattern': (synthetic_pattern, [10, 15, 20, 25]),
+        'unequal': (synthetic_unequal, [5, 6, 7]),
+        'str8ts': (synthetic_str8ts, [9, 12]),
+        }
+
+def synthetic_instances(kind, *, seed=0):
+    generate, sizes = SYNTHETIC[kind]
+    return [ {'id': f'{kind}@{size}', 'type': kind, 'kwargs': generate(size, random.Random(seed))}
+            for size in sizes ]
+
+def corpus(kinds=None, *, synthetic=True, seed=0):
+    kinds = kinds or registry.kinds()
+    instances = []
+    for kind in kinds:
+        instances.extend(collect_instances(kind))
+        if synthetic and kind in SYNTHETIC:
+            instances.extend(synthetic_instances(kind, seed=seed))
+    return instances
+
+# Timing
+
+TIMINGS = ['encode_time', 'check_time', 'total_time']
+
+def set_random_seed(seed):
+    from z3 import set_param
+    set_param('smt.random_seed', seed)
+    set_param('sat.random_seed', seed)
+
+# A solve stopped before its first check (e.g. a NoSolution raised while encoding) has no encode_time nor counts:
+# they are None.
+def bench_instance(instance, *, repeat, seed):
+    runs, statuses = [], []
+    for _ in range(repeat):
+        set_random_seed(seed)
+        result = registry.run(instance['type'], with_counts=True, **instance['kwargs'])
+        runs.append(result.stats)
+        statuses.append(result.status)
+    res = {}
+    for timing in TIMINGS:
+        values = [ run[timing] for run in runs if timing in run ]
+        res[timing] = statistics.median(values) if values else None
+    res['min_total_time'] = min(run['total_time'] for run in runs)
+    for count in ['nb_checks', 'nb_assertions', 'nb_terms', 'nb_variables']:
+        res[count] = runs[-1].get(count)
+    res['status'] = statuses[-1]
+    return res
+
+def bench(instances, *, repeat=3, seed=0, log=None):
+    from z3 import get_version_string
+    report = {'z3_version': get_version_string(),
+            'python': platform.python_version(),
+            'repeat': repeat,
+            'seed': seed,
+            'cardinality_encoding': more_z3.cardinality_encoding,
+            'instances': {}}
+    for instance in instances:
+        res = bench_instance(instance, repeat=repeat, seed=seed)
+        report['instances'][instance['id']] = res
+        if log is not None:
+            encode_time = '       -' if res['encode_time'] is None else f"{res['encode_time']:8.3f}"
+            print(f"{instance['id']:<24} {res['status']:<7} encode {encode_time}s  check {res['check_time']:8.3f}s",
+                    file=log, flush=True)
+    return report
+
+# Regressions: a status that changed (e.g. sat -> unknown), timings that got worse than the baseline by more than
+# threshold (relative). Differences under min_delta seconds are noise.
+# Returns (name, 'status' or the timing, before, after)
+def compare(report, baseline, *, threshold=0.2, min_delta=0.05):
+    regressions = []
+    for name, res in report['instances'].items():
+        base = baseline['instances'].get(name)
+        if base is None:
+            continue
+        if base.get('status') is not None and res.get('status') != base['status']:
+            regressions.append((name, 'status', base['status'], res.get('status')))
+        for timing in TIMINGS:
+            before, after = base.get(timing), res.get(timing)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + threshold) and after - before > min_delta:
+                regressions.append((name, timing, before, after))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the solvers on the instances of their __main__ blocks and on synthetic instances.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    corpus_parser = commands.add_parser('corpus', help='write the instances as json lines (input of batch_solve.py)')
+    run_parser = commands.add_parser('run', help='time the instances and write a json report')
+    for sub in (corpus_parser, run_parser):
+        sub.add_argument('kinds', nargs='*', metavar='TYPE', help='puzzle types (default: all)')
+        sub.add_argument('--no-synthetic', dest='synthetic', action='store_false')
+        sub.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('-r', '--repeat', type=int, default=3)
+    run_parser.add_argument('-o', '--output', type=argparse.FileType('w'), default=sys.stdout)
+    run_parser.add_argument('--cardinality-encoding', choices=more_z3.CARDINALITY_ENCODINGS, default=more_z3.cardinality_encoding,
+            help='encoding of Exactly/AtMost/AtLeast (default: %(default)s)')
+
+    compare_parser = commands.add_parser('compare', help='compare a report against a baseline report')
+    compare_parser.add_argument('report', type=argparse.FileType('r'))
+    compare_parser.add_argument('baseline', type=argparse.FileType('r'))
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown flagged as a regression (default: 0.2)')
+    compare_parser.add_argument('--min-delta', type=float, default=0.05, help='slowdowns under this many seconds are ignored')
+    args = parser.parse_args()
+
+    if args.command == 'corpus':
+        for instance in corpus(args.kinds, synthetic=args.synthetic, seed=args.seed):
+            print(json.dumps(instance))
+    elif args.command == 'run':
+        instances = corpus(args.kinds, synthetic=args.synthetic, seed=args.seed)
+        more_z3.cardinality_encoding = args.cardinality_encoding
+        report = bench(instances, repeat=args.repeat, seed=args.seed, log=sys.stderr)
+        json.dump(report, args.output, indent=1)
+    elif args.command == 'compare':
+        regressions = compare(json.load(args.report), json.load(args.baseline),
+                threshold=args.threshold, min_delta=args.min_delta)
+        for name, what, before, after in regressions:
+            if what == 'status':
+                print(f'{name}: status {before} -> {after}')
+            else:
+                print(f'{name}: {what} {before:.3f}s -> {after:.3f}s')
+        sys.exit(1 if regressions else 0)
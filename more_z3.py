@@ -1,5 +1,8 @@
-from z3 import And, PbEq, Int, Bool
+from z3 import sat, unsat, unknown, ExprRef, And, Or, Not, Xor, Implies, If, Sum, Distinct, PbEq, PbLe, PbGe, BoolVal, BitVecVal, Int, Bool, FreshInt, FreshBool, is_bool, is_int_value, is_true, is_false, is_const, Z3_OP_UNINTERPRETED
+from solve_session import current_session, NoSolution
+from puzzles_common import ortho_neighbours
 import operator
+from collections import defaultdict
 
 def coerce_comp_op(variabs, vals, comparison_op):
     variabs = list(variabs)
@@ -17,20 +20,518 @@ def coerce_ge(variabs, vals):
 def coerce_le(variabs, vals):
     return coerce_comp_op(variabs, vals, operator.le) # all(variab <= val)
 
-def IntMatrix(prefix, nb_rows, nb_cols):
-    res = [[ Int(f'{prefix}_{i}_{j}') for j in range(nb_cols)]
+# CONTEXTS: the helpers build their terms in the context of the given expressions. Those creating variables or
+# constants (without expressions to take it from) have a ctx parameter: None for z3's main context.
+# Solvers in different contexts can run in different threads at the same time (z3 releases the GIL during a check).
+
+# context of the first z3 expression among exprs (None: z3's main context)
+def context_of(exprs):
+    return next(( expr.ctx for expr in exprs if isinstance(expr, ExprRef) ), None)
+
+def IntMatrix(prefix, nb_rows, nb_cols, ctx=None):
+    res = [[ Int(f'{prefix}_{i}_{j}', ctx=ctx) for j in range(nb_cols)]
                             for i in range(nb_rows) ]
     return res
 
-def BoolMatrix(prefix, nb_rows, nb_cols):
-    res = [[ Bool(f'{prefix}_{i}_{j}') for j in range(nb_cols)]
+def BoolMatrix(prefix, nb_rows, nb_cols, ctx=None):
+    res = [[ Bool(f'{prefix}_{i}_{j}', ctx=ctx) for j in range(nb_cols)]
                             for i in range(nb_rows) ]
     return res
 
+# Two-valued cells (0/1: WHITE/BLACK, POROUS/WALL...) are either
+#  'int': z3 Ints with the range constraint Xor(cell == 0, cell == 1). Counts are sums (linear integer arithmetic).
+#  'bool': z3 Bools, true for 1. Counts are pseudo-boolean constraints: z3 stays in pure SAT.
+# The helpers below work for both encodings.
+BINARY_ENCODINGS = ('int', 'bool')
+
+def BinaryMatrix(prefix, nb_rows, nb_cols, encoding='int', ctx=None):
+    assert encoding in BINARY_ENCODINGS, f'Unknown encoding of two-valued cells: {encoding}'
+    if encoding == 'bool':
+        return BoolMatrix(prefix, nb_rows, nb_cols, ctx=ctx)
+    return IntMatrix(prefix, nb_rows, nb_cols, ctx=ctx)
+
+def binary_range(cells):
+    return [ Xor(cell == 0, cell == 1) for cell in cells if not is_bool(cell) ]
+
+# cell == val
+def binary_eq(cell, val):
+    assert val in (0, 1), 'Two-valued cells are 0 or 1'
+    if is_bool(cell):
+        return cell if val == 1 else Not(cell)
+    return cell == val
+
+# number of cells equal to 1 is total
+def binary_sum_eq(cells, total):
+    cells = list(cells)
+    if cells and is_bool(cells[0]):
+        return Exactly(*cells, total)
+    return Sum(cells) == total
+
+# 0/1 value of the cell (e.g. in the solution)
+def binary_value(cell):
+    return If(cell, 1, 0) if is_bool(cell) else cell
+
+# CARDINALITY constraints: Exactly/AtMost/AtLeast(*literals, k) (same arguments as z3's AtMost/AtLeast).
+# encoding (per call, default: more_z3.cardinality_encoding):
+#  'pb': native pseudo-boolean constraints (PbEq, PbLe, PbGe), handled by z3's pb solver
+#  'seqcounter': sequential counter (Sinz)
+#  'totalizer': totalizer (Bailleux and Boufkhad)
+#  'sortnet': odd-even merge sorting network (Batcher)
+#  'pb2bv': sum of the literals as bit-vectors (what z3's pb2bv tactic does), bit-blasted by z3
+# The counters (seqcounter, totalizer, sortnet) are plain boolean expressions of the literals (shared sub-expressions,
+# no auxiliary variables): they can be used in any context (negated, under an Or...).
+CARDINALITY_ENCODINGS = ('pb', 'seqcounter', 'totalizer', 'sortnet', 'pb2bv')
+cardinality_encoding = 'pb'
+
+# And/Or folding the python constants True/False (padding of the counters)
+def _and(a, b):
+    if a is False or b is False:
+        return False
+    return b if a is True else a if b is True else And(a, b)
+
+def _or(a, b):
+    if a is True or b is True:
+        return True
+    return b if a is False else a if b is False else Or(a, b)
+
+def _not(a):
+    return (not a) if isinstance(a, bool) else Not(a)
+
+def _as_z3(a, ctx):
+    return BoolVal(a, ctx) if isinstance(a, bool) else a
+
+# at least i literals are true, given a counter: counter[j] <=> at least j + 1 literals are true
+def _at_least(counter, i):
+    return True if i <= 0 else counter[i - 1] if i <= len(counter) else False
+
+# The counters of the literals, up to bound (counting further is useless for a comparison with bound - 1)
+
+def seqcounter(lits, bound):
+    counter = []
+    for lit in lits:
+        # at least j + 1 so far: at least j + 1 before lit, or lit and at least j before
+        counter = [ _or(_at_least(counter, j + 1), _and(lit, _at_least(counter, j)))
+                for j in range(min(len(counter) + 1, bound)) ]
+    return counter
+
+def totalizer(lits, bound):
+    if len(lits) <= 1:
+        return list(lits[:bound])
+    left = totalizer(lits[:len(lits) // 2], bound)
+    right = totalizer(lits[len(lits) // 2:], bound)
+    # at least j + 1: at least i on the left and at least j + 1 - i on the right
+    counter = []
+    for j in range(min(len(left) + len(right), bound)):
+        at_least = False
+        for i in range(max(0, j + 1 - len(right)), min(j + 1, len(left)) + 1):
+            at_least = _or(at_least, _and(_at_least(left, i), _at_least(right, j + 1 - i)))
+        counter.append(at_least)
+    return counter
+
+def sortnet(lits, bound):
+    # the literals sorted by comparators (max: Or, min: And): True first
+    size = 1
+    while size < len(lits):
+        size *= 2
+    wires = list(lits) + [False] * (size - len(lits))
+    # Batcher's odd-even merge sort
+    p = 1
+    while p < size:
+        k = p
+        while k >= 1:
+            for j in range(k % p, size - k, 2 * k):
+                for i in range(min(k, size - j - k)):
+                    if (i + j) // (2 * p) == (i + j + k) // (2 * p):
+                        a, b = wires[i + j], wires[i + j + k]
+                        wires[i + j], wires[i + j + k] = _or(a, b), _and(a, b)
+            k //= 2
+        p *= 2
+    return wires[:min(len(lits), bound)]
+
+COUNTERS = {'seqcounter': seqcounter, 'totalizer': totalizer, 'sortnet': sortnet}
+
+def _cardinality(args, encoding, ctx):
+    assert len(args) >= 1, 'Non empty list of arguments expected'
+    encoding = encoding or cardinality_encoding
+    assert encoding in CARDINALITY_ENCODINGS, f'Unknown cardinality encoding: {encoding}'
+    if encoding == 'pb' and len(args) == 1: # PbEq([], k) and the like are rejected by z3
+        encoding = 'pb2bv'
+    lits = list(args[:-1])
+    return lits, args[-1], encoding, ctx or context_of(lits)
+
+# pb2bv: the number of true literals as a bit-vector, wide enough for a signed comparison with k
+def _bv_count(lits, k, ctx):
+    width = (len(lits) + 1).bit_length() + 1
+    k = max(-1, min(k, len(lits) + 1))
+    bits = [ If(lit, BitVecVal(1, width, ctx), BitVecVal(0, width, ctx)) for lit in lits ]
+    return Sum(bits) if bits else BitVecVal(0, width, ctx), BitVecVal(k, width, ctx)
+
 # Exactly(1) -> False, Exactly(0) -> True, Exactly(2) -> False.
 # As would PbEq([ (p, 1) for p in [] ], 1)
-def Exactly(*args):
-    assert len(args) >= 1, 'Non empty list of arguments expected'
-    return PbEq([
-        (arg, 1) for arg in args[:-1]],
-        args[-1])
+def Exactly(*args, encoding=None, ctx=None):
+    lits, k, encoding, ctx = _cardinality(args, encoding, ctx)
+    if encoding == 'pb':
+        return PbEq([ (lit, 1) for lit in lits ], k)
+    if encoding == 'pb2bv':
+        count, k = _bv_count(lits, k, ctx)
+        return count == k
+    counter = COUNTERS[encoding](lits, k + 1)
+    return _as_z3(_and(_at_least(counter, k), _not(_at_least(counter, k + 1))), ctx)
+
+def AtMost(*args, encoding=None, ctx=None):
+    lits, k, encoding, ctx = _cardinality(args, encoding, ctx)
+    if encoding == 'pb':
+        return PbLe([ (lit, 1) for lit in lits ], k)
+    if encoding == 'pb2bv':
+        count, k = _bv_count(lits, k, ctx)
+        return count <= k
+    counter = COUNTERS[encoding](lits, k + 1)
+    return _as_z3(_not(_at_least(counter, k + 1)), ctx)
+
+def AtLeast(*args, encoding=None, ctx=None):
+    lits, k, encoding, ctx = _cardinality(args, encoding, ctx)
+    if encoding == 'pb':
+        return PbGe([ (lit, 1) for lit in lits ], k)
+    if encoding == 'pb2bv':
+        count, k = _bv_count(lits, k, ctx)
+        return count >= k
+    counter = COUNTERS[encoding](lits, k)
+    return _as_z3(_at_least(counter, k), ctx)
+
+# CONNECTIVITY: the active cells form a single (non empty) region.
+# cells: e.g. [(l, c), ...]; active: dict cell -> z3 boolean expression (or python bool, for cells always active)
+# neighbours: cell -> its neighbours (those that are not in cells are ignored). Orthogonal neighbours by default.
+# root: an active cell known in advance (e.g. the clue of a region).
+# ordered_root: without a given root, the root is the first active cell (in the order of cells): this breaks the
+#       symmetry on the choice of the root and is much faster (e.g. palisade). Otherwise any active cell can be the root.
+# max_size: the region has at most max_size cells: distances to the root are at most max_size - 1.
+# encoding:
+#  'distance': every active cell is labelled by its distance to the root and (but the root) has a predecessor among
+#       its neighbours. As proposed by Gerhard van der Knijff in 'Solving and generating puzzles with a connectivity constraint'
+#  'layered': boolean reachability in layers: a cell reached in k+1 steps is active and it (or one of its neighbours)
+#       is reached in k steps. Every active cell is reached in max_size - 1 steps.
+CONNECTIVITY_ENCODINGS = ('distance', 'layered')
+connectivity_encoding = 'distance'
+
+def connected(cells, active, *, neighbours=ortho_neighbours, root=None, max_size=None, ordered_root=True, encoding=None,
+        ctx=None):
+    encoding = encoding or connectivity_encoding
+    assert encoding in CONNECTIVITY_ENCODINGS, f'Unknown connectivity encoding: {encoding}'
+    cells = list(cells)
+    index = { cell: i for i, cell in enumerate(cells) }
+    neighs = [ [ index[neigh] for neigh in neighbours(cell) if neigh in index ]
+            for cell in cells ]
+    ctx = ctx or context_of(active[cell] for cell in cells)
+    actives = [ _as_z3(active[cell], ctx) for cell in cells ]
+    max_dist = len(cells) - 1 if max_size is None else min(len(cells), max_size) - 1
+
+    constraints = []
+    # is_root[i]: None when the root is still to be chosen
+    if root is not None:
+        is_root = [ cell == root for cell in cells ]
+        constraints.append(_as_z3(active[root], ctx))
+    elif ordered_root:
+        is_root, none_before = [], BoolVal(True, ctx)
+        for act in actives:
+            is_root.append(And(act, none_before))
+            none_before = And(none_before, Not(act))
+        constraints.append(Or(actives))
+    else:
+        is_root = [None] * len(cells)
+
+    if encoding == 'distance':
+        dists = [ FreshInt('dist', ctx) for _ in cells ]
+        for i, (dist, act) in enumerate(zip(dists, actives)):
+            # -1 for inactive cells
+            constraints.append(And(dist >= -1, dist <= max_dist))
+            constraints.append(act == (dist >= 0))
+            if is_root[i] is not None:
+                constraints.append((dist == 0) == is_root[i])
+            predecessors = [ dists[j] == dist - 1 for j in neighs[i] ]
+            constraints.append(Implies(dist > 0, Or(predecessors)))
+        if is_root[0] is None:
+            constraints.append(Exactly(*[ dist == 0 for dist in dists ], 1))
+    elif encoding == 'layered':
+        if is_root[0] is None:
+            is_root = [ FreshBool('root', ctx) for _ in cells ]
+            constraints.extend(Implies(r, act) for r, act in zip(is_root, actives))
+            constraints.append(Exactly(*is_root, 1))
+        # (the flags of a given root are python bools: the terms are built in ctx)
+        reached = [ _as_z3(r, ctx) for r in is_root ]
+        for _ in range(max_dist):
+            reached_next = [ FreshBool('reached', ctx) for _ in cells ]
+            for i, (r, act) in enumerate(zip(reached_next, actives)):
+                reached_before = Or(reached[i], *[ reached[j] for j in neighs[i] ])
+                constraints.append(Implies(r, And(act, reached_before)))
+            reached = reached_next
+        constraints.extend(Implies(act, r) for r, act in zip(reached, actives))
+    return constraints
+
+# REGULAR constraint: the values of vars_ spell a word accepted by a DFA.
+# transitions: dict (state, value) -> state. start: the initial state. accepting: the final states.
+# There is a state variable between consecutive variables (linear size). The states that are not both reachable
+# from start and co-reachable from an accepting state are pruned: the state variables have tight domains.
+def regular(vars_, transitions, start, accepting, ctx=None):
+    vars_ = list(vars_)
+    ctx = ctx or context_of(vars_)
+    successors = defaultdict(list)
+    for (state, value), next_state in transitions.items():
+        successors[state].append((value, next_state))
+    # forward: states reachable after i variables
+    reachable = [{start}]
+    for _ in vars_:
+        reachable.append({ next_state for state in reachable[-1] for _, next_state in successors[state] })
+    # backward: keep the states that still lead to an accepting state
+    alive = [None] * len(reachable)
+    alive[-1] = reachable[-1] & set(accepting)
+    for i in range(len(vars_) - 1, -1, -1):
+        alive[i] = { state for state in reachable[i]
+                if any(next_state in alive[i + 1] for _, next_state in successors[state]) }
+    if not alive[0]:
+        return [BoolVal(False, ctx)]
+    states = [ FreshInt('state', ctx) for _ in alive ]
+    constraints = [ Or([ state == st for st in sorted(alive_states) ])
+            for state, alive_states in zip(states, alive) ]
+    for var, state, next_state_var, alive_states, next_alive in zip(vars_, states, states[1:], alive, alive[1:]):
+        for st in sorted(alive_states):
+            moves = [ And(var == value, next_state_var == next_state)
+                    for value, next_state in successors[st] if next_state in next_alive ]
+            constraints.append(Implies(state == st, Or(moves)))
+    return constraints
+
+# VISIBILITY (skyscrapers): count of the vars_ greater than all the previous ones, i.e. seen from the start of the line.
+# encoding (instead of a table of the permutations of the line):
+#  'comparisons': a var is visible when it is greater than each previous var (quadratic number of comparisons)
+#  'running_max': a var is visible when it is greater than the running maximum, kept in auxiliary variables (linear size)
+VISIBILITY_ENCODINGS = ('comparisons', 'running_max')
+
+def visible_count(vars_, count, *, encoding='comparisons', ctx=None):
+    assert encoding in VISIBILITY_ENCODINGS, f'Unknown visibility encoding: {encoding}'
+    vars_ = list(vars_)
+    ctx = ctx or context_of(vars_)
+    constraints, visibles = [], []
+    if encoding == 'comparisons':
+        visibles = [ And([ var > previous for previous in vars_[:i] ]) if i else BoolVal(True, ctx) for i, var in enumerate(vars_) ]
+    else:
+        highest = None
+        for var in vars_:
+            if highest is None:
+                visible, next_highest = BoolVal(True, ctx), var
+            else:
+                visible, next_highest = var > highest, FreshInt('highest', ctx)
+                constraints.append(next_highest == If(visible, var, highest))
+            visibles.append(visible)
+            highest = next_highest
+    constraints.append(Exactly(*visibles, count, ctx=ctx))
+    return constraints
+
+# CONSECUTIVE SET (renban, str8ts): the vars_ take distinct consecutive values (in any order), e.g. 4 2 5 3.
+# Instead of a disjunction over the permutations of each window of values (k! terms per window), the values are
+# distinct and lie in [lowest, lowest + k - 1] for an auxiliary lowest: k distinct values in an interval of k values
+# are that interval, i.e. max - min == k - 1. Linear size.
+# low, high: bounds of the values (optional), they bound lowest. With both, the values that every window of k values
+# contains (from high - k + 1 to low + k - 1) are taken by one of the vars_: redundant but much faster (order 9 renban).
+def consecutive_set(vars_, *, low=None, high=None):
+    vars_ = list(vars_)
+    if len(vars_) <= 1:
+        return [ var >= low for var in vars_ if low is not None ] + [ var <= high for var in vars_ if high is not None ]
+    lowest = FreshInt('lowest', context_of(vars_))
+    constraints = [ Distinct(vars_) ]
+    constraints += [ And(var >= lowest, var <= lowest + len(vars_) - 1) for var in vars_ ]
+    if low is not None:
+        constraints.append(lowest >= low)
+    if high is not None:
+        constraints.append(lowest + len(vars_) - 1 <= high)
+    if low is not None and high is not None:
+        constraints += [ Or([ var == val for var in vars_ ]) for val in range(high - len(vars_) + 1, low + len(vars_)) ]
+    return constraints
+
+# LAZY CONNECTIVITY: instead of asserting connected(...) up front, the constraints are solved without it and
+# each disconnected model is cut off (see solve_board(..., refine=...)). Most models are connected after a few cuts.
+
+# connected components of the cells active in the model m (largest first)
+def model_components(m, cells, active, *, neighbours=ortho_neighbours):
+    is_active = { cell: active[cell] if isinstance(active[cell], bool) else is_true(m.eval(active[cell], model_completion=True))
+            for cell in cells }
+    components, seen = [], set()
+    for cell in cells:
+        if not is_active[cell] or cell in seen:
+            continue
+        component, todo = [], [cell]
+        seen.add(cell)
+        while todo:
+            current = todo.pop()
+            component.append(current)
+            for neigh in neighbours(current):
+                if is_active.get(neigh) and neigh not in seen:
+                    seen.add(neigh)
+                    todo.append(neigh)
+        components.append(component)
+    return sorted(components, key=len, reverse=True)
+
+# Cuts of the model m when its active cells are not connected (same arguments as connected).
+# For a component C of the model and an active cell v outside of C (the root or a cell of the largest component):
+# a path from any cell u of C to v leaves C through a cell of its boundary. So that cell has to be active.
+def connectivity_cuts(m, cells, active, *, neighbours=ortho_neighbours, root=None):
+    cells = list(cells)
+    components = model_components(m, cells, active, neighbours=neighbours)
+    if not components:
+        return []
+    if root is None:
+        main, anchor = components[0], active[components[0][0]]
+    else:
+        main = next((component for component in components if root in component), None)
+        anchor = active[root]
+    all_cells = set(cells)
+    cuts = []
+    for component in components:
+        if component is main:
+            continue
+        in_component = set(component)
+        boundary = { neigh for cell in component for neigh in neighbours(cell)
+                if neigh in all_cells and neigh not in in_component }
+        boundary_active = Or([ active[cell] for cell in sorted(boundary) ])
+        cuts.extend(Implies(And(active[u], anchor), boundary_active) for u in component)
+    return cuts
+
+# z3 model values -> plain python values (so that solutions can be pickled or dumped as json)
+# m[var] is None when the variable does not occur in the model.
+def as_python(value):
+    if value is None or isinstance(value, (bool, int, str)): # already python (e.g. values read with as_long())
+        return value
+    if isinstance(value, (list, tuple)):
+        return [ as_python(val) for val in value ]
+    if is_int_value(value):
+        return value.as_long()
+    if is_true(value):
+        return True
+    if is_false(value):
+        return False
+    return str(value)
+
+# COLLECTION: the constraints are added to the solver s (Solver or Optimize) by group, as they are produced
+# (a generator needs not be made a list):
+#   collect = ConstraintCollector(s)
+#   collect('adjacency', constraints) # an expression, or an iterable (nested lists...) of them
+# A constraint structurally identical to one already added is skipped: z3 shares the identical terms (of a context),
+# so they have the same ast id. (The added terms are kept alive by s: their ids are not reused.)
+# counts: group -> {'added': ..., 'duplicates': ...}, also in the stats of the current solve session (constraint_groups)
+class ConstraintCollector:
+    def __init__(self, s):
+        self.s = s
+        self.ids = set()
+        self.counts = {}
+        session = current_session()
+        if session is not None:
+            session.stats['constraint_groups'] = self.counts
+
+    def __call__(self, group, constraints):
+        counts = self.counts.setdefault(group, {'added': 0, 'duplicates': 0})
+        for constraint in _constraints(constraints, self.s.ctx):
+            if constraint.get_id() in self.ids:
+                counts['duplicates'] += 1
+                continue
+            self.ids.add(constraint.get_id())
+            self.s.add(constraint)
+            counts['added'] += 1
+
+def _constraints(constraints, ctx):
+    if isinstance(constraints, (ExprRef, bool)):
+        yield _as_z3(constraints, ctx)
+    else:
+        for constraint in constraints:
+            yield from _constraints(constraint, ctx)
+
+# s.check() reporting to the current solve session (if any)
+def check_solver(s, *assumptions):
+    session = current_session()
+    if session is None:
+        return s.check(*assumptions)
+    return session.check(s, *assumptions)
+
+# values of the variables in the model: same nesting as the given board (list of rows, tuple of lists...)
+def model_values(m, board):
+    if isinstance(board, (list, tuple)):
+        return type(board)(model_values(m, item) for item in board)
+    if is_const(board) and board.decl().kind() == Z3_OP_UNINTERPRETED:
+        return m[board]
+    # expression (e.g. If(b, 1, 0)) of the variables
+    return m.eval(board, model_completion=True)
+
+# NoSolution (unsat, or unknown and why) unless the check of s was sat
+def ensure_sat(s, res):
+    if res != sat:
+        raise NoSolution(str(res), s.reason_unknown() if res == unknown else None)
+
+# check the solver s, and again (incrementally) with the (lazy) constraints violated by the model, until none is
+# assumptions: checked first under these literals, without them (keeping the cuts learned) if this is unsat
+def check_refined(s, refine=None, assumptions=()):
+    res = check_solver(s, *assumptions)
+    while True:
+        if res == unsat and assumptions:
+            assumptions = ()
+        elif res != sat or refine is None:
+            return res
+        else:
+            cuts = refine(s.model())
+            if not cuts:
+                return res
+            s.add(cuts)
+        res = check_solver(s, *assumptions)
+
+# UNIQUENESS: with a session opened with check_unique=True (see registry.run), once a solution is found, it is
+# blocked and the same solver is checked again: the solution is unique if there is no other one.
+def check_unique_requested():
+    session = current_session()
+    return session is not None and session.check_unique
+
+# the board has another value than in values (same nesting)
+def blocking_clause(board, values):
+    def differences(board, values):
+        if isinstance(board, (list, tuple)):
+            for item, value in zip(board, values):
+                yield from differences(item, value)
+        elif values is not None: # None: the variable is not in the model (unconstrained)
+            yield board != values
+    diffs = list(differences(board, values))
+    return Or(diffs) if diffs else False
+
+# res: result of the check with the solution blocked
+def record_unique(res):
+    current_session().unique = True if res == unsat else False if res == sat else None # None: unknown
+
+# ALL SOLUTIONS: with a session opened with on_solution (see registry.iter_solutions), each solution is passed to
+# on_solution, blocked, and the same solver is checked again, until there is no other solution (or on_solution raises
+# StopEnumeration). The solutions are blocked on the board only: the auxiliary variables (distances of connected,
+# counters...) are not part of it, so their many values for the same board are not enumerated.
+def enumerating_solutions():
+    session = current_session()
+    return session is not None and session.on_solution is not None
+
+def solution_found(solution):
+    current_session().on_solution(solution)
+
+# check the solver s (Solver or Optimize) and read the board in the model
+# refine: model -> the (lazy) constraints it violates, e.g. connectivity_cuts. They are added and s is checked again
+# (incrementally) until the model violates none of them.
+# project: what tells two solutions apart, when checking uniqueness or enumerating the solutions (default: the board).
+#   e.g. where the tents are, but not which tree each tent is coupled with.
+# assumptions: literals guiding each check, dropped when there is no solution under them (see check_refined)
+def solve_board(s, board, refine=None, project=None, assumptions=()):
+    project = board if project is None else project
+    if enumerating_solutions():
+        res = check_refined(s, refine, assumptions)
+        while res == sat:
+            m = s.model()
+            solution_found(model_values(m, board))
+            s.add(blocking_clause(project, model_values(m, project)))
+            res = check_refined(s, refine, assumptions)
+        if res == unknown: # the enumeration is not complete
+            ensure_sat(s, res)
+        return None
+    ensure_sat(s, check_refined(s, refine, assumptions))
+    m = s.model()
+    if check_unique_requested():
+        s.add(blocking_clause(project, model_values(m, project)))
+        record_unique(check_refined(s, refine, assumptions))
+    return model_values(m, board)
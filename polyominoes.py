@@ -0,0 +1,85 @@
+import functools
+from puzzles_common import inside_board, ortho_neighbours
+
+# Polyominoes (connected sets of cells) of a height x width grid, as bitmasks: cell (l, c) is the bit l * width + c.
+# They are enumerated with Redelmeier's algorithm, rooted at a given cell (instead of growing them cell by cell and
+# sorting tuples to remove the duplicates): each polyomino is generated exactly once.
+
+def cell_bit(index_, *, width):
+    l, c = index_
+    return 1 << (l * width + c)
+
+def mask_of(cells, *, width):
+    res = 0
+    for cell in cells:
+        res |= cell_bit(cell, width=width)
+    return res
+
+def cells_of(mask, *, width):
+    res = []
+    while mask:
+        low = mask & -mask
+        res.append(divmod(low.bit_length() - 1, width))
+        mask ^= low
+    return res
+
+# bitmask of the orthogonal neighbours (inside the board) of each cell
+@functools.lru_cache(maxsize=4096)
+def grid_neighbours(height, width):
+    geom = {'height': height, 'width': width}
+    return tuple( mask_of([ neigh for neigh in ortho_neighbours(divmod(i, width)) if inside_board(neigh, **geom) ], width=width)
+            for i in range(height * width) )
+
+def neighbours_of(mask, *, height, width):
+    neighbours = grid_neighbours(height, width)
+    res = 0
+    for cell in cells_of(mask, width=width):
+        res |= neighbours[cell[0] * width + cell[1]]
+    return res
+
+# the cells around the polyomino (inside the board)
+def fence_of(mask, *, height, width):
+    return neighbours_of(mask, height=height, width=width) & ~mask
+
+# The valid cells at distance < size of root (walking on valid cells): the other cells are in no polyomino of size
+# cells containing root.
+def reachable(root, size, valid, *, height, width):
+    neighbours = grid_neighbours(height, width)
+    res = frontier = cell_bit(root, width=width)
+    for _ in range(size - 1):
+        new = 0
+        for cell in cells_of(frontier, width=width):
+            new |= neighbours[cell[0] * width + cell[1]]
+        frontier = new & valid & ~res
+        if not frontier:
+            break
+        res |= frontier
+    return res
+
+# The polyominoes of size cells containing root (l, c), made of valid cells (a bitmask; root is always valid).
+# Memoized on (root, size, the reachable valid cells): e.g. for the same clue checked again with another valid mask.
+def polyominoes(root, size, valid, *, height, width):
+    allowed = reachable(root, size, valid | cell_bit(root, width=width), height=height, width=width)
+    return _polyominoes(root, size, allowed, height, width)
+
+@functools.lru_cache(maxsize=4096)
+def _polyominoes(root, size, allowed, height, width):
+    neighbours = grid_neighbours(height, width)
+    if bin(allowed).count('1') < size:
+        return ()
+    res = []
+    # untried: the cells that can still be added (in this branch). seen: the polyomino and the cells that were
+    # candidates once: a cell is a candidate at most once, so a polyomino is never generated twice.
+    def extend(poly, nb_cells, untried, seen):
+        if nb_cells == size:
+            res.append(poly)
+            return
+        while untried:
+            low = untried & -untried
+            untried ^= low
+            new = neighbours[low.bit_length() - 1] & allowed & ~seen
+            extend(poly | low, nb_cells + 1, untried | new, seen | new)
+    root_bit = cell_bit(root, width=width)
+    candidates = neighbours[root[0] * width + root[1]] & allowed
+    extend(root_bit, 1, candidates, root_bit | candidates)
+    return tuple(res)
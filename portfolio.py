@@ -0,0 +1,131 @@
+import argparse
+import inspect
+import json
+import multiprocessing
+import multiprocessing.connection
+import sys
+import time
+import registry
+from batch_solve import read_records
+
+# Portfolio solving: several variants of the same solve (encodings, solver options, random seeds) are run at the same
+# time, each in its own process. The first definitive answer (sat or unsat) is returned, the other processes are
+# killed. Which variant wins is reported (sink, or the --log file): to tune the defaults of each puzzle type.
+
+# A variant: {'name': ..., 'kwargs': {...}, 'seed': ...}
+#  kwargs: arguments of the solver (overriding the ones of the puzzle)
+#  seed: z3's random seed (smt.random_seed and sat.random_seed)
+
+# arguments of the solvers having alternatives worth racing: the first value is the default one
+ALTERNATIVES = {
+        'solver': ['optimize', 'solver'],
+        'encoding': ['int', 'bool'],
+        'lazy_connectivity': [False, True],
+        'line_encoding': ['regular', 'patterns'],
+        'visibility': ['comparisons', 'running_max'],
+        }
+
+# nb variants of the solver of kind: the default one, one for each alternative of its arguments, then other seeds
+def default_variants(kind, nb=4):
+    params = inspect.signature(registry.get_solver(kind)).parameters
+    variants = [{'name': 'default', 'kwargs': {}, 'seed': 0}]
+    for param, values in ALTERNATIVES.items():
+        if param in params:
+            variants.extend({'name': f'{param}={value}', 'kwargs': {param: value}, 'seed': 0} for value in values[1:])
+    seed = 1
+    while len(variants) < nb:
+        variants.append({'name': f'seed={seed}', 'kwargs': {}, 'seed': seed})
+        seed += 1
+    return variants[:nb]
+
+# in the process of a variant: its result is sent on conn
+def run_variant(conn, kind, variant, options, kwargs):
+    from z3 import set_param
+    from more_z3 import as_python
+    set_param('smt.random_seed', variant.get('seed', 0))
+    set_param('sat.random_seed', variant.get('seed', 0))
+    try:
+        result = registry.run(kind, **options, **dict(kwargs, **variant.get('kwargs', {})))
+        res = {'status': result.status, 'solution': as_python(result.solution), 'elapsed': result.elapsed}
+        if 'reason_unknown' in result.stats:
+            res['reason_unknown'] = result.stats['reason_unknown']
+        if result.unique is not None:
+            res['unique'] = result.unique
+    except Exception as e:
+        res = {'status': 'error', 'error': f'{type(e).__name__}: {e}'}
+    conn.send(res)
+    conn.close()
+
+# Solve with the variants (default: default_variants(kind)) racing.
+# options: of registry.run (check_unique, timeout, rlimit): the budget is per variant
+# Returns the result of the winning variant (its 'variant' is its name) or, without a definitive answer, of the last
+# variant to finish ('unknown' if one of them is, 'error' otherwise).
+# sink: called with the report of the race: its winner (None without a definitive answer) and the status of each
+# variant (None: killed)
+def solve_portfolio(kind, *, variants=None, sink=None, check_unique=False, timeout=None, rlimit=None, **kwargs):
+    variants = variants or default_variants(kind)
+    options = {'check_unique': check_unique, 'timeout': timeout, 'rlimit': rlimit}
+    started = time.perf_counter()
+    racing = {} # connection -> (process, variant)
+    results = {}
+    winner = None
+    try:
+        for variant in variants:
+            reader, writer = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=run_variant, args=(writer, kind, variant, options, kwargs), daemon=True)
+            process.start()
+            writer.close()
+            racing[reader] = (process, variant)
+        while racing and winner is None:
+            for reader in multiprocessing.connection.wait(list(racing)):
+                process, variant = racing.pop(reader)
+                try:
+                    res = reader.recv()
+                except EOFError: # the process died (e.g. out of memory)
+                    process.join()
+                    res = {'status': 'error', 'error': f'exit code {process.exitcode}'}
+                res['variant'] = variant['name']
+                results[variant['name']] = res
+                if res['status'] in ('sat', 'unsat'):
+                    winner = res
+                    break
+    finally:
+        for process, _ in racing.values():
+            process.terminate()
+        for process, _ in racing.values():
+            process.join()
+    if winner is not None:
+        res = winner
+    else:
+        res = next(( res for res in reversed(list(results.values())) if res['status'] == 'unknown' ),
+                list(results.values())[-1])
+    if sink is not None:
+        sink({'type': kind, 'winner': winner and winner['variant'], 'status': res['status'],
+            'elapsed': time.perf_counter() - started,
+            'variants': { variant['name']: results[variant['name']]['status'] if variant['name'] in results else None
+                for variant in variants }})
+    return res
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Solve a stream of puzzles (json lines), racing variants of each solve.')
+    parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin)
+    parser.add_argument('-k', '--variants', type=int, default=4, help='number of variants raced (default: %(default)s)')
+    parser.add_argument('--log', type=argparse.FileType('a'), default=None, help='append the report of each race (json lines)')
+    parser.add_argument('--check-unique', action='store_true', help='tell whether each solution is unique')
+    parser.add_argument('--timeout', type=float, default=None, metavar='SECONDS', help='time budget of each variant')
+    parser.add_argument('--rlimit', type=int, default=None, help='z3 resource budget of each variant')
+    args = parser.parse_args()
+
+    for record in read_records(args.input):
+        def log(report):
+            if args.log is not None:
+                print(json.dumps(dict(report, id=record.get('id'))), file=args.log, flush=True)
+        if 'error' in record: # an invalid line (see batch_solve.read_records)
+            res = {'error': record['error']}
+        else:
+            try:
+                res = solve_portfolio(record['type'], variants=default_variants(record['type'], args.variants), sink=log,
+                        check_unique=args.check_unique, timeout=args.timeout, rlimit=args.rlimit, **record.get('kwargs', {}))
+            except Exception as e: # one bad puzzle should not bring down the whole batch
+                res = {'error': f'{type(e).__name__}: {e}'}
+        print(json.dumps(dict(res, id=record.get('id'), type=record.get('type'))), flush=True)
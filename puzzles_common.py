@@ -1,3 +1,4 @@
+import functools
 import itertools
 from z3 import And, Distinct
 from collections import defaultdict
@@ -48,3 +49,14 @@ def ortho_neighbours(index_):
         (l+down, c),
         (l, c-left),
         (l, c+right)]
+
+# sort of subset_sum: the ways to spawn total cells in the 4 directions (up, down, left, right)
+# (a few thousand tuples at most: cached in memory, not worth a stored table)
+@functools.lru_cache(maxsize=None)
+def distribute_in_4_directions(total):
+    return tuple( (i, j, k, l)
+            for i in range(total+1)
+            for j in range(total-i+1)
+            for k in range(total-i-j+1)
+            for l in range(total-i-j-k+1)
+            if i + j + k + l == total )
@@ -0,0 +1,183 @@
+import importlib.util
+import os
+import queue
+import threading
+from solve_session import solve_session, SolveResult, StopEnumeration, NoSolution
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# puzzle type -> name of the solve_* function in solve-<puzzle type>.py
+# Nothing is imported here: a solver module (and z3 with it) is loaded the first time its type is requested.
+SOLVERS = {
+    'akari': 'solve_akari',
+    'aqre': 'solve_puzzle_aqre',
+    'aye-heya': 'solve_puzzle_aye_heya',
+    'aye2-heya': 'solve_puzzle_aye2_heya',
+    'baggu': 'solve_puzzle_baggu',
+    'campixu': 'solve_puzzle_campixu',
+    'canal-view': 'solve_puzzle_canal_view',
+    'chocona': 'solve_puzzle_chocona',
+    'dominosa': 'solve_puzzle_dominosa',
+    'doppelblock': 'solve_puzzle_doppelblock',
+    'ebony-ivory': 'solve_puzzle_ebony_ivory',
+    'faktorism': 'solve_puzzle_faktorism',
+    'filling': 'solve_puzzle_range',
+    'fobidoshi': 'solve_puzzle_fobidoshi',
+    'fuzuli': 'solve_puzzle_fuzuli',
+    'gappy': 'solve_puzzle_gappy',
+    'grades': 'solve_puzzle_grades',
+    'hanare': 'solve_puzzle_hanare',
+    'heyawake': 'solve_puzzle_heyawake',
+    'hidato': 'solve_hidato',
+    'hitori': 'solve_puzzle_hitori',
+    'irasuto': 'solve_puzzle_irasuto',
+    'kakurasu': 'solve_puzzle_kakurasu',
+    'kakuro': 'solve_kakuro',
+    'keen': 'solve_keen',
+    'killer-sudoku': 'solve_killer_sudoku',
+    'kojun': 'solve_puzzle_kojun',
+    'kuriku': 'solve_puzzle_kuriku',
+    'kuroshuto': 'solve_puzzle_kuroshuto',
+    'lampions': 'solve_puzzle_lampions',
+    'magnets': 'solve_magnets',
+    'makaro': 'solve_puzzle_makaro',
+    'mathrax': 'solve_puzzle_mathrax',
+    'mosaic': 'solve_puzzle_mosaic',
+    'nanbaboru': 'solve_puzzle_nanbaboru',
+    'nanro': 'solve_puzzle_nanro',
+    'nondango': 'solve_puzzle_nondango',
+    'norinori': 'solve_puzzle_norinori',
+    'nuribou': 'solve_puzzle_nuribou',
+    'nurikabe': 'solve_puzzle_nurikabe',
+    'palisade': 'solve_puzzle_palisade',
+    'pattern': 'solve_pattern',
+    'pillen': 'solve_puzzle_pillen',
+    'putteria': 'solve_puzzle_putteria',
+    'range': 'solve_puzzle_range',
+    'renban': 'solve_puzzle_renban',
+    'ripple-effect': 'solve_puzzle_ripple_effect',
+    'schlange': 'solve_puzzle_schlange',
+    'shikaku': 'solve_puzzle_shikaku',
+    'slitherlink': 'solve_puzzle_slitherlink',
+    'str8ts': 'solve_puzzle_str8ts',
+    'suguru': 'solve_puzzle_suguru',
+    'sukoro': 'solve_puzzle_sukoro',
+    'tairupeinto': 'solve_puzzle_tairupeinto',
+    'takuzu': 'solve_puzzle_takuzu',
+    'tatami': 'solve_puzzle_tatami',
+    'tents': 'solve_tents',
+    'thermometer': 'solve_puzzle_thermometer',
+    'towers': 'solve_tower_puzzle',
+    'tracks': 'solve_tracks',
+    'unequal': 'solve_unequal',
+    'usoone': 'solve_puzzle_usoone',
+    'yakuso': 'solve_puzzle_yakuso',
+    'zahlenkreuz': 'solve_puzzle_zahlenkreuz',
+    'zehnergitter': 'solve_puzzle_zehnergitter',
+    'zipline': 'solve_puzzle_zipline',
+    }
+
+# loaded solve_* functions
+_loaded = {}
+_lock = threading.Lock()
+
+def kinds():
+    return sorted(SOLVERS)
+
+def _load_module(kind):
+    path = os.path.join(HERE, f'solve-{kind}.py')
+    # 'killer-sudoku' -> solve_killer_sudoku (hyphens are not allowed in module names)
+    spec = importlib.util.spec_from_file_location('solve_' + kind.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def get_solver(kind):
+    if kind not in SOLVERS:
+        raise ValueError(f'Unknown puzzle type: {kind}')
+    with _lock:
+        if kind not in _loaded:
+            module = _load_module(kind)
+            _loaded[kind] = getattr(module, SOLVERS[kind])
+    return _loaded[kind]
+
+# Load the solvers ahead of time (e.g. when warming up a worker process)
+def preload(kinds_=None):
+    for kind in (SOLVERS if kinds_ is None else kinds_):
+        get_solver(kind)
+
+# Uniform entry point: every solver is called with keyword arguments only.
+def solve(kind, **kwargs):
+    return get_solver(kind)(**kwargs)
+
+# Same as solve, but the solve is instrumented: the result carries the solution and the statistics
+# (encode_time, check_time, nb_checks, nb_assertions, total_time and z3's own statistics).
+# The statistics are also passed to sink (a callable) if one is given.
+# with_counts: the statistics also have the size of the constraints: nb_terms, nb_variables (and count_time, the time
+# spent counting them: it is not part of the budget nor of elapsed)
+# check_unique: the result also tells whether the solution is unique (checked on the same solver, see more_z3.solve_board)
+# timeout (seconds), rlimit (z3 resource units): budget of the solve. Without a solution, the result has no solution
+# and its status is 'unsat', or 'unknown' (e.g. out of budget: the reason is in stats['reason_unknown']).
+# cancelled: a threading.Event, set to stop the solve (see solve_session.SolveSession)
+def run(kind, *, sink=None, check_unique=False, timeout=None, rlimit=None, cancelled=None, with_counts=False, **kwargs):
+    solver = get_solver(kind) # loading the module is not part of the timings
+    solution, status = None, 'sat'
+    with solve_session(check_unique=check_unique, timeout=timeout, rlimit=rlimit, cancelled=cancelled,
+            with_counts=with_counts) as session:
+        try:
+            solution = solver(**kwargs)
+        except NoSolution as e:
+            status = e.status
+            if e.reason is not None:
+                session.stats['reason_unknown'] = e.reason
+    stats = dict(session.stats, kind=kind, status=status)
+    if sink is not None:
+        sink(stats)
+    return SolveResult(solution, stats, session.unique, status, stats['total_time'] - stats.get('count_time', 0.0))
+
+# The solutions (at most limit of them), yielded as they are found by a single incremental solver
+# (see more_z3.solve_board). Another solution is searched only when the next one is requested.
+# The solver runs in a thread, but never at the same time as the caller: z3 is used by one thread at a time.
+# timeout, rlimit: budget of the whole enumeration (see run). When it is exhausted, NoSolution('unknown') is raised
+# after the solutions found.
+def iter_solutions(kind, *, limit=None, timeout=None, rlimit=None, **kwargs):
+    solver = get_solver(kind)
+    found = queue.Queue() # ('solution', solution), ('done', None) or ('error', exception)
+    proceed = queue.Queue() # answer to a solution: True for the next one, False to stop
+    def on_solution(solution):
+        found.put(('solution', solution))
+        if not proceed.get():
+            raise StopEnumeration()
+    def enumerate_():
+        try:
+            with solve_session(on_solution=on_solution, timeout=timeout, rlimit=rlimit):
+                solver(**kwargs)
+            found.put(('done', None))
+        except StopEnumeration:
+            pass
+        except Exception as e:
+            found.put(('error', e))
+    thread = threading.Thread(target=enumerate_, name=f'iter_solutions-{kind}', daemon=True)
+    waiting = False # the solver thread waits for an answer
+    nb_solutions = 0
+    try:
+        if limit is not None and limit <= 0:
+            return
+        thread.start()
+        while True:
+            what, value = found.get()
+            if what == 'done':
+                return
+            if what == 'error':
+                raise value
+            waiting = True
+            yield value
+            nb_solutions += 1
+            if limit is not None and nb_solutions >= limit:
+                return
+            waiting = False
+            proceed.put(True)
+    finally:
+        if waiting:
+            proceed.put(False)
+            thread.join()
@@ -1,6 +1,6 @@
 from z3 import *
 import itertools
-from more_z3 import IntMatrix, Exactly, coerce_eq
+from more_z3 import IntMatrix, Exactly, AtMost, coerce_eq, solve_board, ConstraintCollector
 from puzzles_common import flatten, transpose, inside_board
 from funcy import isnone
 from more_itertools import split_when
@@ -43,19 +43,22 @@ def get_vertical_cages(rows):
     res = walk_values(transpose_coordinates_lst, res)
     return res
 
-def solve_akari(puzzle, *, height, width):
-    X = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_akari(puzzle, *, height, width, ctx=None):
+    X = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     cell_vars = flatten(X)
     clues = flatten(puzzle)
     assert len(cell_vars) == len(clues), "Discrepancy between puzzle and cell-variables"
 
-    complete_c = []
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
     for cell_var, clue in zip(cell_vars, clues):
         if clue == WALL or clue in (0,1,2,3,4):
-            complete_c.append(cell_var == WALL)
+            collect('complete', cell_var == WALL)
         else:
-            complete_c.append(Xor(cell_var == LIGHT_BULB, cell_var == NOT_LIGHT_BULB))
+            collect('complete', Xor(cell_var == LIGHT_BULB, cell_var == NOT_LIGHT_BULB))
 
     geom = {'width': width, 'height': height}
     at_ = lambda l, c: X[l][c]
@@ -68,12 +71,11 @@ def solve_akari(puzzle, *, height, width):
         neigh_as_light_bulb =  [at_(*cell) == LIGHT_BULB for cell in valid_neighbours(l, c)]
         return Exactly(*neigh_as_light_bulb, count_lightbulbs)
 
-    count_surrounding_light_bulbs_c =[]
     for l, c in itertools.product(range(height), range(width)):
         clue = puzzle[l][c]
         if clue in (0, 1, 2, 3, 4):
             cnstr = gen_count_lightbulb_constraint(l, c, count_lightbulbs=clue)
-            count_surrounding_light_bulbs_c.append(cnstr)
+            collect('count_surrounding_light_bulbs', cnstr)
 
     def get_vars_at(indices):
         return [ at_(*ind) for ind in indices ]
@@ -92,40 +94,27 @@ def solve_akari(puzzle, *, height, width):
     # two lightbulbs can't illuminate each other. territory? forbid encroachment?
 
     # there can be at most one bulb in each horizontal cage
-    _h_no_encroachment_c = []
     for hcage in horizontal_cages:
         light_bulbs_in_cage = vars_eq_scalar(get_vars_at(hcage), LIGHT_BULB)
         cnstrnt = AtMost(*light_bulbs_in_cage, 1)
-        _h_no_encroachment_c.append(cnstrnt)
-
+        collect('no_encroachment', cnstrnt)
 
-    _v_no_encroachment_c = []
     for vcage in vertical_cages:
         light_bulbs_in_cage = vars_eq_scalar(get_vars_at(vcage), LIGHT_BULB)
         cnstrnt = AtMost(*light_bulbs_in_cage, 1)
-        _v_no_encroachment_c.append(cnstrnt)
-
-    no_encroachment_c = _h_no_encroachment_c + _v_no_encroachment_c
+        collect('no_encroachment', cnstrnt)
 
     assert sorted(tuple(vertical_cages_indexed.keys())) == sorted(tuple(horizontal_cages_indexed.keys())), "verical cages and horizontal cages must have same keys"
 
-    all_empty_cells_illuminated_c = []
     for coord in vertical_cages_indexed.keys():
         vcage = vertical_cages_indexed[coord]
         hcage = horizontal_cages_indexed[coord]
         horiz_cage_has_lightbulb = Exactly(*vars_eq_scalar(get_vars_at(hcage), LIGHT_BULB), 1)
         vertic_cage_has_lightbulb = Exactly(*vars_eq_scalar(get_vars_at(vcage), LIGHT_BULB), 1)
         cnstrnt = Or(horiz_cage_has_lightbulb, vertic_cage_has_lightbulb)
-        all_empty_cells_illuminated_c.append(cnstrnt)
-
-
-
-    s = Solver()
-    s.add(complete_c + count_surrounding_light_bulbs_c + no_encroachment_c + all_empty_cells_illuminated_c)
+        collect('all_empty_cells_illuminated', cnstrnt)
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in X]
+    return solve_board(s, X)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
-from puzzles_common import flatten, inside_board, transpose
+from more_z3 import BinaryMatrix, binary_range, binary_eq, binary_sum_eq, binary_value, Exactly, solve_board, connected, ConstraintCollector
+from puzzles_common import flatten, inside_board, transpose, distribute_in_4_directions
 from more_itertools import pairwise
 from collections import defaultdict
 from puzzles_common import ortho_neighbours as neighbours
@@ -9,15 +9,6 @@ from puzzles_common import ortho_neighbours as neighbours
 WALL, POROUS = 1, 0
 IN_THE_LOOP, OUT_OF_THE_LOOP = 1, 0
 
-# sort of subset_sum
-def distribute_in_4_directions(total):
-    for i in range(total+1):
-        for j in range(total-i+1):
-            for k in range(total-i-j+1):
-                for l in range(total-i-j-k+1):
-                    if i + j + k + l == total:
-                        yield(i, j, k, l)
-
 # direction = up, down, left, right, -1, +1, -1, +1
 
 # can also be thought of as 'circle' for a distance
@@ -61,8 +52,8 @@ def gen_contiguous_constraints_single(index_, count_, *, width, height, board):
                     if inside_board(ind, **geom)]
             walls_var = [at_(*ind) for ind in walls_within_board]
             walled_enclosure = And(
-                    coerce_eq(encloure_vars, [IN_THE_LOOP] * len(encloure_vars)),
-                    coerce_eq(walls_var, [OUT_OF_THE_LOOP] * len(walls_var)))
+                    [ binary_eq(var, IN_THE_LOOP) for var in encloure_vars ]
+                    + [ binary_eq(var, OUT_OF_THE_LOOP) for var in walls_var ])
             possibs.append(simplify(walled_enclosure))
     return Exactly(*possibs, 1) #only one configuration would prevail
 
@@ -75,30 +66,33 @@ def gen_contiguous_constraints(puzzle, board, *, width, height):
             for ind, count_ in all_contig_spaces ]
     return constraints
 
-def solve_puzzle_baggu(puzzle, *, height, width):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+# encoding: 'int' or 'bool' cells and walls (see more_z3.BINARY_ENCODINGS)
+def solve_puzzle_baggu(puzzle, *, height, width, encoding='int', ctx=None):
+    board = BinaryMatrix('c', nb_rows=height, nb_cols=width, encoding=encoding, ctx=ctx)
+
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
 
-    range_c = [ Xor(cell == IN_THE_LOOP, cell == OUT_OF_THE_LOOP)
-            for cell in flatten(board) ]
+    collect('range', binary_range(flatten(board)))
 
     # This may be redundant
-    numbered_cells_inside_loop_c = []
     for row, puzzle_row in zip(board, puzzle):
         for cell, num in zip(row, puzzle_row):
             if num > 0:
-                cnstrnt = cell == IN_THE_LOOP
-                numbered_cells_inside_loop_c.append(cnstrnt)
+                cnstrnt = binary_eq(cell, IN_THE_LOOP)
+                collect('numbered_cells_inside_loop', cnstrnt)
 
     pars = {'board': board, 'width': width, 'height': height}
     # This is noted as contiguous constraint. Here it's more like contiguous squares that are visible from the current square. We shall keep the name so that we know we've copy-pasted from solve-range.py
-    contig_c = gen_contiguous_constraints(puzzle, **pars)
+    collect('contiguity', gen_contiguous_constraints(puzzle, **pars))
 
     #WALLS
 
     # left right   |cell|
-    lr_walls_board = IntMatrix('lr_w', nb_rows=height, nb_cols=width + 1)
+    lr_walls_board = BinaryMatrix('lr_w', nb_rows=height, nb_cols=width + 1, encoding=encoding, ctx=ctx)
     # top bottom
-    tb_walls_board = IntMatrix('tb_w', nb_rows=height + 1, nb_cols=width)
+    tb_walls_board = BinaryMatrix('tb_w', nb_rows=height + 1, nb_cols=width, encoding=encoding, ctx=ctx)
 
     left_and_right_walls = dict()
     for l, row_var_walls in enumerate(lr_walls_board):
@@ -119,23 +113,21 @@ def solve_puzzle_baggu(puzzle, *, height, width):
         walls_at [cell].extend(walls)
 
     walls_board = list(itertools.chain(lr_walls_board, tb_walls_board))
-    range_walls_c = [Xor(border == WALL, border == POROUS)
-            for border in flatten(walls_board)]
+    collect('range_walls', binary_range(flatten(walls_board)))
 
-    permeation_c = []
     for row, walls in zip(board, lr_walls_board):
         # walls[1:-1] we skip the walls at the extremities of the playing-field
         for adj_cells, wall in zip(pairwise(row), walls[1:-1]):
-            cnstrnt = Implies(wall == POROUS, adj_cells[0] == adj_cells[1])
-            permeation_c.append(cnstrnt)
-            cnstrnt = Implies(wall == WALL, adj_cells[0] != adj_cells[1])
-            permeation_c.append(cnstrnt)
+            cnstrnt = Implies(binary_eq(wall, POROUS), adj_cells[0] == adj_cells[1])
+            collect('permeation', cnstrnt)
+            cnstrnt = Implies(binary_eq(wall, WALL), adj_cells[0] != adj_cells[1])
+            collect('permeation', cnstrnt)
     for col, walls in zip(transpose(board), transpose(tb_walls_board)):
         for adj_cells, wall in zip(pairwise(col), walls[1:-1]):
-            cnstrnt = Implies(wall == POROUS, adj_cells[0] == adj_cells[1])
-            permeation_c.append(cnstrnt)
-            cnstrnt = Implies(wall == WALL, adj_cells[0] != adj_cells[1])
-            permeation_c.append(cnstrnt)
+            cnstrnt = Implies(binary_eq(wall, POROUS), adj_cells[0] == adj_cells[1])
+            collect('permeation', cnstrnt)
+            cnstrnt = Implies(binary_eq(wall, WALL), adj_cells[0] != adj_cells[1])
+            collect('permeation', cnstrnt)
 
     #Note: having previous walls_at dictionary and the following function with the same name is unfortunate.
     def walls_at(l, c):
@@ -147,104 +139,38 @@ def solve_puzzle_baggu(puzzle, *, height, width):
 
     # constraint on degree as proposed by Gerhard van der Knijff in 'Solving and generating puzzles with a connectivity constraint'
     # On this puzzle this can be seen as avoiding isolated walls and 'T' shaped wall formations of three walls.
-    degree_c = []
     for l in range(height+1):
         for c in range(width+1):
-            cnstrnt = Or(Sum(list(walls_at(l, c))) == 2,
-                    Sum(list(walls_at(l, c))) == 0)
-            degree_c.append(cnstrnt)
+            cnstrnt = Or(binary_sum_eq(walls_at(l, c), 2),
+                    binary_sum_eq(walls_at(l, c), 0))
+            collect('degree', cnstrnt)
 
     # CONNECTIVITY of cells inside the loop
 
-    range_num_c = []
-    # We assign number to each cell in the loop.
-    num_board = IntMatrix('n', nb_rows=height, nb_cols=width)
-    for row, num_row in zip(board, num_board):
-        for cell, num in zip(row, num_row):
-            cnstrnt = (cell == OUT_OF_THE_LOOP) == (num == -1)
-            range_num_c.append(cnstrnt)
-            cnstrnt = (cell == IN_THE_LOOP) == (num >= 0)
-            range_num_c.append(cnstrnt)
-
-    nums = flatten(num_board)
-    single_start_c = [ Exactly(*[n == 0 for n in nums], 1) ]
-
-
-    num_at_ = lambda l, c: num_board[l][c]
-    def gen_predecessor_constraints(l, c):
-        val_neighs = [ neigh for neigh in neighbours((l, c))
-                if inside_board(neigh, height=height, width=width)]
-        # the current cell
-        cell = num_at_(l,c)
-        val_neigh_cells = [num_at_(*cell) for cell in val_neighs]
-        one_neigh_is_predecessor = AtLeast(*[And(neigh_cell >= 0, neigh_cell == cell - 1) for neigh_cell in val_neigh_cells], 1)
-        cnstrnt = (cell > 0) == one_neigh_is_predecessor
-        return cnstrnt
-
-
-    predecessor_c = [ gen_predecessor_constraints(l, c)
-        for l, c in itertools.product(range(height), range(width)) ]
-
-    # connectivity constraint as proposed by Gerhard van der Knijff in 'Solving and generating puzzles with a connectivity constraint'
-    # This can be thought of as a creative use of proof-by-induction and Peano's way of definining natural numbers...
-    # Some seed/start ... then everything spawns from it.
-    connectivity_c = range_num_c + single_start_c + predecessor_c
+    cells = list(itertools.product(range(height), range(width)))
+    is_in_the_loop = { (l, c): binary_eq(board[l][c], IN_THE_LOOP) for l, c in cells }
+    collect('connectivity', connected(cells, is_in_the_loop))
 
     # no "porous" wall on the loop at the border of the board
     # Note: this is not sufficient to avoid islands inside
-    isolation_c = []
     for i in (0, -1):
         for wall, cell in zip(tb_walls_board[i], board[i]):
-            cnstrnt = (wall == POROUS) == (cell == OUT_OF_THE_LOOP)
-            isolation_c.append(cnstrnt)
+            cnstrnt = binary_eq(wall, POROUS) == binary_eq(cell, OUT_OF_THE_LOOP)
+            collect('isolation', cnstrnt)
         for wall, cell in zip(transpose(lr_walls_board)[i], transpose(board)[i]):
-            cnstrnt = (wall == POROUS) == (cell == OUT_OF_THE_LOOP)
-            isolation_c.append(cnstrnt)
+            cnstrnt = binary_eq(wall, POROUS) == binary_eq(cell, OUT_OF_THE_LOOP)
+            collect('isolation', cnstrnt)
 
     # "CONNECTIVITY" of cells not belonging to the loop
 
-    out_range_num_c = []
-    # We assign number to each cell in the loop.
-    out_num_board = IntMatrix('o', nb_rows=height+2, nb_cols=width+2)
-    for row, num_row in zip(board, out_num_board[1:-1]):
-        for cell, num in zip(row, num_row[1:-1]):
-            cnstrnt = (cell == IN_THE_LOOP) == (num == -1)
-            out_range_num_c.append(cnstrnt)
-            cnstrnt = (cell == OUT_OF_THE_LOOP) == (num >= 0)
-            out_range_num_c.append(cnstrnt)
-
-    # the extended/virtual border cells are all 'outside the loop'
-    outermost = out_num_board[0] + out_num_board[-1] + list(transpose(out_num_board)[0]) + list(transpose(out_num_board)[-1])
-    for num_row in outermost:
-        cnstrnt = (num_row >= 0)
-        out_range_num_c.append(cnstrnt)
-
-    out_nums = flatten(out_num_board)
-    out_single_start_c = [ Exactly(*[n == 0 for n in out_nums], 1) ]
-
-    out_num_at_ = lambda l, c: out_num_board[l][c]
-    def gen_out_predecessor_constraints(l, c):
-        val_neighs = [ neigh for neigh in neighbours((l, c))
-                if inside_board(neigh, height=height+2, width=width+2)]
-        # the current cell
-        cell = out_num_at_(l,c)
-        val_neigh_cells = [out_num_at_(*cell) for cell in val_neighs]
-        one_neigh_is_predecessor = AtLeast(*[And(neigh_cell >= 0, neigh_cell == cell - 1) for neigh_cell in val_neigh_cells], 1)
-        cnstrnt = (cell > 0) == one_neigh_is_predecessor
-        return cnstrnt
-
-    out_predecessor_c = [ gen_out_predecessor_constraints(l, c)
-        for l, c in itertools.product(range(height+2), range(width+2)) ]
-
-    out_connectivity_c = out_range_num_c + out_single_start_c + out_predecessor_c
-
-    s = Solver()
-
-    s.add( range_c + numbered_cells_inside_loop_c + contig_c + range_walls_c + permeation_c + degree_c + connectivity_c + isolation_c + out_connectivity_c )
+    # the board is extended by a border of virtual cells: they are all 'outside the loop'
+    out_cells = list(itertools.product(range(-1, height + 1), range(-1, width + 1)))
+    is_out_of_the_loop = { (l, c): binary_eq(board[l][c], OUT_OF_THE_LOOP) if inside_board((l, c), height=height, width=width) else True
+            for l, c in out_cells }
+    # the corner is always outside: so it can be the root
+    collect('out_connectivity', connected(out_cells, is_out_of_the_loop, root=(-1, -1)))
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in walls_board ]
+    return solve_board(s, [ [ binary_value(wall) for wall in row ] for row in walls_board ])
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Corral/007.a.htm by author Mokuani (https://mokuani.hatenablog.com/)
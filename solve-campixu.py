@@ -1,13 +1,13 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, rows_and_cols, get_same_block_indices
 from more_itertools import pairwise
 
 BLACK, WHITE = 1, 0
 
-def solve_puzzle_campixu(*, height, width, cage_ids, horizontal_counts, vertical_counts, horizontal_runs, vertical_runs):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_campixu(*, height, width, cage_ids, horizontal_counts, vertical_counts, horizontal_runs, vertical_runs, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ Xor(cell == BLACK, cell == WHITE)
             for cell in flatten(board) ]
@@ -48,13 +48,11 @@ def solve_puzzle_campixu(*, height, width, cage_ids, horizontal_counts, vertical
         cnstrnt = Exactly(*starts_black_run, nb_runs)
         run_c.append(cnstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + count_c + homogenous_cage_color_c + run_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Campixu/007.a.htm by author Johannes Kestler
@@ -1,20 +1,11 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
-from puzzles_common import flatten, inside_board
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, solve_board, connected, ConstraintCollector
+from puzzles_common import flatten, inside_board, distribute_in_4_directions
 from puzzles_common import ortho_neighbours as neighbours
 
 BLACK, WHITE = 1, 0
 
-# sort of subset_sum
-def distribute_in_4_directions(total):
-    for i in range(total+1):
-        for j in range(total-i+1):
-            for k in range(total-i-j+1):
-                for l in range(total-i-j-k+1):
-                    if i + j + k + l == total:
-                        yield(i, j, k, l)
-
 # direction = up, down, left, right, -1, +1, -1, +1
 
 # can also be thought of as 'circle' for a distance
@@ -75,20 +66,24 @@ def gen_contiguous_constraints(puzzle, board, *, width, height):
             for ind, count_ in all_contig_spaces ]
     return constraints
 
-def solve_puzzle_canal_view(puzzle, *, height, width):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_canal_view(puzzle, *, height, width, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
     pars = {'board': board, 'width': width, 'height': height}
 
-    contig_c = gen_contiguous_constraints(puzzle, **pars)
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
 
-    range_c = [ Xor(cell == BLACK, cell == WHITE)
-            for cell in flatten(board) ]
+    collect('range', ( Xor(cell == BLACK, cell == WHITE)
+            for cell in flatten(board) ))
 
     at_ = lambda l, c : board[l][c]
-    instance_c = [ at_(l, c) != BLACK
+    collect('instance', ( at_(l, c) != BLACK
             for l, c in itertools.product(range(height), range(width))
-            if puzzle[l][c] > 0 ]
+            if puzzle[l][c] > 0 ))
+
+    collect('contiguity', gen_contiguous_constraints(puzzle, **pars))
 
     # similar to gen_proximity_constraints in solve-tents.py
     # A square of 4 black cells or larger is forbidden.
@@ -102,53 +97,16 @@ def solve_puzzle_canal_view(puzzle, *, height, width):
 
     # In generating constraints we wander towards right and towards bottom
     # So : height - 1, width - 1
-    density_c = [ gen_density_constraints(l, c)
-        for l, c in itertools.product(range(height - 1), range(width - 1)) ]
+    collect('density', ( gen_density_constraints(l, c)
+        for l, c in itertools.product(range(height - 1), range(width - 1)) ))
 
     # CONNECTIVITY of black cells
 
-    range_num_c = []
-    # We assign number to each cell in the loop.
-    num_board = IntMatrix('num', nb_rows=height, nb_cols=width)
-    for row, num_row in zip(board, num_board):
-        for cell, num in zip(row, num_row):
-            cnstrnt = (cell == WHITE) == (num == -1)
-            range_num_c.append(cnstrnt)
-            cnstrnt = (cell == BLACK) == (num >= 0)
-            range_num_c.append(cnstrnt)
-
-    nums = flatten(num_board)
-    single_start_c = [ Exactly(*[n == 0 for n in nums], 1) ]
-
-
-    num_at_ = lambda l, c: num_board[l][c]
-    def gen_predecessor_constraints(l, c):
-        val_neighs = [ neigh for neigh in neighbours((l, c))
-                if inside_board(neigh, height=height, width=width)]
-        # the current cell
-        cell = num_at_(l,c)
-        val_neigh_cells = [num_at_(*cell) for cell in val_neighs]
-        one_neigh_is_predecessor = AtLeast(*[And(neigh_cell >= 0, neigh_cell == cell - 1) for neigh_cell in val_neigh_cells], 1)
-        cnstrnt = (cell > 0) == one_neigh_is_predecessor
-        return cnstrnt
-
-
-    predecessor_c = [ gen_predecessor_constraints(l, c)
-        for l, c in itertools.product(range(height), range(width)) ]
-
-    # connectivity constraint as proposed by Gerhard van der Knijff in 'Solving and generating puzzles with a connectivity constraint'
-    # This can be thought of as a creative use of proof-by-induction and Peano's way of definining natural numbers...
-    # Some seed/start ... then everything spawns from it.
-    connectivity_c = range_num_c + single_start_c + predecessor_c
-
-
-    s = Solver()
-
-    s.add( range_c + instance_c + contig_c + density_c + connectivity_c )
+    cells = list(itertools.product(range(height), range(width)))
+    is_black = { (l, c): board[l][c] == BLACK for l, c in cells }
+    collect('connectivity', connected(cells, is_black))
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Canal-View/007.a.htm by author Otto Janko
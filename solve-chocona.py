@@ -1,12 +1,12 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, get_same_block_indices, inside_board
 
 BLACK, WHITE = 1, 0
 
-def solve_puzzle_chocona(*, height, width, cage_ids, cage_counts):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_chocona(*, height, width, cage_ids, cage_counts, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ Xor(cell == BLACK, cell == WHITE)
             for cell in flatten(board) ]
@@ -42,13 +42,11 @@ def solve_puzzle_chocona(*, height, width, cage_ids, cage_counts):
         for l, c in itertools.product(range(height - 1), range(width - 1)) ]
     #constraint for both being-rectangular and disallowing orthogonal adjacency
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + cage_count_c + rect_adj_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Chocona/007.a.htm by author Iwa Daigeki
@@ -1,5 +1,5 @@
 from z3 import *
-from more_z3 import IntMatrix, Exactly, coerce_eq
+from more_z3 import IntMatrix, BoolMatrix, Exactly, coerce_eq, solve_board, BINARY_ENCODINGS, ConstraintCollector
 from puzzles_common import flatten, transpose
 from more_itertools import pairwise
 import itertools
@@ -10,45 +10,56 @@ HORIZ_START, HORIZ_END, VERTIC_START, VERTIC_END = -1, -2, 1, 2
 def normalize_domino(domino):
     return tuple(sorted(domino))
 
-def solve_puzzle_dominosa(puzzle, *, height, width, order):
-    board = IntMatrix('d', nb_rows=height, nb_cols=width)
+# encoding:
+#  'int': a cell is an Int (one of the 4 values)
+#  'bool': a cell is a dict value -> Bool (one-hot): z3 stays in pure SAT
+def solve_puzzle_dominosa(puzzle, *, height, width, order, encoding='int', ctx=None):
+    assert encoding in BINARY_ENCODINGS, f'Unknown encoding of the cells: {encoding}'
+    values = [HORIZ_START, HORIZ_END, VERTIC_START, VERTIC_END]
+    if encoding == 'bool':
+        one_hot = { val: BoolMatrix(f'd{val}', nb_rows=height, nb_cols=width, ctx=ctx) for val in values }
+        board = [ [ { val: one_hot[val][l][c] for val in values } for c in range(width) ]
+                for l in range(height) ]
+        is_ = lambda cell, val: cell[val]
+    else:
+        board = IntMatrix('d', nb_rows=height, nb_cols=width, ctx=ctx)
+        is_ = lambda cell, val: cell == val
+    is_not = lambda cell, val: Not(is_(cell, val))
 
-    complete_c = [ Exactly( cell == VERTIC_START, cell == VERTIC_END,
-            cell == HORIZ_START, cell == HORIZ_END, 1)
-            for cell in flatten(board) ]
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
+    collect('complete', ( Exactly( is_(cell, VERTIC_START), is_(cell, VERTIC_END),
+            is_(cell, HORIZ_START), is_(cell, HORIZ_END), 1)
+            for cell in flatten(board) ))
 
-    _no_aberrant_horiz_c = []
     for row in board:
         for domino in pairwise(row):
             # not-head and tail
-            abberrant_1 = And(domino[0] != HORIZ_START, domino[1] == HORIZ_END)
+            abberrant_1 = And(is_not(domino[0], HORIZ_START), is_(domino[1], HORIZ_END))
             # head and not-tail
-            _no_aberrant_horiz_c.append(Not(abberrant_1))
-            abberrant_2 = And(domino[0] == HORIZ_START, domino[1] != HORIZ_END)
-            _no_aberrant_horiz_c.append(Not(abberrant_2))
+            collect('no_aberrant', Not(abberrant_1))
+            abberrant_2 = And(is_(domino[0], HORIZ_START), is_not(domino[1], HORIZ_END))
+            collect('no_aberrant', Not(abberrant_2))
+
+    collect('no_aberrant', ( And(is_not(row[0], HORIZ_END), is_not(row[-1], HORIZ_START))
+            for row in board ))
 
-    _no_aberrant_vertic_c = []
     for row in transpose(board):
         for domino in pairwise(row):
             # not-head and tail
-            abberrant_1 = And(domino[0] != VERTIC_START, domino[1] == VERTIC_END)
-            _no_aberrant_vertic_c.append(Not(abberrant_1))
+            abberrant_1 = And(is_not(domino[0], VERTIC_START), is_(domino[1], VERTIC_END))
+            collect('no_aberrant', Not(abberrant_1))
             # head and not-tail
-            abberrant_2 = And(domino[0] == VERTIC_START, domino[1] != VERTIC_END)
-            _no_aberrant_vertic_c.append(Not(abberrant_2))
-
-    _no_aberrant_horiz_border_cell_c = [And(row[0] != HORIZ_END, row[-1] != HORIZ_START)
-            for row in board]
-
-    _no_aberrant_vertic_border_cell_c = [And(row[0] != VERTIC_END, row[-1] != VERTIC_START)
-            for row in transpose(board)]
+            abberrant_2 = And(is_(domino[0], VERTIC_START), is_not(domino[1], VERTIC_END))
+            collect('no_aberrant', Not(abberrant_2))
 
-    no_aberrant_c = ( _no_aberrant_horiz_c + _no_aberrant_horiz_border_cell_c +
-                    _no_aberrant_vertic_c + _no_aberrant_vertic_border_cell_c )
+    collect('no_aberrant', ( And(is_not(row[0], VERTIC_END), is_not(row[-1], VERTIC_START))
+            for row in transpose(board) ))
 
     # By taking both the start_variable and end_variable we may not
-    # need no_aberrant_c ... but it's better separated this way.
-    unique_c = []
+    # need no_aberrant ... but it's better separated this way.
     locs_h = defaultdict(list) #locations
     for var_row, row in zip(board, puzzle):
         for var, dom in zip(var_row, pairwise(row)):
@@ -60,22 +71,23 @@ def solve_puzzle_dominosa(puzzle, *, height, width, order):
     # normalized domino
     for n_domino in itertools.combinations_with_replacement(range(order + 1), 2):
         if n_domino in locs_h and n_domino in locs_v:
-            only_one_such_domino = Exactly(*[edge == VERTIC_START for edge in locs_v[n_domino]],
-                *[edge == HORIZ_START for edge in locs_h[n_domino]],
+            only_one_such_domino = Exactly(*[is_(edge, VERTIC_START) for edge in locs_v[n_domino]],
+                *[is_(edge, HORIZ_START) for edge in locs_h[n_domino]],
                 1)
-            unique_c.append(only_one_such_domino)
+            collect('unique', only_one_such_domino)
         elif n_domino not in locs_h:
-            only_one_such_domino = Exactly(*[edge == VERTIC_START for edge in locs_v[n_domino]], 1)
-            unique_c.append(only_one_such_domino)
+            only_one_such_domino = Exactly(*[is_(edge, VERTIC_START) for edge in locs_v[n_domino]], 1)
+            collect('unique', only_one_such_domino)
         elif n_domino not in locs_v:
-            only_one_such_domino = Exactly(*[edge == HORIZ_START for edge in locs_h[n_domino]], 1)
-            unique_c.append(only_one_such_domino)
+            only_one_such_domino = Exactly(*[is_(edge, HORIZ_START) for edge in locs_h[n_domino]], 1)
+            collect('unique', only_one_such_domino)
 
-    s = Solver()
-    s.add(complete_c + no_aberrant_c + unique_c)
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board]
+    if encoding == 'bool':
+        # back to the 4 values
+        board = [ [ If(cell[HORIZ_START], HORIZ_START, If(cell[HORIZ_END], HORIZ_END,
+                If(cell[VERTIC_START], VERTIC_START, VERTIC_END))) for cell in row ]
+                for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     pars = {'height': 4,
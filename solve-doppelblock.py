@@ -1,15 +1,15 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, rows_and_cols
 from more_itertools import windowed
 
 BLACK = 0
 
-def solve_puzzle_doppelblock(*, height, width, order, vertical_sums, horizontal_sums):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_doppelblock(*, height, width, order, vertical_sums, horizontal_sums, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     range_c = [ And(cell >= 0, cell <= order)
             for cell in flatten(board) ]
@@ -50,9 +50,7 @@ def solve_puzzle_doppelblock(*, height, width, order, vertical_sums, horizontal_
 
     s.add( range_c + count_black_cells_c + distinct_c + sum_block_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Doppelblock/007.a.htm by author Otto Janko
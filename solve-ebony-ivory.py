@@ -1,13 +1,13 @@
 import itertools
 from more_itertools import windowed
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, transpose, rows_and_cols
 
 BLACK, WHITE = 1, 0
 
-def solve_puzzle_ebony_ivory(*, height, width, horizontal_black_maxruns, horizontal_white_maxruns, vertical_black_maxruns, vertical_white_maxruns):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_ebony_ivory(*, height, width, horizontal_black_maxruns, horizontal_white_maxruns, vertical_black_maxruns, vertical_white_maxruns, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
     pars = {'board': board, 'width': width, 'height': height}
 
     range_c = [ Xor(cell == BLACK, cell == WHITE)
@@ -50,13 +50,11 @@ def solve_puzzle_ebony_ivory(*, height, width, horizontal_black_maxruns, horizon
         cnstrnt = Or(possibs)
         given_run_c.append(cnstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + do_not_exceed_run_c + given_run_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Ebony-Ivory/007.a.htm by author Mikhail Khotiner
@@ -1,12 +1,13 @@
 import itertools
 from z3 import *
+from more_z3 import solve_board
 from puzzles_common import flatten
 
-def solve_puzzle_faktorism(puzzle, *, height, width):
+def solve_puzzle_faktorism(puzzle, *, height, width, ctx=None):
     # noted horizontally on the puzzle (on top, or at bottom)
-    horizontal_factors = IntVector('hf', width)
+    horizontal_factors = IntVector('hf', width, ctx=ctx)
     #noted vertically on the puzzle (on the left or the right)
-    vertical_factors = IntVector('vf', height)
+    vertical_factors = IntVector('vf', height, ctx=ctx)
 
     _h_range_c = [ And(n >= 1, n <= width) for n in horizontal_factors ]
     _v_range_c = [ And(n >= 1, n <= height) for n in vertical_factors ]
@@ -19,14 +20,11 @@ def solve_puzzle_faktorism(puzzle, *, height, width):
             for l, c in itertools.product(range(height), range(width))
             if puzzle[l][c] > 0]
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + distinct_c + product_c )
 
-    s.check()
-    m = s.model()
-    return ([m[cell] for cell in horizontal_factors],
-            [m[cell] for cell in vertical_factors])
+    return solve_board(s, (horizontal_factors, vertical_factors))
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Faktorism/007.a.htm by author Iva Sallay
@@ -1,85 +1,96 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, Exactly, check_solver, check_unique_requested, enumerating_solutions, ensure_sat, solve_board, ConstraintCollector
 from puzzles_common import flatten, inside_board
 from puzzles_common import ortho_neighbours as neighbours
-
-# direction = up, down, left, right, -1, +1, -1, +1
-
-def get_block(index_, *, nb_cells, is_valid_cell):
-    if nb_cells == 1:
-        return {(index_, )}
-    if nb_cells >= 2:
-        block_minus_1 = get_block(index_, nb_cells = nb_cells-1, is_valid_cell=is_valid_cell)
-        res = set()
-        for bl in block_minus_1:
-            for cell in bl:
-                for neigh in neighbours(cell):
-                    if neigh not in bl:
-                        if is_valid_cell(neigh):
-                            res.add(tuple(sorted([neigh, *bl])))
-        return res
-
-# for a given enclosure find its fence/frontier for the given distance
-def get_fence(*,enclosure):
-    area_and_fence = set()
-    for cell in enclosure:
-        cell_neighbours = neighbours(cell)
-        for cell_neighbour in cell_neighbours:
-            area_and_fence.add(cell_neighbour)
-    return area_and_fence - set(enclosure)
+from polyominoes import polyominoes, mask_of, cells_of, fence_of
+
+# regions of a solution: the connected groups of cells having the same number
+def get_regions(solution, *, height, width):
+    seen, regions = set(), []
+    for index_ in itertools.product(range(height), range(width)):
+        if index_ in seen:
+            continue
+        region = [index_]
+        seen.add(index_)
+        for l, c in region: # region grows while it is walked
+            for neigh in neighbours((l, c)):
+                if inside_board(neigh, height=height, width=width) and neigh not in seen \
+                        and solution[neigh[0]][neigh[1]] == solution[l][c]:
+                    seen.add(neigh)
+                    region.append(neigh)
+        regions.append(region)
+    return regions
 
 # count_ contiguous squares at index_ (l, c)
 def gen_contiguous_constraints_single(index_, count_, *, width, height, board, puzzle):
     at_ = lambda l, c : board[l][c]
     at_puzzle = lambda l, c : puzzle[l][c]
-    def is_valid_cell(ind, current_index=index_, height=height, width=width):
-        if ind == current_index: # redundant check at_puzzle(ind) == count_
-            return True
-        if not inside_board(ind, height=height, width=width):
-            return False
-        # a cell is considered valid neighbour (to spawn) if it is empty
-        # or it has the same count_
-        return at_puzzle(*ind) == 0 or at_puzzle(*ind) == count_
+    geom = { 'width': width, 'height': height }
+    # a cell is considered valid neighbour (to spawn) if it is empty
+    # or it has the same count_
+    valid = mask_of([ (l, c) for l, c in itertools.product(range(height), range(width))
+        if at_puzzle(l, c) == 0 or at_puzzle(l, c) == count_ ], width=width)
+    # cell == count_, cell != count_: built once, shared by the blocks
+    eq_count, ne_count = {}, {}
+    def cell_eq_count(ind):
+        if ind not in eq_count:
+            eq_count[ind] = at_(*ind) == count_
+        return eq_count[ind]
+    def cell_ne_count(ind):
+        if ind not in ne_count:
+            ne_count[ind] = at_(*ind) != count_
+        return ne_count[ind]
     possibs = [] # possible configurations given the count_ of contiguous cells in the block
-    blocks = get_block(index_, nb_cells=count_, is_valid_cell=is_valid_cell)
+    blocks = polyominoes(index_, count_, valid, **geom)
     for block in blocks:
-        block_vars = [ at_(*ind) for ind in block ]
         # fence can be thought of as completely encircling the block
-        fence = get_fence(enclosure=block)
-        geom = { 'width': width, 'height': height }
-        fence_inside_board = [ ind for ind in fence
-                if inside_board(ind, **geom) ]
-        fence_var = [ at_(*ind) for ind in fence_inside_board ]
+        fence_inside_board = cells_of(fence_of(block, **geom), width=width)
         fenced_enclosure = And(
-                coerce_eq(block_vars, [count_] * len(block_vars)),
-                And([var != count_ for var in fence_var]))
+                And([ cell_eq_count(ind) for ind in cells_of(block, width=width) ]),
+                And([ cell_ne_count(ind) for ind in fence_inside_board ]))
         possibs.append(simplify(fenced_enclosure))
     return Exactly(*possibs, 1) #only one configuration would prevail
 
-def gen_contiguous_constraints(puzzle, board, *, width, height):
+# max_count: only the clues up to max_count are constrained
+def gen_contiguous_constraints(puzzle, board, *, width, height, max_count=None):
     pars = {'board': board, 'width': width,
             'height': height, 'puzzle': puzzle}
     all_contig_spaces = [ ((i, j), puzzle[i][j])
         for i, j in itertools.product(range(height), range(width))
-        if puzzle[i][j] > 0 ]
+        if puzzle[i][j] > 0 and (max_count is None or puzzle[i][j] <= max_count) ]
     constraints = [ gen_contiguous_constraints_single(ind, count_, **pars)
             for ind, count_ in all_contig_spaces ]
     return constraints
 
-def solve_puzzle_range(puzzle, *, height, width):
-    board = IntMatrix('b', nb_rows=height, nb_cols=width)
+# mode:
+#  'cegar': the blocks of the clues up to eager_size are enumerated. The regions of the other clues (and of the
+#       cells without clue) are checked in each model: the wrong ones are cut off and the solver checked again.
+#  'optimize': the blocks of all the clues are enumerated. The model of smallest sum is checked, and rejected if wrong.
+#       (the uniqueness of the solution can not be checked, nor the solutions enumerated, in this mode)
+# quiet: the rejected models are not printed
+def solve_puzzle_range(puzzle, *, height, width, mode='cegar', eager_size=4, quiet=True, ctx=None):
+    assert mode in ('cegar', 'optimize'), f'Unknown mode: {mode}'
+    board = IntMatrix('b', nb_rows=height, nb_cols=width, ctx=ctx)
     pars = {'board': board, 'width': width, 'height': height}
 
     vars_ = flatten(board)
     vals = flatten(puzzle)
-    instance_c = [var == val for var, val in zip(vars_, vals)
-            if val > 0]
-    contig_c = gen_contiguous_constraints(puzzle, **pars)
+    geom = { 'width': width, 'height': height }
+    at_ = lambda l, c : board[l][c]
+
+    s = Solver(ctx=ctx) if mode == 'cegar' else Optimize(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
 
     # There is no empty cell: And cell values range from 1 to height*width
-    complete_c = [ And(0 < cell, cell < height * width + 1)
-            for cell in flatten(board) ]
+    collect('complete', ( And(0 < cell, cell < height * width + 1)
+            for cell in flatten(board) ))
+
+    collect('contiguity', gen_contiguous_constraints(puzzle, **pars, max_count=eager_size if mode == 'cegar' else None))
+
+    collect('instance', ( var == val for var, val in zip(vars_, vals)
+            if val > 0 ))
 
     # The model wants the numbers outside the block to be different than
     # the number (count) in the block. But to resolve this constraint it
@@ -90,40 +101,59 @@ def solve_puzzle_range(puzzle, *, height, width):
     # one neighbour that is equal to it.
     # We have dodged the problem by using an optimizer (minimize cost).
     # But it is better to encode and incoroporate this constraint in the model.
-    geom = { 'width': width, 'height': height }
-    at_ = lambda l, c : board[l][c]
     def valid_neighbours(l, c):
         return [ neigh for neigh in neighbours((l, c))
                 if inside_board(neigh, **geom) ]
     def at_least_one_neighbour_is_same(l, c):
         return Or([ at_(l, c) == at_(*neigh)
                 for neigh in valid_neighbours(l, c) ])
-    ortho_neigh_c = [ Xor(
+    collect('ortho_neighbours', ( Xor(
         board[l][c] == 1,
         at_least_one_neighbour_is_same(l, c))
-        for l, c in itertools.product(range(height), range(width)) ]
-
-    # s = Solver()
-    # s.add(complete_c + contig_c + instance_c + ortho_neigh_c)
-    # s.check()
-    # m = s.model()
-    # solution_model = [ [ m[cell].as_long() for cell in row] for row in board ]
-    # return solution_model
-
-    opt = Optimize()
-    opt.add(complete_c + contig_c + instance_c + ortho_neigh_c)
-    cost = Int('cost')
+        for l, c in itertools.product(range(height), range(width)) ))
+
+    if mode == 'cegar':
+        # Most cells are in regions of the size of a clue: the numbers are first searched up to the largest clue,
+        # under an assumption literal. It is dropped (not the cuts learned) if there is no such solution.
+        small_numbers = Bool('small_numbers', ctx=ctx)
+        s.add(Implies(small_numbers, And([ var <= max(vals) for var in vars_ ])))
+        # CEGAR: the cells of a region whose number is not its size are equal and surrounded by different numbers.
+        # This is cut off for any number: if these cells form a region, their number is its size.
+        def region_cuts(m):
+            solution_model = [ [ m[cell].as_long() for cell in row ] for row in board ]
+            cuts = []
+            for region in get_regions(solution_model, **geom):
+                first = at_(*region[0])
+                if solution_model[region[0][0]][region[0][1]] != len(region):
+                    fence = cells_of(fence_of(mask_of(region, width=width), **geom), width=width)
+                    is_region = And([ at_(*ind) == first for ind in region[1:] ]
+                            + [ at_(*ind) != first for ind in fence ])
+                    cuts.append(Implies(is_region, first == len(region)))
+            if cuts and not quiet:
+                print('rejecting solution')
+                print(solution_model)
+            return cuts
+        return solve_board(s, board, refine=region_cuts, assumptions=[small_numbers])
+
+    # mode 'optimize': the smallest sum of the numbers, whose regions are then checked (and rejected, one by one)
+    if enumerating_solutions():
+        raise ValueError("The solutions are enumerated in mode 'cegar' only")
+    if check_unique_requested():
+        raise ValueError("The uniqueness of the solution is checked in mode 'cegar' only")
+    opt = s
+    cost = Int('cost', ctx=ctx)
     opt.add(cost == Sum(vars_))
     h = opt.minimize(cost)
-    opt.check()
+    ensure_sat(opt, check_solver(opt))
     opt.lower(h)
     m = opt.model()
     solution_model = [ [ m[cell].as_long() for cell in row] for row in board ]
 
     optimizer_check_model = opt
     while True:
-        print('checking solution')
-        print(solution_model)
+        if not quiet:
+            print('checking solution')
+            print(solution_model)
         optimizer_check_model.push()
         contig_model_c = gen_contiguous_constraints(solution_model, **pars)
         instance_model_c = [ var == val
@@ -133,16 +163,17 @@ def solve_puzzle_range(puzzle, *, height, width):
         # contiguouness constraint
         optimizer_check_model.add(contig_model_c)
         optimizer_check_model.add(instance_model_c) # redundant?
-        if optimizer_check_model.check() == sat:
+        if check_solver(optimizer_check_model) == sat:
                 return solution_model #HERE IS THE RETURN STATEMENT
-        print('rejecting solution')
-        print(solution_model)
+        if not quiet:
+            print('rejecting solution')
+            print(solution_model)
 
         optimizer_check_model.pop()
         # the rejected solution is added after 'pop'. This is how it is
         # added to the model
         optimizer_check_model.add(Not(And(instance_model_c)))
-        optimizer_check_model.check()
+        ensure_sat(optimizer_check_model, check_solver(optimizer_check_model))
         optimizer_check_model.lower(h)
         m = optimizer_check_model.model()
         solution_model = [ [ m[cell].as_long() for cell in row ] for row in board ]
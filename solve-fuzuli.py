@@ -1,12 +1,12 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtLeast, solve_board
 from puzzles_common import flatten, rows_and_cols, inside_board
 
 EMPTY = 0
 
-def solve_puzzle_fuzuli(puzzle, *, height, width, order):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_fuzuli(puzzle, *, height, width, order, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ And(cell >= 0, cell <= order)
             for cell in flatten(board) ]
@@ -38,13 +38,11 @@ def solve_puzzle_fuzuli(puzzle, *, height, width, order):
             if puzzle[l][c] > 0 ]
 
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + adjacency_c + instance_c + all_present_once_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Fuzuli/007.a.htm by author Adolfo Zanellati
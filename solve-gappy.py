@@ -1,13 +1,13 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, solve_board
 from puzzles_common import flatten, rows_and_cols, inside_board
 from more_itertools import windowed
 
 BLACK, WHITE = 1, 0
 
-def solve_puzzle_gappy(*, height, width, horizontal_counts, vertical_counts):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_gappy(*, height, width, horizontal_counts, vertical_counts, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ Xor(cell == BLACK, cell == WHITE)
             for cell in flatten(board) ]
@@ -44,13 +44,11 @@ def solve_puzzle_gappy(*, height, width, horizontal_counts, vertical_counts):
         cnstrnt = Exactly(*possibs, 1)
         count_block_c.append(cnstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + count_black_cells_c + adj_c + count_block_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Gappy/007.a.htm by author Otto Janko
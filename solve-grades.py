@@ -1,12 +1,12 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, solve_board
 from puzzles_common import flatten, inside_board, rows_and_cols
 
-def solve_puzzle_grades(puzzle, *, height, width, horizontal_counts, vertical_counts, horizontal_sums, vertical_sums):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_grades(puzzle, *, height, width, horizontal_counts, vertical_counts, horizontal_sums, vertical_sums, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     counts = vertical_counts + horizontal_counts
     sums = vertical_sums + horizontal_sums
@@ -48,9 +48,7 @@ def solve_puzzle_grades(puzzle, *, height, width, horizontal_counts, vertical_co
 
     s.add( range_c + adjacency_c + count_c + sum_c + instance_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Grades/007.a.htm by author Otto Janko
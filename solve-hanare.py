@@ -1,13 +1,13 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, get_same_block_indices, transpose
 from more_itertools import windowed
 
 EMPTY = 0
 
-def solve_puzzle_hanare(*, height, width, cage_ids, instance):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_hanare(*, height, width, cage_ids, instance, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     at_ = lambda l, c : board[l][c]
     def get_vars_at(indices):
@@ -62,14 +62,11 @@ def solve_puzzle_hanare(*, height, width, cage_ids, instance):
             for l, c in itertools.product(range(height), range(width))
             if instance[l][c] > 0 ]
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( cage_range_c + cage_size_bearer_c + distance_c + instance_c )
 
-    s.check()
-    m = s.model()
-
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Hanare/007.a.htm by author Otto Janko
@@ -1,6 +1,6 @@
 from z3 import *
 import itertools
-from more_z3 import IntMatrix, Exactly
+from more_z3 import IntMatrix, Exactly, solve_board
 from puzzles_common import inside_board
 
 def neighbours(l, c):
@@ -8,8 +8,8 @@ def neighbours(l, c):
         if (i, j) != (0, 0):
             yield(l + i, c + j)
 
-def solve_hidato(puzzle, *, order, maximum):
-    X = IntMatrix('n', order, order)
+def solve_hidato(puzzle, *, order, maximum, ctx=None):
+    X = IntMatrix('n', order, order, ctx=ctx)
 
     vars_ = list(itertools.chain(*X))
     vals = list(itertools.chain(*puzzle))
@@ -56,12 +56,10 @@ def solve_hidato(puzzle, *, order, maximum):
                 consecutive_c.append(constrnt)
 
 
-    s = Solver()
+    s = Solver(ctx=ctx)
     s.add( range_c + instance_c + distinct_c + consecutive_c)
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in X]
+    return solve_board(s, X)
 
 
 if __name__ == "__main__":
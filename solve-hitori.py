@@ -1,14 +1,19 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board, connected, connectivity_cuts, ConstraintCollector
 from puzzles_common import flatten, transpose, inside_board
 from more_itertools import pairwise
 from puzzles_common import ortho_neighbours as neighbours
 
 BLACK, WHITE = 0, 1
 
-def solve_puzzle_hitori(puzzle, *, height, width):
-    color_board = IntMatrix('c', nb_rows=height, nb_cols=width)
+# lazy_connectivity: the connectivity of white cells is enforced by cuts of the disconnected models
+# solver:
+#  'optimize': the number of white cells is maximized
+#  'solver': a plain Solver (the other constraints define the solution: there is nothing to optimize)
+def solve_puzzle_hitori(puzzle, *, height, width, lazy_connectivity=False, solver='optimize', ctx=None):
+    assert solver in ('optimize', 'solver'), f'Unknown solver: {solver}'
+    color_board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
     def get_id(l, c):
         return -(l * width + c + 1)
@@ -16,80 +21,47 @@ def solve_puzzle_hitori(puzzle, *, height, width):
     id_board = [[get_id(l, c) for c in range(width)]
             for l in range(height)]
 
-    color_range_c = [Xor(clr == BLACK, clr == WHITE)
-            for clr in flatten(color_board)]
+    s = Optimize(ctx=ctx) if solver == 'optimize' else Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
+    collect('color_range', ( Xor(clr == BLACK, clr == WHITE)
+            for clr in flatten(color_board) ))
 
-    row_distinct_c = []
     for clrs, vals, ids in zip(color_board, puzzle, id_board):
         vals_or_ids = ([ If(clr==BLACK, id_, val) for clr, val, id_ in zip(clrs, vals, ids) ])
         cnstrnt = Distinct(vals_or_ids)
-        row_distinct_c.append(cnstrnt)
+        collect('distinct', cnstrnt)
 
-    col_distinct_c = []
     for clrs, vals, ids in zip(transpose(color_board), transpose(puzzle), transpose(id_board)):
         vals_or_ids = ([ If(clr==BLACK, id_, val) for clr, val, id_ in zip(clrs, vals, ids) ])
         cnstrnt = Distinct(vals_or_ids)
-        col_distinct_c.append(cnstrnt)
-
-    distinct_c = row_distinct_c + col_distinct_c
+        collect('distinct', cnstrnt)
 
-    row_adj_c = []
     for clrs in color_board:
         for (c1, c2) in pairwise(clrs):
             cnstrnt = Or(c1 != BLACK, c2 != BLACK)
-            row_adj_c.append(cnstrnt)
+            collect('adjacency', cnstrnt)
 
-    col_adj_c = []
     for clrs in transpose(color_board):
         for (c1, c2) in pairwise(clrs):
             cnstrnt = Or(c1 != BLACK, c2 != BLACK)
-            col_adj_c.append(cnstrnt)
-
-    adj_c = row_adj_c + col_adj_c
-
-    range_num_c = []
-    # We assign number to each cell (so as to enforce 'connectivity' between white cells)
-    num_board = IntMatrix('n', nb_rows=height, nb_cols=width)
-    for clr_row, num_row in zip(color_board, num_board):
-        for clr, num in zip(clr_row, num_row):
-            cnstrnt = (clr == BLACK) == (num == -1)
-            range_num_c.append(cnstrnt)
-            cnstrnt = (clr == WHITE) == (num >= 0)
-            range_num_c.append(cnstrnt)
-
-    nums = flatten(num_board)
-    single_start_c = [ Exactly(*[n == 0 for n in nums], 1) ]
-
-    num_at_ = lambda l, c: num_board[l][c]
-    def gen_predecessor_constraints(l, c):
-        val_neighs = [ neigh for neigh in neighbours((l, c))
-                if inside_board(neigh, height=height, width=width)]
-        # the current cell
-        cell = num_at_(l,c)
-        val_neigh_cells = [num_at_(*cell) for cell in val_neighs]
-        one_neigh_is_predecessor = AtLeast(*[And(neigh_cell >= 0, neigh_cell == cell - 1) for neigh_cell in val_neigh_cells], 1)
-        cnstrnt = (cell > 0) == one_neigh_is_predecessor
-        return cnstrnt
-
-    predecessor_c = [ gen_predecessor_constraints(l, c)
-        for l, c in itertools.product(range(height), range(width)) ]
-
-    # connectivity constraint as proposed by Gerhard van der Knijff in 'Solving and generating puzzles with a connectivity constraint'
-    connectivity_c = range_num_c + single_start_c + predecessor_c
-
-    opt = Optimize()
-
-    opt.add(color_range_c + distinct_c + adj_c + connectivity_c)
-
-    # Number of walls we don't blacken (that we leave as it is)
-    reward = Int('reward')
-    opt.add(reward == Sum(flatten(color_board)))
-    h = opt.maximize(reward)
-
-    opt.check()
-    m = opt.model()
-
-    return [ [m[cell] for cell in row] for row in color_board ]
+            collect('adjacency', cnstrnt)
+
+    # CONNECTIVITY of white cells
+    cells = list(itertools.product(range(height), range(width)))
+    is_white = { (l, c): color_board[l][c] == WHITE for l, c in cells }
+    if not lazy_connectivity:
+        collect('connectivity', connected(cells, is_white))
+
+    if solver == 'optimize':
+        # Number of walls we don't blacken (that we leave as it is)
+        reward = Int('reward', ctx=ctx)
+        s.add(reward == Sum(flatten(color_board)))
+        s.maximize(reward)
+
+    refine = (lambda m: connectivity_cuts(m, cells, is_white)) if lazy_connectivity else None
+    return solve_board(s, color_board, refine=refine)
 
 if __name__ == "__main__":
     pars = {'height': 12,
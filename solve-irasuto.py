@@ -1,19 +1,10 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
-from puzzles_common import flatten, inside_board
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board, ConstraintCollector
+from puzzles_common import flatten, inside_board, distribute_in_4_directions
 
 BLACK, WHITE = 1, 0
 
-# sort of subset_sum
-def distribute_in_4_directions(total):
-    for i in range(total+1):
-        for j in range(total-i+1):
-            for k in range(total-i-j+1):
-                for l in range(total-i-j-k+1):
-                    if i + j + k + l == total:
-                        yield(i, j, k, l)
-
 # direction = up, down, left, right, -1, +1, -1, +1
 
 # can also be thought of as 'circle' for a distance
@@ -83,29 +74,27 @@ def gen_contiguous_constraints(puzzle, board, *, width, height, colors):
     return constraints
 
 
-def solve_puzzle_irasuto(puzzle, *, height, width, colors):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_irasuto(puzzle, *, height, width, colors, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
+
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
 
-    range_c = [ Xor(cell == BLACK, cell == WHITE)
-            for cell in flatten(board) ]
+    collect('range', ( Xor(cell == BLACK, cell == WHITE)
+            for cell in flatten(board) ))
 
     at_ = lambda l, c : board[l][c]
     color_map = { 'b': BLACK, 'w': WHITE }
-    instance_c = [ at_(l, c) == color_map[colors[l][c]]
+    collect('instance', ( at_(l, c) == color_map[colors[l][c]]
             for l, c in itertools.product(range(height), range(width))
-            if colors[l][c] in 'bw' ]
+            if colors[l][c] in 'bw' ))
 
 
     pars = {'board': board, 'width': width, 'height': height}
-    contig_c = gen_contiguous_constraints(puzzle, **pars, colors=colors)
-
-    s = Solver()
-
-    s.add( range_c + instance_c + contig_c )
+    collect('contiguity', gen_contiguous_constraints(puzzle, **pars, colors=colors))
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Irasuto/007.a.htm by author Otto Janko
@@ -1,12 +1,12 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, transpose
 
 BLACK, WHITE = 1, 0
 
-def solve_puzzle_kakurasu(*, height, width, horizontal_sums, vertical_sums, horizontal_values, vertical_values):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_kakurasu(*, height, width, horizontal_sums, vertical_sums, horizontal_values, vertical_values, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ Xor(cell == BLACK, cell == WHITE)
             for cell in flatten(board) ]
@@ -22,13 +22,11 @@ def solve_puzzle_kakurasu(*, height, width, horizontal_sums, vertical_sums, hori
                 for clr, coef in zip(clrs_col, vertical_values)]) == sum_
         coef_sum_c.append(cnstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + coef_sum_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Kakurasu/007.a.htm by author Otto Janko
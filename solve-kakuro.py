@@ -1,10 +1,10 @@
 from z3 import *
 import itertools
-from more_z3 import IntMatrix
+from more_z3 import IntMatrix, solve_board
 from puzzles_common import get_same_block_indices
 
-def solve_kakuro(horiz_cages, vertic_cages, horiz_clues, vertic_clues, *, order):
-    X = IntMatrix('n', order, order)
+def solve_kakuro(horiz_cages, vertic_cages, horiz_clues, vertic_clues, *, order, ctx=None):
+    X = IntMatrix('n', order, order, ctx=ctx)
 
     at_ = lambda l, c : X[l][c]
     def get_vars_at(indices):
@@ -41,14 +41,10 @@ def solve_kakuro(horiz_cages, vertic_cages, horiz_clues, vertic_clues, *, order)
             cnstrnt = And(Distinct(vars_), Sum(vars_) == vertic_clues[v_clue_ind])
             v_cage_c.append(cnstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
     s.add(range_c + h_cage_c + v_cage_c)
 
-    s.check()
-    m = s.model()
-
-    res = [[ m[s] for s in row] for row in X]
-    return res
+    return solve_board(s, X)
 
 
 if __name__ == "__main__":
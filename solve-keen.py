@@ -1,10 +1,10 @@
 from z3 import *
 import itertools
-from more_z3 import IntMatrix
+from more_z3 import IntMatrix, solve_board
 from puzzles_common import gen_latin_square_constraints, get_same_block_indices
 
-def solve_keen(puzzle, *, order, arithmetic_constraints):
-    X = IntMatrix('n', order, order)
+def solve_keen(puzzle, *, order, arithmetic_constraints, ctx=None):
+    X = IntMatrix('n', order, order, ctx=ctx)
 
     at_ = lambda l, c : X[l][c]
     def get_vars_at(indices):
@@ -31,14 +31,10 @@ def solve_keen(puzzle, *, order, arithmetic_constraints):
     latin_c = gen_latin_square_constraints(X, order)
 
 
-    s = Solver()
+    s = Solver(ctx=ctx)
     s.add(latin_c + arith_c)
 
-    s.check()
-    m = s.model()
-
-    res = [[ m[s] for s in row] for row in X]
-    return res
+    return solve_board(s, X)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 from z3 import *
 import itertools
-from more_z3 import IntMatrix
+from more_z3 import IntMatrix, solve_board
 from puzzles_common import transpose, gen_latin_square_constraints, get_same_block_indices
 
 ORDER = 9
@@ -11,8 +11,8 @@ def get_nonet_id(row, col):
 NONETS_IDS = [ [ get_nonet_id(l, c) for c in range(ORDER) ]
         for l in range(ORDER) ]
 
-def solve_killer_sudoku(puzzle, *, sums):
-    X = IntMatrix('n', ORDER, ORDER)
+def solve_killer_sudoku(puzzle, *, sums, ctx=None):
+    X = IntMatrix('n', ORDER, ORDER, ctx=ctx)
 
     at_ = lambda l, c : X[l][c]
     def get_vars_at(indices):
@@ -34,12 +34,9 @@ def solve_killer_sudoku(puzzle, *, sums):
         cstrnt = And(Distinct(vars_), Sum(vars_) == sums[sums_ind])
         cage_c.append(cstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
     s.add( latin_c + nonet_c + cage_c )
-    s.check()
-    
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in X]
+    return solve_board(s, X)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,11 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, get_same_block_indices, inside_board, rows_and_cols, transpose
 from more_itertools import pairwise
 
-def solve_puzzle_kojun(*, height, width, cage_ids, instance):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_kojun(*, height, width, cage_ids, instance, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     at_ = lambda l, c : board[l][c]
     def get_vars_at(indices):
@@ -41,14 +41,12 @@ def solve_puzzle_kojun(*, height, width, cage_ids, instance):
             for l, c in itertools.product(range(height), range(width))
             if instance[l][c] > 0 ]
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     # cage_range_c, cage_elems_distinct_c and instance_c same as for suguru solve-suguru.py.  adjacency constraint is more lenient in Kojun (merely orthogonal instead of in 8-directions)
     s.add( cage_range_c + cage_elems_distinct_c + adjacency_c + instance_c + vertical_pecking_order_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Kojun/007.a.htm by author Otto Janko
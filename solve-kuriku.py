@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board, connected, ConstraintCollector
 from puzzles_common import flatten, transpose, inside_board
 from puzzles_common import ortho_neighbours as neighbours
 
@@ -15,19 +15,21 @@ def grid_neighbours(*,grid_index=(0, 0), height, width):
             if inside_board(neigh, height=height, width=width) ]
 
 # Creek
-def solve_puzzle_kuriku(*, height, width, neighbours_counts):
-    board = IntMatrix('b', nb_rows=height, nb_cols=width)
+def solve_puzzle_kuriku(*, height, width, neighbours_counts, ctx=None):
+    board = IntMatrix('b', nb_rows=height, nb_cols=width, ctx=ctx)
     pars = {'board': board, 'width': width, 'height': height}
 
-    range_c = [ Xor(cell == BLACK, cell == WHITE)
-            for cell in flatten(board) ]
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
+    collect('range', ( Xor(cell == BLACK, cell == WHITE)
+            for cell in flatten(board) ))
 
     at_ = lambda l, c : board[l][c]
     def get_vars_at(indices):
         return [ at_(*ind) for ind in indices ]
 
-    adj_black_neighs_c = []
-
     # The grid has one more row and one more column than the board
     # gl: grid_line, gc: grid_column
     for gl, row in enumerate(neighbours_counts):
@@ -37,51 +39,15 @@ def solve_puzzle_kuriku(*, height, width, neighbours_counts):
                 neigh_cells = get_vars_at(indices_neighs)
                 neigh_black_cells = [cell == BLACK for cell in neigh_cells]
                 cnstrnt = Exactly(*neigh_black_cells, nb_neighs)
-                adj_black_neighs_c.append(cnstrnt)
+                collect('adjacent_black_neighbours', cnstrnt)
 
     # CONNECTIVITY of white cells
 
-    range_num_c = []
-    # We assign number to each cell in the loop.
-    num_board = IntMatrix('num', nb_rows=height, nb_cols=width)
-    for row, num_row in zip(board, num_board):
-        for cell, num in zip(row, num_row):
-            cnstrnt = (cell == BLACK) == (num == -1)
-            range_num_c.append(cnstrnt)
-            cnstrnt = (cell == WHITE) == (num >= 0)
-            range_num_c.append(cnstrnt)
-
-    nums = flatten(num_board)
-    single_start_c = [ Exactly(*[n == 0 for n in nums], 1) ]
-
-
-    num_at_ = lambda l, c: num_board[l][c]
-    def gen_predecessor_constraints(l, c):
-        val_neighs = [ neigh for neigh in neighbours((l, c))
-                if inside_board(neigh, height=height, width=width)]
-        # the current cell
-        cell = num_at_(l,c)
-        val_neigh_cells = [num_at_(*cell) for cell in val_neighs]
-        one_neigh_is_predecessor = AtLeast(*[And(neigh_cell >= 0, neigh_cell == cell - 1) for neigh_cell in val_neigh_cells], 1)
-        cnstrnt = (cell > 0) == one_neigh_is_predecessor
-        return cnstrnt
-
-
-    predecessor_c = [ gen_predecessor_constraints(l, c)
-        for l, c in itertools.product(range(height), range(width)) ]
-
-    # connectivity constraint as proposed by Gerhard van der Knijff in 'Solving and generating puzzles with a connectivity constraint'
-    # This can be thought of as a creative use of proof-by-induction and Peano's way of definining natural numbers...
-    # Some seed/start ... then everything spawns from it.
-    connectivity_c = range_num_c + single_start_c + predecessor_c
-
-    s = Solver()
-
-    s.add( range_c + adj_black_neighs_c + connectivity_c )
+    cells = list(itertools.product(range(height), range(width)))
+    is_white = { (l, c): board[l][c] == WHITE for l, c in cells }
+    collect('connectivity', connected(cells, is_white))
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Creek/007.a.htm by author Iwa Daigeki
@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, transpose, inside_board
 
 BLACK, WHITE = 0, 1
@@ -11,8 +11,8 @@ def neighbours(index_):
     for i, j in itertools.product([-1, 0, 1], repeat=2):
         yield(l + i, c + j)
 
-def solve_puzzle_lampions(*, height, width, clues):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_lampions(*, height, width, clues, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ Xor(cell == BLACK, cell == WHITE)
             for cell in flatten(board) ]
@@ -37,13 +37,11 @@ def solve_puzzle_lampions(*, height, width, clues):
         cnstrnt = curr_cell_is_white == clue_is_count_of_neighbours
         color_dependent_count_c.append(cnstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + exist_one_white_c + color_dependent_count_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Lampions/217.a.htm by author Otto Janko
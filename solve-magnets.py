@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, Exactly
+from more_z3 import IntMatrix, Exactly, solve_board, ConstraintCollector
 from puzzles_common import transpose, flatten
 
 # polarities
@@ -33,38 +33,42 @@ def coerce_neigh(edge_1, edge_2):
 # -1 1 1  | 2
 # 1 -1 -1 | 1
 def solve_magnets(*, tiles, positive_horizontal, positive_vertical,
-        negative_vertical, negative_horizontal, height, width):
-    X = IntMatrix('m', nb_rows=height, nb_cols=width)
+        negative_vertical, negative_horizontal, height, width, ctx=None):
+    X = IntMatrix('m', nb_rows=height, nb_cols=width, ctx=ctx)
 
     # Let us concentrate on edge|pole|half of the tile|domino|magnet
     halves = flatten(X)
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
     # completeness
-    complete_c = [ Or([edge == POSITIVE,
+    collect('complete', ( Or([edge == POSITIVE,
         edge == NEGATIVE,
         edge == NEUTRAL])
-        for edge in halves ]
+        for edge in halves ))
+
+    X_trans = transpose(X)
 
     assert len(positive_vertical) == len(X)
-    pos_vertic_c = [ coerce_charge(row, POSITIVE, pos_v)
+    collect('charge', ( coerce_charge(row, POSITIVE, pos_v)
          for row, pos_v in zip(X, positive_vertical)
-         if pos_v >= 0 ]
-
-    assert len(negative_vertical) == len(X)
-    neg_vertic_c = [ coerce_charge(row, NEGATIVE, neg_v)
-         for row, neg_v in zip(X, negative_vertical)
-         if neg_v >= 0 ]
-
-    X_trans = transpose(X)
+         if pos_v >= 0 ))
 
     assert len(positive_horizontal) == len(X_trans)
-    pos_horiz_c = [ coerce_charge(row, POSITIVE, pos_h)
+    collect('charge', ( coerce_charge(row, POSITIVE, pos_h)
          for row, pos_h in zip(X_trans, positive_horizontal)
-         if pos_h >= 0 ]
+         if pos_h >= 0 ))
+
+    assert len(negative_vertical) == len(X)
+    collect('charge', ( coerce_charge(row, NEGATIVE, neg_v)
+         for row, neg_v in zip(X, negative_vertical)
+         if neg_v >= 0 ))
 
     assert len(negative_horizontal) == len(X_trans)
-    neg_horiz_c = [ coerce_charge(row, NEGATIVE, neg_h)
+    collect('charge', ( coerce_charge(row, NEGATIVE, neg_h)
          for row, neg_h in zip(X_trans, negative_horizontal)
-         if neg_h >= 0 ]
+         if neg_h >= 0 ))
 
     def horiz_tile(l, c):
         return X[l][c], X[l][c + 1]
@@ -72,37 +76,24 @@ def solve_magnets(*, tiles, positive_horizontal, positive_vertical,
     def vertic_tile(l, c):
         return X[l][c], X[l + 1][c]
 
-    horiz_tiles_c = [ coerce_tile(*horiz_tile(l, c))
+    collect('tiles', ( coerce_tile(*horiz_tile(l, c))
         for l, c in itertools.product(range(height), range(width))
-        if tiles[l][c] == '>' ]
+        if tiles[l][c] == '>' ))
 
-    vertic_tiles_c = [ coerce_tile(*vertic_tile(l, c))
+    collect('tiles', ( coerce_tile(*vertic_tile(l, c))
         for l, c in itertools.product(range(height), range(width))
-        if tiles[l][c] == 'v' ]
+        if tiles[l][c] == 'v' ))
 
     # edge1 edge2 may not belong to the same magnet|tile
-    horiz_neigh_c = [[ coerce_neigh(edge1, edge2)
-            for edge1, edge2 in zip(row, row[1:]) ]
-            for row in X ]
-    horiz_neigh_c = flatten(horiz_neigh_c)
-
-    vertic_neigh_c = [[ coerce_neigh(edge1, edge2)
-            for edge1, edge2 in zip(row, row[1:]) ]
-            for row in X_trans ]
-    vertic_neigh_c = flatten(vertic_neigh_c)
-
-    s = Solver()
-    s.add(
-            complete_c +
-            pos_vertic_c + pos_horiz_c +
-            neg_vertic_c + neg_horiz_c +
-            horiz_tiles_c + vertic_tiles_c +
-            horiz_neigh_c + vertic_neigh_c
-            )
-
-    s.check()
-    m = s.model()
-    return [ [ m[edge] for edge in row] for row in X ]
+    collect('neighbours', ( coerce_neigh(edge1, edge2)
+            for row in X
+            for edge1, edge2 in zip(row, row[1:]) ))
+
+    collect('neighbours', ( coerce_neigh(edge1, edge2)
+            for row in X_trans
+            for edge1, edge2 in zip(row, row[1:]) ))
+
+    return solve_board(s, X)
 
 if __name__ == "__main__":
 
@@ -1,13 +1,13 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, get_same_block_indices, rows_and_cols, inside_board
 from more_itertools import pairwise
 
 EMPTY = 0
 
-def solve_puzzle_makaro(puzzle, *, height, width, cage_ids, orthogonal_max):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_makaro(puzzle, *, height, width, cage_ids, orthogonal_max, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     at_ = lambda l, c : board[l][c]
     def get_vars_at(indices):
@@ -71,13 +71,11 @@ def solve_puzzle_makaro(puzzle, *, height, width, cage_ids, orthogonal_max):
             if puzzle[l][c] > 0 ]
 
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( empty_c + cage_range_c + cage_elems_distinct_c + adj_c + ortho_neigh_max_c + instance_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Makaro/007.a.htm by author Otto Janko
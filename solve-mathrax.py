@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, gen_latin_square_constraints, inside_board
 
 def related_by_operation(var_1, var_2, arith_op):
@@ -17,8 +17,8 @@ def related_by_operation(var_1, var_2, arith_op):
     else:
         print(f' Unknown arithmetic operation {arith_op} ')
 
-def solve_puzzle_mathrax(puzzle, *, order, arithemetic_constraints):
-    board = IntMatrix('n', nb_rows=order, nb_cols=order)
+def solve_puzzle_mathrax(puzzle, *, order, arithemetic_constraints, ctx=None):
+    board = IntMatrix('n', nb_rows=order, nb_cols=order, ctx=ctx)
 
     latin_c = gen_latin_square_constraints(board, order)
 
@@ -53,13 +53,11 @@ def solve_puzzle_mathrax(puzzle, *, order, arithemetic_constraints):
             for l, c in itertools.product(range(order), range(order))
             if puzzle[l][c] > 0 ]
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( latin_c + adjacency_c + instance_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Mathrax/007.a.htm by author Otto Janko
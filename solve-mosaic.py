@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq
+from more_z3 import BinaryMatrix, binary_range, binary_sum_eq, binary_value, coerce_eq, solve_board
 from puzzles_common import flatten, inside_board
 
 # We need count of black squares: so BLACK=1
@@ -15,13 +15,13 @@ def cells_in_disk(index_, radius=1):
     return list(cells)
 
 
-def solve_puzzle_mosaic(counts, *, height, width):
-    board = IntMatrix('b', nb_rows=height, nb_cols=width)
+# encoding: 'int' or 'bool' cells (see more_z3.BINARY_ENCODINGS)
+def solve_puzzle_mosaic(counts, *, height, width, encoding='int', ctx=None):
+    board = BinaryMatrix('b', nb_rows=height, nb_cols=width, encoding=encoding, ctx=ctx)
     at_ = lambda l, c: board[l][c]
 
     # There is no empty cell:
-    complete_c = [ Xor(cell == WHITE, cell == BLACK)
-            for cell in flatten(board) ]
+    complete_c = binary_range(flatten(board))
 
     def valid_cells_in_disk(l, c):
         geom = { 'height': height, 'width': width }
@@ -31,19 +31,17 @@ def solve_puzzle_mosaic(counts, *, height, width):
 
     def gen_sing_count_const(l, c):
         cell_vars = [ at_(*cell) for cell in valid_cells_in_disk(l, c) ]
-        # If we don't use sum we may express the constraint with `Exactly()`
-        return Sum(cell_vars) == counts[l][c]
+        # a sum of Ints, or `Exactly()` of Bools
+        return binary_sum_eq(cell_vars, counts[l][c])
 
     count_c = [ gen_sing_count_const(l, c)
             for l, c in itertools.product(range(height), range(width))
             if counts[l][c] > 0 ]
 
-    s = Solver()
+    s = Solver(ctx=ctx)
     s.add(complete_c + count_c)
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board]
+    return solve_board(s, [ [ binary_value(cell) for cell in row ] for row in board ])
 
 if __name__ == "__main__":
     pars = {
@@ -1,12 +1,12 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, rows_and_cols
 
 EMPTY = 0
 
-def solve_puzzle_nanbaboru(puzzle, *, height, width, to_be_filled, to_be_left_empty, max_num):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_nanbaboru(puzzle, *, height, width, to_be_filled, to_be_left_empty, max_num, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ And( n >= 0, n <= max_num)
             for n in flatten(board) ]
@@ -38,13 +38,11 @@ def solve_puzzle_nanbaboru(puzzle, *, height, width, to_be_filled, to_be_left_em
             if puzzle[l][c] > 0 ]
 
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + each_n_exactly_once_c + filled_c + empty_c + instance_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Nanbaboru/007.a.htm by author Adolfo Zanellati
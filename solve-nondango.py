@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board, ConstraintCollector
 from puzzles_common import flatten, transpose, inside_board, get_same_block_indices, rows_and_cols
 from more_itertools import windowed
 
@@ -72,25 +72,26 @@ def rows_cols_and_diags(matrix, *, height, width):
     yield from diagonals(matrix, height=height, width=width)
 
 
-def solve_puzzle_nondango(*, height, width, cage_ids, circles):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_nondango(*, height, width, cage_ids, circles, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
-    range_c = [ Or(*[cell == BLACK, cell == WHITE, cell == EMPTY])
-            for cell in flatten(board) ]
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
+    collect('range', ( Or(*[cell == BLACK, cell == WHITE, cell == EMPTY])
+            for cell in flatten(board) ))
 
     at_ = lambda l, c : board[l][c]
     def get_vars_at(indices):
         return [ at_(*ind) for ind in indices ]
 
-    instance_c = []
     for l, c in itertools.product(range(height), range(width)):
         devoid_of_circle = circles[l][c] == 0
         empty_cell_in_board = at_(l, c)  == EMPTY
         # equivalence (double-implication) takes care of both cases: empty and non-empty
         cnstrnt = devoid_of_circle == empty_cell_in_board
-        instance_c.append(cnstrnt)
-
-    cage_c = []
+        collect('instance', cnstrnt)
 
     cages_inds = get_same_block_indices(cage_ids)
     for board_indices in cages_inds.values():
@@ -98,29 +99,20 @@ def solve_puzzle_nondango(*, height, width, cage_ids, circles):
         black_cells_in_cage = [ cell == BLACK
                 for cell in vars_ ]
         cnstnrt = Exactly(*black_cells_in_cage, 1)
-        cage_c.append(cnstnrt)
+        collect('cage', cnstnrt)
 
 
     # avoid runs of 3 same color circles in rows, cols, diags
-    avoid_runs_3_c = []
     for line in rows_cols_and_diags(board, height=height, width=width):
         for window in list(windowed(line, 3)):
                 all_black_wndw = And([cell == BLACK for cell in window ])
                 all_white_wndw = And([cell == WHITE for cell in window ])
                 cnstnrt = Not(all_black_wndw)
-                avoid_runs_3_c.append(cnstnrt)
+                collect('avoid_runs_3', cnstnrt)
                 cnstnrt = Not(all_white_wndw)
-                avoid_runs_3_c.append(cnstnrt)
-
-
-
-    s = Solver()
-
-    s.add( range_c + instance_c + cage_c + avoid_runs_3_c )
+                collect('avoid_runs_3', cnstnrt)
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Nondango/007.a.htm by author @Dank_Demes
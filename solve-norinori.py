@@ -1,14 +1,14 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, solve_board
 from puzzles_common import flatten, get_same_block_indices, rows_and_cols, inside_board
 from more_itertools import windowed
 from puzzles_common import ortho_neighbours as neighbours
 
 BLACK, WHITE = 1, 0
 
-def solve_puzzle_norinori(*, height, width, cage_ids):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_norinori(*, height, width, cage_ids, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ Xor(cell == BLACK, cell == WHITE)
             for cell in flatten(board) ]
@@ -68,13 +68,11 @@ def solve_puzzle_norinori(*, height, width, cage_ids):
     black_stripe_c = [ gen_proximity_constraints(l, c)
         for l, c in itertools.product(range(height - 1), range(width - 1)) ]
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + cage_c + domino_c + black_stripe_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Norinori/007.a.htm by author Iwa Daigeki
@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board, connected, ConstraintCollector
 from puzzles_common import flatten, transpose, inside_board
 from collections import defaultdict
 from more_itertools import pairwise
@@ -8,12 +8,12 @@ from puzzles_common import ortho_neighbours as neighbours
 
 WALL, POROUS = 1, 0
 
-def solve_puzzle_palisade(puzzle, *, height, width, region_size):
+def solve_puzzle_palisade(puzzle, *, height, width, region_size, ctx=None):
     nb_regions = ( height * width ) // region_size
     # left right   |cell|
-    lr_walls_board = IntMatrix('lr_w', nb_rows=height, nb_cols=width + 1)
+    lr_walls_board = IntMatrix('lr_w', nb_rows=height, nb_cols=width + 1, ctx=ctx)
     # top bottom
-    tb_walls_board = IntMatrix('tb_w', nb_rows=height + 1, nb_cols=width)
+    tb_walls_board = IntMatrix('tb_w', nb_rows=height + 1, nb_cols=width, ctx=ctx)
 
     left_and_right_walls = dict()
     for l, row_var_walls in enumerate(lr_walls_board):
@@ -34,48 +34,42 @@ def solve_puzzle_palisade(puzzle, *, height, width, region_size):
         walls_at [cell].extend(walls)
 
     walls_board = list(itertools.chain(lr_walls_board, tb_walls_board))
-    range_walls_c = [Xor(border == WALL, border == POROUS)
-            for border in flatten(walls_board)]
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
+    collect('range_walls', ( Xor(border == WALL, border == POROUS)
+            for border in flatten(walls_board) ))
 
-    count_walls_c = []
     for l, row in enumerate(puzzle):
         for c, wall_count in enumerate(row):
             if wall_count > -1:
                 cnstrnt =Exactly(*[w == WALL for w in walls_at[(l, c)]], wall_count)
-                count_walls_c.append(cnstrnt)
+                collect('count_walls', cnstrnt)
 
     outermost = flatten([transpose(lr_walls_board)[0], transpose(lr_walls_board)[-1], tb_walls_board[0], tb_walls_board[-1]])
     # The board is closed. Walls on the border. No opening.
-    closed_space_c = [w == WALL for w in outermost]
+    collect('closed_space', ( w == WALL for w in outermost ))
 
     # We give id to cells... which block they belong to. 0 <= id < nb_regions
-    block_id_board = IntMatrix('b_i', nb_rows=height, nb_cols=width)
+    block_id_board = IntMatrix('b_i', nb_rows=height, nb_cols=width, ctx=ctx)
 
-    block_id_range_c = [ And(bl_id >= 0, bl_id < nb_regions)
-            for bl_id in flatten(block_id_board) ]
+    collect('block_id_range', ( And(bl_id >= 0, bl_id < nb_regions)
+            for bl_id in flatten(block_id_board) ))
 
-    block_id_count_c = []
-    for i in range(nb_regions):
-        nb_blocks_with_given_id = Sum([bl_id == i for bl_id in flatten(block_id_board)])
-        cnstrnt = nb_blocks_with_given_id == region_size
-        block_id_count_c.append(cnstrnt)
-
-    whole_tally_c = [ Sum(list(flatten(block_id_board))) == sum([region_size * i for i in range(nb_regions)])  ]
-
-    permeation_c = []
     for row, walls in zip(block_id_board, lr_walls_board):
         # walls[1:-1] we skip the walls at the extremities of the playing-field
         for adj_block_ids, wall in zip(pairwise(row), walls[1:-1]):
             cnstrnt = Implies(wall == POROUS, adj_block_ids[0] == adj_block_ids[1])
-            permeation_c.append(cnstrnt)
+            collect('permeation', cnstrnt)
             cnstrnt = Implies(wall == WALL, adj_block_ids[0] != adj_block_ids[1])
-            permeation_c.append(cnstrnt)
+            collect('permeation', cnstrnt)
     for row, walls in zip(transpose(block_id_board), transpose(tb_walls_board)):
         for adj_block_ids, wall in zip(pairwise(row), walls[1:-1]):
             cnstrnt = Implies(wall == POROUS, adj_block_ids[0] == adj_block_ids[1])
-            permeation_c.append(cnstrnt)
+            collect('permeation', cnstrnt)
             cnstrnt = Implies(wall == WALL, adj_block_ids[0] != adj_block_ids[1])
-            permeation_c.append(cnstrnt)
+            collect('permeation', cnstrnt)
 
     def walls_at(l, c):
         for offset in [-1, 0]:
@@ -86,57 +80,29 @@ def solve_puzzle_palisade(puzzle, *, height, width, region_size):
 
     # constraint on degree as proposed by Gerhard van der Knijff in 'Solving and generating puzzles with a connectivity constraint'
     # On this puzzle this can be seen as avoiding isolated walls
-    degree_c = []
     for l in range(height+1):
         for c in range(width+1):
             cnstrnt = Or(Sum(list(walls_at(l, c))) == 4,
                     Sum(list(walls_at(l, c))) == 3,
                     Sum(list(walls_at(l, c))) == 2,
                     Sum(list(walls_at(l, c))) == 0)
-            degree_c.append(cnstrnt)
+            collect('degree', cnstrnt)
 
     # CONNECTIVITY of cells with given id
 
-    range_num_c = []
-    num_boards = [ IntMatrix(f'n_for{i}', nb_rows=height, nb_cols=width)
-            for i in range(nb_regions) ]
-
+    cells = list(itertools.product(range(height), range(width)))
     for i in range(nb_regions):
-        for block_ids_row, num_row in zip(block_id_board, num_boards[i]):
-            for block_id, num in zip(block_ids_row, num_row):
-                cnstrnt = (block_id != i) == (num == -1)
-                range_num_c.append(cnstrnt)
-                cnstrnt = (block_id == i) == (num >= 0)
-                range_num_c.append(cnstrnt)
-
-    single_start_c = []
-    for i in range(nb_regions):
-        nums = flatten(num_boards[i])
-        cnstrnt = Exactly(*[n == 0 for n in nums], 1)
-        single_start_c.append(cnstrnt)
-
-    num_at_ = lambda n, l, c: num_boards[n][l][c]
-    def gen_predecessor_constraints(n, l, c):
-        val_neighs = [ neigh for neigh in neighbours((l, c))
-                if inside_board(neigh, height=height, width=width)]
-        # the current cell
-        cell = num_at_(n,l,c)
-        val_neigh_cells = [num_at_(n, *cell) for cell in val_neighs]
-        one_neigh_is_predecessor = AtLeast(*[And(neigh_cell >= 0, neigh_cell == cell - 1) for neigh_cell in val_neigh_cells], 1)
-        cnstrnt = (cell > 0) == one_neigh_is_predecessor
-        return cnstrnt
-
-
-    predecessor_c = [ gen_predecessor_constraints(n, l, c)
-        for n, l, c in itertools.product(range(nb_regions), range(height), range(width)) ]
+        in_region = { (l, c): block_id_board[l][c] == i for l, c in cells }
+        collect('connectivity', connected(cells, in_region, max_size=region_size))
 
-    s = Solver()
+    for i in range(nb_regions):
+        nb_blocks_with_given_id = Sum([bl_id == i for bl_id in flatten(block_id_board)])
+        cnstrnt = nb_blocks_with_given_id == region_size
+        collect('block_id_count', cnstrnt)
 
-    s.add( range_walls_c + count_walls_c + closed_space_c + block_id_range_c + permeation_c + degree_c + range_num_c + single_start_c + predecessor_c + block_id_count_c + whole_tally_c )
+    collect('whole_tally', Sum(list(flatten(block_id_board))) == sum([region_size * i for i in range(nb_regions)]))
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in walls_board ]
+    return solve_board(s, walls_board)
 
 if __name__ == "__main__":
     pars = {'height': 6,
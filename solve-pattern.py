@@ -1,62 +1,89 @@
 from z3 import *
-from more_z3 import coerce_eq, coerce_ge, coerce_le, IntMatrix, Exactly
+from more_z3 import coerce_eq, IntMatrix, Exactly, regular, solve_board, ConstraintCollector
+import functools
 import itertools
 from puzzles_common import transpose
+from table_store import load_table
 
 BLACK, WHITE = 0, 1
 
+# compositions of total in n bins: the white runs before, between and after the black runs.
+# The first and the last bins may be empty, the others are not.
 def distribute_in_n_direc(n, total):
-    assert n >= 2, 'The total is distributed in at least n directions|bins'
-    bins = IntVector('b', n)
-
-    minimums = [0] + [1] * (n - 2) + [0]
-    min_c = [ coerce_ge(bins, minimums) ] #as a list just for manipulation
-    maximums = [total] * n
-    max_c = [ coerce_le(bins, maximums) ] #as a list so as to add easily
-
-    sum_c = [ Sum(bins) == total ]
-
-    s = Solver()
-    s.add( min_c + max_c + sum_c )
-    while s.check() == sat:
-        m = s.model()
-        solution = tuple( m[b].as_long() for b in bins )
-        # solution already seen
-        avoid_seen_c = Not(coerce_eq(bins, solution))
-        s.add(avoid_seen_c)
-        yield solution
-
+    assert n >= 1, 'The total is distributed in at least one direction|bin'
+    minimums = [ 0 if i in (0, n - 1) else 1 for i in range(n) ]
+    spare = total - sum(minimums)
+    if spare < 0:
+        return
+    # stars and bars: n - 1 bars among spare + n - 1 positions
+    nb_positions = spare + n - 1
+    for bars in itertools.combinations(range(nb_positions), n - 1):
+        bounds = (-1,) + bars + (nb_positions,)
+        yield tuple( minimum + right - left - 1
+                for minimum, left, right in zip(minimums, bounds, bounds[1:]) )
+
+# Shared by rows and columns (and by the puzzles solved in the same process): runs must be a tuple.
+# The patterns are stored (see table_store.py)
+@functools.lru_cache(maxsize=None)
 def get_patterns_given_runs(runs, length):
-    for white_runs in distribute_in_n_direc(len(runs) + 1, length - sum(runs)):
-        res = []
-        for wr, br in itertools.zip_longest(white_runs, runs, fillvalue=0):
-            res.extend([WHITE] * wr)
-            res.extend([BLACK] * br)
-        yield tuple(res)
+    def compute():
+        for white_runs in distribute_in_n_direc(len(runs) + 1, length - sum(runs)):
+            res = []
+            for wr, br in itertools.zip_longest(white_runs, runs, fillvalue=0):
+                res.extend([WHITE] * wr)
+                res.extend([BLACK] * br)
+            yield tuple(res)
+    name = f"patterns-{length}-{'-'.join(map(str, runs)) or 'none'}"
+    return load_table(name, 1, compute)
 
 def gen_constraints_vars_runs(vars_, runs):
     possibs = [ coerce_eq(vars_, pat)
-            for pat in get_patterns_given_runs(runs, len(vars_)) ]
+            for pat in get_patterns_given_runs(tuple(runs), len(vars_)) ]
     return Exactly(*possibs, 1)
 
-def solve_pattern(runs_columnwise, runs_rowwise, height, width):
-    X = IntMatrix('c', nb_rows=height, nb_cols=width)
+# DFA of the lines with the given runs: (WHITE*) BLACK^r1 (WHITE+) BLACK^r2 ... BLACK^rk (WHITE*)
+# The state is the number of cells of the template BLACK^r1 WHITE BLACK^r2 ... BLACK^rk WHITE that are read.
+# Extra WHITE cells loop on the states at the start and after a WHITE of the template.
+def runs_automaton(runs):
+    template = []
+    for run in runs:
+        template.extend([BLACK] * run + [WHITE])
+    if not template:
+        template = [WHITE]
+    transitions = { (state, value): state + 1 for state, value in enumerate(template) }
+    for state in range(len(template) + 1):
+        if state == 0 or template[state - 1] == WHITE:
+            transitions[(state, WHITE)] = state
+    # the last WHITE of the template is optional
+    accepting = {len(template) - 1, len(template)}
+    return transitions, 0, accepting
+
+def gen_regular_constraints_vars_runs(vars_, runs):
+    return And(regular(vars_, *runs_automaton(runs)))
+
+# line_encoding:
+#  'regular': each line is accepted by the automaton of its runs (linear size)
+#  'patterns': each line is one of the patterns of its runs (exponential in the number of runs)
+def solve_pattern(runs_columnwise, runs_rowwise, height, width, *, line_encoding='regular', ctx=None):
+    X = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
+    gen_constraints = { 'regular': gen_regular_constraints_vars_runs,
+            'patterns': gen_constraints_vars_runs }[line_encoding]
+
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
 
     assert len(runs_rowwise) == len(X) == height
-    rowwise_c = [ gen_constraints_vars_runs(row, runs)
-            for row, runs in zip(X, runs_rowwise)]
+    collect('rowwise', ( gen_constraints(row, runs)
+            for row, runs in zip(X, runs_rowwise) ))
 
     X_trans = transpose(X)
 
     assert len(runs_columnwise) == len(X_trans) == width
-    colwise_c = [ gen_constraints_vars_runs(row, runs)
-            for row, runs in zip(X_trans, runs_columnwise)]
-
-    s = Solver()
-    s.add( rowwise_c + colwise_c )
-    s.check()
-    m = s.model()
-    return [ [ m[cell] for cell in row] for row in X ]
+    collect('colwise', ( gen_constraints(row, runs)
+            for row, runs in zip(X_trans, runs_columnwise) ))
+
+    return solve_board(s, X)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, transpose, inside_board, rows_and_cols
 from more_itertools import windowed
 
@@ -8,10 +8,10 @@ BLACK, WHITE = 1, 0
 PILL = WHITE # cell belongs to a pill
 EMPTY = BLACK
 
-def solve_puzzle_pillen(puzzle, *, height, width, horizontal_sums, vertical_sums, pill_count):
+def solve_puzzle_pillen(puzzle, *, height, width, horizontal_sums, vertical_sums, pill_count, ctx=None):
 
     # We give id to pills (each cell is empty or belong to a pill). id = 0 empty
-    pill_id_board = IntMatrix('b_i', nb_rows=height, nb_cols=width)
+    pill_id_board = IntMatrix('b_i', nb_rows=height, nb_cols=width, ctx=ctx)
 
     pill_id_range_c = [ And(cell >= 0 , cell <= pill_count)
             for cell in flatten(pill_id_board) ]
@@ -53,13 +53,11 @@ def solve_puzzle_pillen(puzzle, *, height, width, horizontal_sums, vertical_sums
         sums_c.append(cnstrnt)
 
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( pill_id_range_c + pill_id_count_c + pill_unicity_c + pill_sum_c + sums_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in pill_id_board ]
+    return solve_board(s, pill_id_board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Pillen/007.a.htm by author Otto Janko
@@ -1,13 +1,13 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, solve_board
 from puzzles_common import flatten, rows_and_cols
 from more_itertools import pairwise
 
 EMPTY = 0
 
-def solve_puzzle_putteria(*, height, width, cage_ids, to_be_left_empty):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_putteria(*, height, width, cage_ids, to_be_left_empty, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     at_ = lambda l, c : board[l][c]
     def get_vars_at(indices):
@@ -46,13 +46,11 @@ def solve_puzzle_putteria(*, height, width, cage_ids, to_be_left_empty):
             adj_numbered_cells = And(cell_1 > 0, cell_2 > 0)
             adj_c.append( Not(adj_numbered_cells) )
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( cage_size_once_c + empty_c + distinct_numbers_line_c + adj_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Putteria/007.a.htm by author @hirose_atsumi
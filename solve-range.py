@@ -1,19 +1,10 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
-from puzzles_common import flatten, transpose, inside_board
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, solve_board, ConstraintCollector
+from puzzles_common import flatten, transpose, inside_board, distribute_in_4_directions
 
 BLACK, WHITE = 0, 1
 
-# sort of subset_sum
-def distribute_in_4_directions(total):
-    for i in range(total+1):
-        for j in range(total-i+1):
-            for k in range(total-i-j+1):
-                for l in range(total-i-j-k+1):
-                    if i + j + k + l == total:
-                        yield(i, j, k, l)
-
 # direction = up, down, left, right, -1, +1, -1, +1
 
 # can also be thought of as 'circle' for a distance
@@ -71,15 +62,19 @@ def gen_contiguous_constraints(puzzle, board, *, width, height):
             for ind, count_ in all_contig_spaces ]
     return constraints
 
-def solve_puzzle_range(puzzle, *, height, width):
-    board = IntMatrix('b', nb_rows=height, nb_cols=width)
+def solve_puzzle_range(puzzle, *, height, width, ctx=None):
+    board = IntMatrix('b', nb_rows=height, nb_cols=width, ctx=ctx)
     pars = {'board': board, 'width': width, 'height': height}
 
-    contig_c = gen_contiguous_constraints(puzzle, **pars)
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
+    collect('contiguity', gen_contiguous_constraints(puzzle, **pars))
 
     # There is no empty cell:
-    complete_c = [ Xor(cell == WHITE, cell == BLACK)
-            for cell in flatten(board) ]
+    collect('complete', ( Xor(cell == WHITE, cell == BLACK)
+            for cell in flatten(board) ))
 
     # No two black squares are adjacent: horizontal
     horiz_bl_c = [ [And(cell_1 == BLACK, cell_2 == BLACK)
@@ -87,7 +82,7 @@ def solve_puzzle_range(puzzle, *, height, width):
             for row in board ]
     horiz_bl_c = flatten(horiz_bl_c)
 
-    horiz_bl_c = AtMost(*horiz_bl_c, 0)
+    collect('ortho_black', AtMost(*horiz_bl_c, 0))
 
     # No two black squares are adjacent: vertical
     vertic_bl_c = [ [And(cell_1 == BLACK, cell_2 == BLACK)
@@ -95,19 +90,9 @@ def solve_puzzle_range(puzzle, *, height, width):
             for row in transpose(board) ]
     vertic_bl_c = flatten(vertic_bl_c)
 
-    vertic_bl_c = AtMost(*vertic_bl_c, 0)
-
-    # No two black squares are adjancent: vertically or horizontall (ortho)
-    ortho_bl_c = [ horiz_bl_c, vertic_bl_c ]
-
-
-    s = Solver()
-
-    s.add(contig_c + complete_c + ortho_bl_c)
+    collect('ortho_black', AtMost(*vertic_bl_c, 0))
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     puzzle_h6_w9 = [
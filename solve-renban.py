@@ -1,17 +1,10 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, consecutive_set, solve_board
 from puzzles_common import flatten, gen_latin_square_constraints, get_same_block_indices
-from more_itertools import windowed
 
-def sorted_equal(vars_, vals):
-    assert len(vars_) == len(vals), "variables and values must have same length"
-    perms = itertools.permutations(vals)
-    return Or([ coerce_eq(vars_, perm) for perm in perms ])
-
-
-def solve_puzzle_renban(*, order, cage_ids, instance):
-    board = IntMatrix('n', nb_rows=order, nb_cols=order)
+def solve_puzzle_renban(*, order, cage_ids, instance, ctx=None):
+    board = IntMatrix('n', nb_rows=order, nb_cols=order, ctx=ctx)
 
     latin_c = gen_latin_square_constraints(board, order)
 
@@ -29,19 +22,14 @@ def solve_puzzle_renban(*, order, cage_ids, instance):
         cage_size = len(board_indices)
         if cage_size > 1:
             vars_ = get_vars_at(board_indices)
-            possibs = []
-            for wnd in windowed(range(1, order + 1), cage_size):
-                possibs.append(sorted_equal(vars_, wnd))
-            cnstrnt = Or(possibs)
-            consecutive_cage_c.append(cnstrnt)
+            # distinct values, max - min == cage_size - 1 (no enumeration of the permutations)
+            consecutive_cage_c += consecutive_set(vars_, low=1, high=order)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( latin_c + instance_c + consecutive_cage_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Renban/007.a.htm by author Otto Janko
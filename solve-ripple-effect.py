@@ -1,11 +1,11 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, solve_board
 from puzzles_common import flatten, transpose, get_same_block_indices
 from more_itertools import windowed
 
-def solve_puzzle_ripple_effect(*, height, width, cage_ids, instance):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_ripple_effect(*, height, width, cage_ids, instance, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     at_ = lambda l, c : board[l][c]
     def get_vars_at(indices):
@@ -43,14 +43,11 @@ def solve_puzzle_ripple_effect(*, height, width, cage_ids, instance):
                 cnstrnt = AtMost(*[cell == n for cell in contig_blk], 1)
                 adjacency_c.append(cnstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( cage_range_c + cage_elems_distinct_c + instance_c + adjacency_c )
 
-    s.check()
-    m = s.model()
-
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     pars = {'height': 10,
@@ -1,44 +1,39 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, solve_board, ConstraintCollector
 from puzzles_common import flatten, transpose, inside_board, rows_and_cols
 from puzzles_common import ortho_neighbours as neighbours
 
 EMPTY = 0
 
-def solve_puzzle_schlange(*, height, width, vertical_counts, horizontal_counts, extremities):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_schlange(*, height, width, vertical_counts, horizontal_counts, extremities, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     assert sum(horizontal_counts) == sum(vertical_counts)
     nb_occupied_cells = sum(horizontal_counts)
     MAX = nb_occupied_cells
 
 
-    range_c = [ And(cell >= 0, cell <= nb_occupied_cells)
-            for cell in flatten(board) ]
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
+    collect('range', ( And(cell >= 0, cell <= nb_occupied_cells)
+            for cell in flatten(board) ))
 
     at_ = lambda l, c : board[l][c]
     start_index, end_index = extremities
-    extremities_c = [ at_(*start_index) == 1, at_(*end_index) == MAX ]
+    collect('extremities', [ at_(*start_index) == 1, at_(*end_index) == MAX ])
 
 
-    #Note: distinct_c is defined differently than in solve-tracks.py
+    #Note: distinct is defined differently than in solve-tracks.py
 
     # Every occupied cell is at a given 'distance' to the start.
     # No other cell has the same distance
-    distinct_c = []
     for dist in range(1, MAX + 1):
         cells_with_given_dist = [ cell == dist for cell in flatten(board) ]
         cnstrnt = Exactly(*cells_with_given_dist, 1)
-        distinct_c.append(cnstrnt)
-
-    counts = vertical_counts + horizontal_counts
-
-    count_c = []
-    for line, cnt in zip(rows_and_cols(board), counts):
-        occupied_cells = [ n >= 1 for n in line ]
-        cnstrnt = Exactly(*occupied_cells, cnt)
-        count_c.append(cnstrnt)
+        collect('distinct', cnstrnt)
 
     def get_vars_at(indices):
         return [ at_(*ind) for ind in indices ]
@@ -56,12 +51,10 @@ def solve_puzzle_schlange(*, height, width, vertical_counts, horizontal_counts,
         return Or(unoccupied_c, current_cell_is_max_c, one_adj_cell_is_consec_c)
 
     # constraint forcing one of the adjacent cells to be the 'successor'
-    successor_c = [ gen_consecutive_nums_constraint(l, c)
-            for l, c in itertools.product(range(height), range(width)) ]
+    collect('successor', ( gen_consecutive_nums_constraint(l, c)
+            for l, c in itertools.product(range(height), range(width)) ))
 
     # To describe that the snake must have a width of 1, we can say any square in the grid can have at most 3 black squares. This would disallow the snake doubling-back or touching orthogonally
-    snake_width_c = []
-
     def gen_proximity_constraints(l, c):
         square = [ (l, c), (l, c + 1), # towards right
                 (l + 1, c), (l + 1, c + 1) ] # towards bottom and right
@@ -73,8 +66,8 @@ def solve_puzzle_schlange(*, height, width, vertical_counts, horizontal_counts,
 
     # In generating constraints we wander towards right and towards bottom
     # So : height - 1, width - 1
-    snake_width_c = [ gen_proximity_constraints(l, c)
-        for l, c in itertools.product(range(height - 1), range(width - 1)) ]
+    collect('snake_width', ( gen_proximity_constraints(l, c)
+        for l, c in itertools.product(range(height - 1), range(width - 1)) ))
 
     # when there is a right-angled block :
     # 23
@@ -99,8 +92,8 @@ def solve_puzzle_schlange(*, height, width, vertical_counts, horizontal_counts,
             presence_each_number.append(cnstrnt)
         return Implies(right_angled_turn , And(presence_each_number))
 
-    right_angle_turn_c = [ gen_right_angle_turn_constraints(l, c)
-        for l, c in itertools.product(range(height - 1), range(width - 1)) ]
+    collect('right_angle_turn', ( gen_right_angle_turn_constraints(l, c)
+        for l, c in itertools.product(range(height - 1), range(width - 1)) ))
 
     def gen_diagonal_constraint(l, c):
         square = [ (l, c), (l, c + 1), # towards right
@@ -120,17 +113,17 @@ def solve_puzzle_schlange(*, height, width, vertical_counts, horizontal_counts,
         diag_2_c = Implies( And(b >= 1, c >= 1), Or( a >=1, d >= 1))
         return And(diag_1_c, diag_2_c)
 
-    diagonal_touch_c = [ gen_diagonal_constraint(l, c)
-            for l, c in itertools.product(range(height - 1), range(width - 1)) ]
-
+    collect('diagonal_touch', ( gen_diagonal_constraint(l, c)
+            for l, c in itertools.product(range(height - 1), range(width - 1)) ))
 
-    s = Solver()
+    counts = vertical_counts + horizontal_counts
 
-    s.add( range_c + extremities_c + distinct_c +  successor_c + snake_width_c + right_angle_turn_c + diagonal_touch_c + count_c )
+    for line, cnt in zip(rows_and_cols(board), counts):
+        occupied_cells = [ n >= 1 for n in line ]
+        cnstrnt = Exactly(*occupied_cells, cnt)
+        collect('count', cnstrnt)
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Schlange/007.a.htm by author Valery Rubantsev
@@ -1,59 +1,31 @@
+import functools
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten
 
+# rectangles (top-left row, top-left column, width, height) of area rect_area inside the board and containing cell.
+# The height of a rectangle is a divisor of its area.
+@functools.lru_cache(maxsize=None)
 def get_possible_rectangles_at(cell, *, height, width, rect_area):
     cell_row, cell_col = cell
-
-    rect_topleft_row = Int('rect_topleft_row')
-    rect_topleft_col = Int('rect_topleft_col')
-
-    rect_width, rect_height = Ints('rect_width rect_height')
-
-    range_rect_c = [
-            rect_height >= 1,
-            rect_width >= 1,
-            rect_height <= height, #can't exceed board
-            rect_width <= width,
-            ]
-
-    rect_position_c = [
-            rect_topleft_row >= 0,
-            rect_topleft_col >= 0,
-            rect_topleft_col + rect_width <= width,
-            rect_topleft_row + rect_height <= height,
-            ]
-
-    rect_contains_cell_c = [
-            cell_row >= rect_topleft_row,
-            cell_col >= rect_topleft_col,
-            cell_row < rect_topleft_row + rect_height,
-            cell_col < rect_topleft_col + rect_width,
-            ]
-
-    area_c = [ rect_height * rect_width == rect_area ]
-
-    rect_vars = (rect_topleft_row, rect_topleft_col, rect_width, rect_height)
-
     res = []
-    s = Solver()
-    s.add(range_rect_c + area_c + rect_position_c + rect_contains_cell_c)
-    while s.check() == sat:
-        m = s.model()
-        solution = tuple(m[var].as_long() for var in rect_vars)
-        res.append(solution)
-        avoid_seen_c = Not(coerce_eq(rect_vars, solution))
-        s.add(avoid_seen_c)
-    return res
+    for rect_height in range(1, min(height, rect_area) + 1):
+        rect_width, remainder = divmod(rect_area, rect_height)
+        if remainder != 0 or rect_width > width:
+            continue
+        for rect_topleft_row in range(max(0, cell_row - rect_height + 1), min(cell_row, height - rect_height) + 1):
+            for rect_topleft_col in range(max(0, cell_col - rect_width + 1), min(cell_col, width - rect_width) + 1):
+                res.append((rect_topleft_row, rect_topleft_col, rect_width, rect_height))
+    return tuple(res)
 
 def get_indices_in_rect(rect):
     topleft_row, topleft_col, width, height = rect
     for l_offset, c_offset in itertools.product(range(height), range(width)):
         yield (topleft_row + l_offset, topleft_col + c_offset)
 
-def solve_puzzle_shikaku(puzzle, *, height, width):
-    X = IntMatrix('r', nb_rows=height, nb_cols=width)
+def solve_puzzle_shikaku(puzzle, *, height, width, ctx=None):
+    X = IntMatrix('r', nb_rows=height, nb_cols=width, ctx=ctx)
 
     assert sum(flatten(puzzle)) == height * width, "Sum of the areas of all rectangles must be equal to board area"
 
@@ -66,6 +38,9 @@ def solve_puzzle_shikaku(puzzle, *, height, width):
 
     rectangle_area_c = []
 
+    clue_cells = { (l, c) for l, c in itertools.product(range(height), range(width))
+            if puzzle[l][c] > 0 }
+
     for l, c in itertools.product(range(height), range(width)):
         rect_area = puzzle[l][c]
         if rect_area > 0:
@@ -74,19 +49,20 @@ def solve_puzzle_shikaku(puzzle, *, height, width):
             rectangle_configs_with_this_id = []
             for rect in rects:
                 indices = list(get_indices_in_rect(rect))
+                # a rectangle has a single clue
+                if any(ind in clue_cells for ind in indices if ind != (l, c)):
+                    continue
                 rect_vars = get_vars_at(indices)
                 # This is like "coloring" the rectangle with id
                 cnstrnt = coerce_eq(rect_vars, [rect_id] * len(rect_vars))
                 rectangle_configs_with_this_id.append(cnstrnt)
             rectangle_area_c.append(Exactly(*rectangle_configs_with_this_id, 1))
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add(rectangle_area_c)
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in X ]
+    return solve_board(s, X)
 
 if __name__ == "__main__":
     pars = {'height': 12,
@@ -1,26 +1,12 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, consecutive_set, solve_board
 from puzzles_common import flatten, rows_and_cols, get_same_block_indices
 
 EMPTY = 0
 
-# strictly consecutive numbers (no repetition)
-def gen_consecutive_numbers_constraint(lst):
-    distinct_c = Distinct(lst)
-    min_or_has_predecessor_c = []
-    for i, elem in enumerate(lst):
-        others = [ o_elem for j, o_elem in enumerate(lst)
-                if j != i ]
-        #No need to say Exactly 1. As we constrain elements to be distinct
-        has_predecessor = Or([ oth == elem - 1 for oth in others ])
-        is_min = And([ elem < oth for oth in others ])
-        cnstrnt = Or(is_min, has_predecessor)
-        min_or_has_predecessor_c.append(cnstrnt)
-    return And(distinct_c , *min_or_has_predecessor_c)
-
-def solve_puzzle_str8ts(*, height, width, order, instance, horiz_cages, vertic_cages):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_str8ts(*, height, width, order, instance, horiz_cages, vertic_cages, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ And(n >= 0, n <= order)
             for n in flatten(board) ]
@@ -59,6 +45,7 @@ def solve_puzzle_str8ts(*, height, width, order, instance, horiz_cages, vertic_c
         return [ trans_at_(*ind) for ind in indices ]
 
     # numbers are consequent in a cage. (here: stripe of white cells)
+    # distinct, max - min == size - 1: linear in the size of the stripe
     cage_consec_c = []
     h_cages_inds = get_same_block_indices(horiz_cages)
 
@@ -67,8 +54,7 @@ def solve_puzzle_str8ts(*, height, width, order, instance, horiz_cages, vertic_c
     for h_cage_indices in h_cages_inds.values():
         vars_ = get_vars_at(h_cage_indices)
         if len(vars_) > 1:
-            cnstrnt = gen_consecutive_numbers_constraint(vars_)
-            cage_consec_c.append(cnstrnt)
+            cage_consec_c += consecutive_set(vars_, low=1, high=order)
 
     v_cages_inds = get_same_block_indices(vertic_cages)
 
@@ -77,17 +63,14 @@ def solve_puzzle_str8ts(*, height, width, order, instance, horiz_cages, vertic_c
     for v_cage_indices in v_cages_inds.values():
         vars_ = get_trans_vars_at(v_cage_indices)
         if len(vars_) > 1:
-            cnstrnt = gen_consecutive_numbers_constraint(vars_)
-            cage_consec_c.append(cnstrnt)
+            cage_consec_c += consecutive_set(vars_, low=1, high=order)
 
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + instance_c + each_n_atmost_once_c + cage_consec_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Straights/007.a.htm by author Otto Janko
@@ -1,12 +1,12 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, transpose, get_same_block_indices
 
 WHITE, BLACK = 0, 1
 
-def solve_puzzle_tairupeinto(*, height, width, cage_ids, vertical_counts, horizontal_counts):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_tairupeinto(*, height, width, cage_ids, vertical_counts, horizontal_counts, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [Xor( clr == WHITE, clr == BLACK )for clr in flatten(board)]
 
@@ -47,13 +47,11 @@ def solve_puzzle_tairupeinto(*, height, width, cage_ids, vertical_counts, horizo
             col_sums_c.append(cnstrnt)
 
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + homogenous_cage_color_c + row_sums_c + col_sums_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Tairupeinto/007.a.htm by author Otto Janko
@@ -1,29 +1,29 @@
 import itertools
 from more_itertools import windowed
 from z3 import *
-from more_z3 import IntMatrix
+from more_z3 import BinaryMatrix, binary_range, binary_eq, binary_sum_eq, binary_value, solve_board
 from puzzles_common import flatten, transpose
 
 BLACK, WHITE = 0, 1
 
-def solve_puzzle_takuzu(puzzle, *, height, width):
-    board = IntMatrix('b', nb_rows=height, nb_cols=width)
+# encoding: 'int' or 'bool' cells (see more_z3.BINARY_ENCODINGS)
+def solve_puzzle_takuzu(puzzle, *, height, width, encoding='int', ctx=None):
+    board = BinaryMatrix('b', nb_rows=height, nb_cols=width, encoding=encoding, ctx=ctx)
 
     assert width % 2 == 0, 'Width must be pair'
     assert height % 2 == 0,  'Height must be pair'
 
     vars_ = flatten(board)
     vals = flatten(puzzle)
-    instance_c  = [ var == val for var, val in zip(vars_, vals)
+    instance_c  = [ binary_eq(var, val) for var, val in zip(vars_, vals)
             if val > -1 ]
 
-    complete_c = [ Xor(cell == 0, cell == 1)
-            for cell in flatten(board) ]
+    complete_c = binary_range(flatten(board))
 
     # Equal number of 1s and 0s: so there are n/2 1s and n/2 0s
-    _horiz_count_c = [ Sum(row) == width / 2
+    _horiz_count_c = [ binary_sum_eq(row, width // 2)
             for row in board ]
-    _vertical_count_c = [ Sum(row) == height / 2
+    _vertical_count_c = [ binary_sum_eq(row, height // 2)
             for row in transpose(board) ]
     count_c = _horiz_count_c + _vertical_count_c
 
@@ -32,26 +32,32 @@ def solve_puzzle_takuzu(puzzle, *, height, width):
         base = 2
         return Sum([val * base ** pos
            for pos, val in enumerate(sequence)])
-    row_unique_c = [ Distinct([get_id(row) for row in board]) ]
-    col_unique_c = [ Distinct([get_id(row) for row in transpose(board)]) ]
+    # With booleans: two rows differ on (at least) one cell
+    def all_differ(sequences):
+        return [ Or([ cell_1 != cell_2 for cell_1, cell_2 in zip(seq_1, seq_2) ])
+                for seq_1, seq_2 in itertools.combinations(sequences, 2) ]
+    if encoding == 'bool':
+        row_unique_c = all_differ(board)
+        col_unique_c = all_differ(transpose(board))
+    else:
+        row_unique_c = [ Distinct([get_id(row) for row in board]) ]
+        col_unique_c = [ Distinct([get_id(row) for row in transpose(board)]) ]
 
     # No more than 2 adjacent 1s or 0s
     def gen_adj_constraints(sequence):
         adjs = windowed(sequence, 3)
         # if three adjacent boxes are 0(resp 1) , sum is 0(resp 3).
         # Among the eight possibilities of three adjacent boxes
-        return [ And(Sum(adj) != 0, Sum(adj) != 3)
+        return [ And(Not(binary_sum_eq(adj, 0)), Not(binary_sum_eq(adj, 3)))
                for adj in adjs ]
     _row_adj_c = flatten([ gen_adj_constraints(row) for row in board ])
     _col_adj_c = flatten([ gen_adj_constraints(row) for row in transpose(board) ])
     adj_c = _row_adj_c + _col_adj_c
 
-    s = Solver()
+    s = Solver(ctx=ctx)
     s.add(instance_c + complete_c + count_c + row_unique_c + col_unique_c + adj_c)
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board]
+    return solve_board(s, [ [ binary_value(cell) for cell in row ] for row in board ])
 
 if __name__ == "__main__":
     pars = {'height': 8,
@@ -1,11 +1,11 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, get_same_block_indices
 from more_itertools import pairwise
 
-def solve_puzzle_tatami(*, order, max_num, cage_ids, instance):
-    board = IntMatrix('n', nb_rows=order, nb_cols=order)
+def solve_puzzle_tatami(*, order, max_num, cage_ids, instance, ctx=None):
+    board = IntMatrix('n', nb_rows=order, nb_cols=order, ctx=ctx)
 
     range_c = [ And( n >= 0, n <= max_num)
             for n in flatten(board) ]
@@ -46,13 +46,11 @@ def solve_puzzle_tatami(*, order, max_num, cage_ids, instance):
             for l, c in itertools.product(range(order), range(order))
             if instance[l][c] > 0 ]
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + equal_number_occurences + adj_c + cage_range_c + cage_elems_distinct_c + instance_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Patchwork/007.a.htm by author Adolfo Zanellati
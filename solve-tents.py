@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, Exactly
+from more_z3 import IntMatrix, Exactly, AtMost, solve_board, ConstraintCollector
 from puzzles_common import flatten, transpose, inside_board
 from puzzles_common import ortho_neighbours as neighbours
 
@@ -16,9 +16,9 @@ def preprocess(board, *, height, width):
             for l in range(height) ]
     return res
 
-def solve_tents(board, *, height, width, horizontal_tents, vertical_tents):
+def solve_tents(board, *, height, width, horizontal_tents, vertical_tents, ctx=None):
     preprocessed = preprocess(board, height=height, width=width)
-    X = IntMatrix('t', nb_rows=height, nb_cols=width)
+    X = IntMatrix('t', nb_rows=height, nb_cols=width, ctx=ctx)
 
     at_ = lambda l, c: X[l][c]
     is_tree = lambda l, c: preprocessed[l][c] > 0
@@ -52,50 +52,48 @@ def solve_tents(board, *, height, width, horizontal_tents, vertical_tents):
 
     MAX = height * width
 
-    complete_c = [ And(-MAX < cell, cell < MAX)
-            for cell in flatten(X) ]
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
 
-    coupling_c = [ gen_coupling_constraints(l, c)
+    collect('complete', ( And(-MAX < cell, cell < MAX)
+            for cell in flatten(X) ))
+
+    collect('instance', ( at_(l, c) == preprocessed[l][c]
             for l, c in itertools.product(range(height), range(width))
-            if is_tree(l, c)]
+            if preprocessed[l][c] > 0 ))
 
-    instance_c = [ at_(l, c) == preprocessed[l][c]
+    collect('coupling', ( gen_coupling_constraints(l, c)
             for l, c in itertools.product(range(height), range(width))
-            if preprocessed[l][c] > 0 ]
+            if is_tree(l, c) ))
 
     # In generating constraints we wander towards right and towards bottom
     # So : height - 1, width - 1
-    tree_proximity_c = [ gen_proximity_constraints(l, c)
-        for l, c in itertools.product(range(height - 1), range(width - 1)) ]
+    collect('tree_proximity', ( gen_proximity_constraints(l, c)
+        for l, c in itertools.product(range(height - 1), range(width - 1)) ))
 
     NB_TREES = sum( cell > 0 for cell in flatten(preprocessed) )
-    same_number_trees_tents_c = [ coerce_nb_tents(flatten(X), NB_TREES) ]
+    collect('same_number_trees_tents', coerce_nb_tents(flatten(X), NB_TREES))
 
     # vertical tents means nb tents in each line. Noted vertically on the board
     # on the left or right side
     assert len(vertical_tents) == height == len(X)
-    row_sums_c = [ coerce_nb_tents(row, count_v)
-            for row, count_v in zip(X, vertical_tents) ]
+    collect('row_sums', ( coerce_nb_tents(row, count_v)
+            for row, count_v in zip(X, vertical_tents) ))
 
     X_trans = transpose(X)
     # horizontal tents means nb tents in each line. Noted horizontally on the board
     # at the bottom of the board or top of the board
     assert len(horizontal_tents) == width == len(X_trans)
     # row in X_trans means col in X
-    col_sums_c = [ coerce_nb_tents(row, count_h)
-            for row, count_h in zip(X_trans, horizontal_tents) ]
+    collect('col_sums', ( coerce_nb_tents(row, count_h)
+            for row, count_h in zip(X_trans, horizontal_tents) ))
 
     # NOTE: if ever col_sums or row_sums are partially erased to add difficulty.
     # use -1. and add here if count_h >= 0
 
-    s = Solver()
-    s.add(complete_c + instance_c +
-           coupling_c + tree_proximity_c +
-           same_number_trees_tents_c +
-           row_sums_c + col_sums_c)
-    s.check()
-    m = s.model()
-    return [ [ m[cell] for cell in row ] for row in X ]
+    # solutions differ by their tents, not by the couplings
+    return solve_board(s, X, project=[ [ cell < 0 for cell in row ] for row in X ])
 
 if __name__ == "__main__":
     pars = {
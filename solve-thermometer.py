@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, transpose, inside_board, get_same_block_indices, rows_and_cols
 from more_itertools import pairwise
 
@@ -9,8 +9,8 @@ BLACK, WHITE = 1, 0
 MERCURY = BLACK
 GLASS = WHITE
 
-def solve_puzzle_thermometer(*, height, width, horizontal_counts, vertical_counts, cage_ids, cage_orientations):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_thermometer(*, height, width, horizontal_counts, vertical_counts, cage_ids, cage_orientations, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ Xor(cell == BLACK, cell == WHITE)
             for cell in flatten(board) ]
@@ -44,13 +44,11 @@ def solve_puzzle_thermometer(*, height, width, horizontal_counts, vertical_count
         cnstrnt = Exactly(*occupied_cells, cnt)
         count_c.append(cnstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + thermometer_c + count_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Thermometer/007.a.htm by author Otto Janko
@@ -1,8 +1,10 @@
 from z3 import *
+import functools
 import itertools
 from collections import defaultdict
 from puzzles_common import transpose, gen_latin_square_constraints
-from more_z3 import IntMatrix, Exactly, coerce_eq
+from table_store import load_table
+from more_z3 import IntMatrix, Exactly, coerce_eq, visible_count, solve_board, ConstraintCollector
 
 # Number of towers seen from left
 # [4, 3, 5, 2, 1] -> 2  (tower of height 4 and tower of height 5 are seen)
@@ -22,47 +24,67 @@ def constrain_towers(tower_vars, tower_height, knowl):
     # Exactly one possibility among all would satisfy.
     return Exactly(*all_possiblts, 1)
 
+# the permutations of 1..n by number of visible towers. The table of the permutations is stored (see table_store.py)
+@functools.lru_cache(maxsize=None)
 def gen_knowl_dict(n):
+    def compute():
+        for perm in itertools.permutations(range(1, n + 1)):
+            yield (nb_towers_visible(perm), *perm)
     knowl_dict = defaultdict(list)
-    for perm in itertools.permutations(list(range(1,n+1))):
-        nb_towers = nb_towers_visible(perm)
-        knowl_dict[nb_towers].append(perm)
+    for nb_towers, *perm in load_table(f'towers-permutations-{n}', 1, compute):
+        knowl_dict[nb_towers].append(tuple(perm))
     return knowl_dict
 
-def solve_tower_puzzle(n, top, left, right, bottom, instance=None):
-    knowl = gen_knowl_dict(n)
-    X = IntMatrix('h', n, n)
+# visibility:
+#  'comparisons' or 'running_max': the visible towers are counted by more_z3.visible_count (with that encoding)
+#  'permutations': a line is one of the permutations with the right number of visible towers (n! permutations)
+def solve_tower_puzzle(n, top, left, right, bottom, instance=None, *, visibility='comparisons', ctx=None):
+    if visibility == 'permutations':
+        knowl = gen_knowl_dict(n)
+        constrain = lambda tower_vars, tower_height: constrain_towers(tower_vars, tower_height, knowl)
+    else:
+        constrain = lambda tower_vars, tower_height: And(visible_count(tower_vars, tower_height, encoding=visibility))
+    X = IntMatrix('h', n, n, ctx=ctx)
     X_trans = transpose(X)
 
     assert len(top) == len(left) == n
     assert len(right) == len(bottom) == n
 
-    latin_c = gen_latin_square_constraints(X, n)
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
 
-    left_c = [ constrain_towers(row, h, knowl)
-            for row, h in zip(X, left) if h > 0 ]
-    right_c = [ constrain_towers(row[::-1], h, knowl)
-            for row, h in zip(X, right) if h > 0 ]
+    collect('latin', gen_latin_square_constraints(X, n))
+    # Redundant: each height appears once in a line (the pseudo-boolean form of Distinct propagates better)
+    collect('once', ( Exactly(*[ var == height for var in line ], 1)
+            for line in X + X_trans for height in range(1, n + 1) ))
 
-    top_c = [ constrain_towers(row, h, knowl)
-            for row, h in zip(X_trans, top) if h > 0 ]
-    bottom_c = [ constrain_towers(row[::-1], h, knowl)
-            for row, h in zip(X_trans, bottom) if h > 0 ]
+    # Redundant: at most d + 1 towers are visible up to distance d (0 based) from a clue k. So at least k - d - 1
+    # towers visible after it are taller: its height is at most n - k + 1 + d
+    def gen_bound_constraints(tower_vars, tower_height):
+        return [ var <= n - tower_height + 1 + d
+                for d, var in enumerate(tower_vars) if n - tower_height + 1 + d < n ]
+    lines_and_clues = list(itertools.chain(zip(X, left), zip([ row[::-1] for row in X ], right),
+            zip(X_trans, top), zip([ row[::-1] for row in X_trans ], bottom)))
+    collect('bound', ( gen_bound_constraints(line, h)
+            for line, h in lines_and_clues if h > 0 ))
 
-    s = Solver()
-    s.add( latin_c + left_c + right_c + top_c + bottom_c )
+    collect('visible', ( constrain(row, h)
+            for row, h in zip(X, left) if h > 0 ))
+    collect('visible', ( constrain(row[::-1], h)
+            for row, h in zip(X, right) if h > 0 ))
 
-    if instance is not None:
-        for row_v, row in zip(X, instance):
-            for var, value in zip(row_v, row):
-                if value > 0:
-                    s.add(var == value)
+    collect('visible', ( constrain(row, h)
+            for row, h in zip(X_trans, top) if h > 0 ))
+    collect('visible', ( constrain(row[::-1], h)
+            for row, h in zip(X_trans, bottom) if h > 0 ))
 
-    s.check()
-    m = s.model()
+    if instance is not None:
+        collect('instance', ( var == value
+                for row_v, row in zip(X, instance)
+                for var, value in zip(row_v, row) if value > 0 ))
 
-    res = [[ m[s] for s in row] for row in X]
-    return res
+    return solve_board(s, X)
 
 if __name__ == "__main__":
     # top and bottom read the heights from left to right in the puzzle
@@ -1,21 +1,25 @@
 from z3 import *
 import itertools
-from more_z3 import IntMatrix, Exactly
+from more_z3 import IntMatrix, Exactly, solve_board, ConstraintCollector
 from puzzles_common import transpose, inside_board
 from puzzles_common import ortho_neighbours as neighbours
 
-def solve_tracks(*, tracks, start_index, end_index, horizontal_clues, vertical_clues, height, width):
-    X = IntMatrix('t', nb_rows=height, nb_cols=width)
+def solve_tracks(*, tracks, start_index, end_index, horizontal_clues, vertical_clues, height, width, ctx=None):
+    X = IntMatrix('t', nb_rows=height, nb_cols=width, ctx=ctx)
     assert sum(horizontal_clues) == sum(vertical_clues)
     nb_occupied_cells = sum(horizontal_clues)
     MAX = nb_occupied_cells
 
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
     cells = list(itertools.chain(*X))
-    range_c = [ And(n >= 0, n <= nb_occupied_cells)
-            for n in cells ]
+    collect('range', ( And(n >= 0, n <= nb_occupied_cells)
+            for n in cells ))
 
     at_ = lambda l, c : X[l][c]
-    extremities_c = [ at_(*start_index) == 1, at_(*end_index)== MAX ]
+    collect('extremities', [ at_(*start_index) == 1, at_(*end_index)== MAX ])
     for index_, pattern in tracks:
         l, c = index_
         bottom, left, top, right = map(int, list(pattern))
@@ -31,7 +35,7 @@ def solve_tracks(*, tracks, start_index, end_index, horizontal_clues, vertical_c
                 nxt = l, c + 1
             curr_var = at_(*index_)
             nxt_var = at_(*nxt)
-            extremities_c.append( nxt_var == curr_var + 1 )
+            collect('extremities', nxt_var == curr_var + 1 )
         elif index_ == end_index:
             # the ending track is the bottommost
             # so it has no bottom
@@ -43,26 +47,22 @@ def solve_tracks(*, tracks, start_index, end_index, horizontal_clues, vertical_c
                 prv = l, c - 1
             curr_var = at_(*index_)
             prv_var = at_(*prv)
-            extremities_c.append( curr_var == prv_var + 1 )
+            collect('extremities', curr_var == prv_var + 1 )
 
 
     X_trans = transpose(X)
 
     # Exactly count_ occupied (> 0) cells in each row
-    row_sums_c = [ Exactly(*[cell > 0 for cell in row], count_)
-            for row, count_ in zip(X, vertical_clues) ]
-
-    row_sums_c = [ Exactly(*[cell > 0 for cell in row], count_)
-            for row, count_ in zip(X, vertical_clues) ]
+    collect('row_sums', ( Exactly(*[cell > 0 for cell in row], count_)
+            for row, count_ in zip(X, vertical_clues) ))
 
-    col_sums_c = [ Exactly(*[cell > 0 for cell in row], count_)
-            for row, count_ in zip(X_trans, horizontal_clues) ]
+    collect('col_sums', ( Exactly(*[cell > 0 for cell in row], count_)
+            for row, count_ in zip(X_trans, horizontal_clues) ))
 
     # we give unique_id to unoccupied cell. for using Distinct on occupied cells
-    distinct_c = Distinct([If(cell > 0, cell, -i) for i, cell in enumerate(cells, 1)])
     # Every occupied cell is at a given 'distance' to the start.
     # No other cell has the same distance
-    distinct_c = [ distinct_c ]
+    collect('distinct', Distinct([If(cell > 0, cell, -i) for i, cell in enumerate(cells, 1)]))
 
     def get_adj_track_indices(index_, pattern):
         l, c = index_
@@ -95,12 +95,11 @@ def solve_tracks(*, tracks, start_index, end_index, horizontal_clues, vertical_c
         return Or(ascending_c, descending_c)
 
     # constraint forcing parts of the tracks to be in ascending or descending order
-    sequential_c = []
     for index_, pattern in tracks:
         inds = get_adj_track_indices(index_, pattern)
         successive_track_vars = get_vars_at(inds)
         cnstrnt = coerce_sequential(successive_track_vars)
-        sequential_c.append(cnstrnt)
+        collect('sequential', cnstrnt)
     # The start and end track produces an absurd condition. but it would be weeded out by other constraints.
 
     def gen_consecutive_nums_constraint(l, c):
@@ -116,19 +115,10 @@ def solve_tracks(*, tracks, start_index, end_index, horizontal_clues, vertical_c
         return Or(unoccupied_c, current_cell_is_max_c, one_adj_cell_is_consec_c)
 
     # constraint forcing one of the adjacent cells to be the 'successor'
-    successor_c = [ gen_consecutive_nums_constraint(l, c)
-            for l, c in itertools.product(range(height), range(width)) ]
-
-
-    s = Solver()
-    s.add( range_c + extremities_c + row_sums_c + col_sums_c + distinct_c
-            + sequential_c + successor_c)
-
-    s.check()
-    m = s.model()
+    collect('successor', ( gen_consecutive_nums_constraint(l, c)
+            for l, c in itertools.product(range(height), range(width)) ))
 
-    res = [[ m[s] for s in row] for row in X]
-    return res
+    return solve_board(s, X)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,11 @@
 from z3 import *
 import itertools
 from collections import defaultdict
-from more_z3 import IntMatrix
+from more_z3 import IntMatrix, solve_board
 from puzzles_common import transpose, flatten, gen_latin_square_constraints
 
-def solve_unequal(puzzle, *, order, lt_inequalities):
-    X = IntMatrix('n', order, order)
+def solve_unequal(puzzle, *, order, lt_inequalities, ctx=None):
+    X = IntMatrix('n', order, order, ctx=ctx)
 
     latin_c = gen_latin_square_constraints(X, order)
 
@@ -19,14 +19,10 @@ def solve_unequal(puzzle, *, order, lt_inequalities):
     lesser_than_c = [ at_(*lhs) < at_(*rhs)
             for lhs, rhs in lt_inequalities ]
 
-    s = Solver()
+    s = Solver(ctx=ctx)
     s.add(latin_c + instance_c + lesser_than_c)
 
-    s.check()
-    m = s.model()
-
-    res = [[ m[s] for s in row] for row in X]
-    return res
+    return solve_board(s, X)
 
 
 if __name__ == "__main__":
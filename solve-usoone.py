@@ -1,29 +1,32 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board, connected, ConstraintCollector
 from puzzles_common import flatten, rows_and_cols, get_same_block_indices, inside_board
 from more_itertools import pairwise
 from puzzles_common import ortho_neighbours as neighbours
 
 BLACK, WHITE = 1, 0
 
-def solve_puzzle_usoone(puzzle, *, height, width, cage_ids):
-    board = IntMatrix('c', nb_rows=height, nb_cols=width)
+def solve_puzzle_usoone(puzzle, *, height, width, cage_ids, ctx=None):
+    board = IntMatrix('c', nb_rows=height, nb_cols=width, ctx=ctx)
 
-    range_c = [ Xor(cell == BLACK, cell == WHITE)
-            for cell in flatten(board) ]
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
+    collect('range', ( Xor(cell == BLACK, cell == WHITE)
+            for cell in flatten(board) ))
 
     at_ = lambda l, c : board[l][c]
-    instance_c = [ at_(l, c) != BLACK
+    collect('instance', ( at_(l, c) != BLACK
             for l, c in itertools.product(range(height), range(width))
-            if puzzle[l][c] >= 0 ]
+            if puzzle[l][c] >= 0 ))
 
-    adj_c = []
     for clrs in rows_and_cols(board):
         for (c1, c2) in pairwise(clrs):
             both_black = And(c1 == BLACK, c2 == BLACK)
             cnstrnt = Not(both_black)
-            adj_c.append(cnstrnt)
+            collect('adjacency', cnstrnt)
 
     cages_inds = get_same_block_indices(cage_ids)
 
@@ -33,8 +36,6 @@ def solve_puzzle_usoone(puzzle, *, height, width, cage_ids):
     clue_at_ = lambda l, c : puzzle[l][c]
 
     # one clue exactly is wrong count
-    cage_clue_c = []
-
     def gen_count_neighbours_constraints(n, l, c):
         val_neighs = [ neigh for neigh in neighbours((l, c))
                 if inside_board(neigh, height=height, width=width)]
@@ -57,51 +58,15 @@ def solve_puzzle_usoone(puzzle, *, height, width, cage_ids):
         assert nb_clues_in_cage >= 1, "As per the rules of the game, each cage/region contains exactly one wrong clue"
         ONE_WRONG_CLUE = 1
         cnstrnt = Exactly(*abiding_clues, nb_clues_in_cage - ONE_WRONG_CLUE)
-        cage_clue_c.append(cnstrnt)
+        collect('cage_clue', cnstrnt)
 
     # CONNECTIVITY of white cells
 
-    range_num_c = []
-    # We assign number to each cell in the loop.
-    num_board = IntMatrix('num', nb_rows=height, nb_cols=width)
-    for row, num_row in zip(board, num_board):
-        for cell, num in zip(row, num_row):
-            cnstrnt = (cell == BLACK) == (num == -1)
-            range_num_c.append(cnstrnt)
-            cnstrnt = (cell == WHITE) == (num >= 0)
-            range_num_c.append(cnstrnt)
-
-    nums = flatten(num_board)
-    single_start_c = [ Exactly(*[n == 0 for n in nums], 1) ]
-
-
-    num_at_ = lambda l, c: num_board[l][c]
-    def gen_predecessor_constraints(l, c):
-        val_neighs = [ neigh for neigh in neighbours((l, c))
-                if inside_board(neigh, height=height, width=width)]
-        # the current cell
-        cell = num_at_(l,c)
-        val_neigh_cells = [num_at_(*cell) for cell in val_neighs]
-        one_neigh_is_predecessor = AtLeast(*[And(neigh_cell >= 0, neigh_cell == cell - 1) for neigh_cell in val_neigh_cells], 1)
-        cnstrnt = (cell > 0) == one_neigh_is_predecessor
-        return cnstrnt
-
-
-    predecessor_c = [ gen_predecessor_constraints(l, c)
-        for l, c in itertools.product(range(height), range(width)) ]
-
-    # connectivity constraint as proposed by Gerhard van der Knijff in 'Solving and generating puzzles with a connectivity constraint'
-    # This can be thought of as a creative use of proof-by-induction and Peano's way of definining natural numbers...
-    # Some seed/start ... then everything spawns from it.
-    connectivity_c = range_num_c + single_start_c + predecessor_c
-
-    s = Solver()
-
-    s.add( range_c + instance_c + adj_c + cage_clue_c + connectivity_c )
+    cells = list(itertools.product(range(height), range(width)))
+    is_white = { (l, c): board[l][c] == WHITE for l, c in cells }
+    collect('connectivity', connected(cells, is_white))
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Usoone/007.a.htm by author Otto Janko
@@ -1,10 +1,10 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, transpose
 
-def solve_puzzle_yakuso(puzzle, *, height, width, horizontal_sums):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_yakuso(puzzle, *, height, width, horizontal_sums, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     max_possible_number = height
 
@@ -44,13 +44,11 @@ def solve_puzzle_yakuso(puzzle, *, height, width, horizontal_sums):
             cnstrnt = Sum(col) == ttl
             sum_c.append(cnstrnt)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + row_n_times_n_c + whole_n_times_n_c + instance_c + sum_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Yakuso/007.a.htm by author Bertrand Leplay 
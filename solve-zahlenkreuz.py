@@ -1,12 +1,12 @@
 import itertools
 from z3 import *
-from more_z3 import BoolMatrix, coerce_eq, Exactly
+from more_z3 import BoolMatrix, coerce_eq, Exactly, solve_board
 from puzzles_common import flatten, rows_and_cols
 
-def solve_puzzle_zahlenkreuz(puzzle, *, height, width, horizontal_sums, vertical_sums):
-    black_board = BoolMatrix('blk', nb_rows=height, nb_cols=width)
+def solve_puzzle_zahlenkreuz(puzzle, *, height, width, horizontal_sums, vertical_sums, ctx=None):
+    black_board = BoolMatrix('blk', nb_rows=height, nb_cols=width, ctx=ctx)
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     sum_c = []
     sums = vertical_sums + horizontal_sums # rows add up to clues(sums) noted vertically...
@@ -16,9 +16,7 @@ def solve_puzzle_zahlenkreuz(puzzle, *, height, width, horizontal_sums, vertical
 
     s.add( sum_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in black_board ]
+    return solve_board(s, black_board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Zahlenkreuz/007.a.htm by author Otto Janko
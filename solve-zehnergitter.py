@@ -1,10 +1,10 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, AtMost, solve_board
 from puzzles_common import flatten, inside_board, transpose
 
-def solve_puzzle_zehnergitter(puzzle, *, height, width, horizontal_sums):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_zehnergitter(puzzle, *, height, width, horizontal_sums, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     range_c = [ And( n >= 0, n <= 9)
             for n in flatten(board) ]
@@ -37,13 +37,11 @@ def solve_puzzle_zehnergitter(puzzle, *, height, width, horizontal_sums):
     sum_c = [ Sum(col) == ttl
             for col, ttl in zip(transpose(board), horizontal_sums) ]
 
-    s = Solver()
+    s = Solver(ctx=ctx)
 
     s.add( range_c + adjacency_c + distinct_c + instance_c + sum_c )
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Zehnergitter/007.a.htm by author Otto Janko
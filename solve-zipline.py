@@ -1,6 +1,6 @@
 import itertools
 from z3 import *
-from more_z3 import IntMatrix, coerce_eq, Exactly
+from more_z3 import IntMatrix, coerce_eq, Exactly, solve_board, ConstraintCollector
 from puzzles_common import flatten, ortho_neighbours as neighbours, inside_board
 
 EMPTY = 0
@@ -38,14 +38,18 @@ def diagonal_strips(index_, *, height, width):
     yield from north_east
     yield from south_west
 
-def solve_puzzle_zipline(puzzle, *, height, width):
-    board = IntMatrix('n', nb_rows=height, nb_cols=width)
+def solve_puzzle_zipline(puzzle, *, height, width, ctx=None):
+    board = IntMatrix('n', nb_rows=height, nb_cols=width, ctx=ctx)
 
     nb_white_cells = sum(n == TO_BE_FILLED for n in flatten(puzzle))
     max_possible_number = nb_white_cells
 
-    range_c = [ And(cell >= 0, cell <= max_possible_number)
-            for cell in flatten(board) ]
+    s = Solver(ctx=ctx)
+    # the constraints are added as they are produced
+    collect = ConstraintCollector(s)
+
+    collect('range', ( And(cell >= 0, cell <= max_possible_number)
+            for cell in flatten(board) ))
 
     def get_id(l, c):
         return -(l * width + c + 1)
@@ -53,18 +57,14 @@ def solve_puzzle_zipline(puzzle, *, height, width):
     id_board = [[get_id(l, c) for c in range(width)]
             for l in range(height)]
 
-    distinct_c = Distinct([ var if given == TO_BE_FILLED else id_
-        for given, var, id_ in zip(flatten(puzzle), flatten(board), flatten(id_board)) ])
-    distinct_c = [ distinct_c ]
+    collect('distinct', Distinct([ var if given == TO_BE_FILLED else id_
+        for given, var, id_ in zip(flatten(puzzle), flatten(board), flatten(id_board)) ]))
 
-    instance_c = []
     for given, var in zip(flatten(puzzle), flatten(board)):
         if given > 0:
-            instance_c.append( var == EMPTY)
+            collect('instance', var == EMPTY)
         else:
-            instance_c.append( var > 0 )
-
-    ortho_sum_c = []
+            collect('instance', var > 0 )
 
     at_ = lambda l, c : board[l][c]
     def get_vars_at(indices):
@@ -77,10 +77,9 @@ def solve_puzzle_zipline(puzzle, *, height, width):
                     if inside_board(neigh, height=height, width=width) ]
             neighs = get_vars_at(val_neighs)
             cnstrnt = Sum(neighs) == sum_
-            ortho_sum_c.append(cnstrnt)
+            collect('ortho_sum', cnstrnt)
 
     # Any even number's odd-predecessor is in the row or column
-    ortho_strip_c = []
     for n in range(2, max_possible_number + 1, 2):
         for l, c in itertools.product(range(height), range(width)):
             if puzzle[l][c] == TO_BE_FILLED:
@@ -90,10 +89,9 @@ def solve_puzzle_zipline(puzzle, *, height, width):
                 strip_contains_predecessor = Or([ cell == n-1
                     for cell in other_cells_in_orthogonal_strip ])
                 cnstrnt = Implies(board[l][c] == n, strip_contains_predecessor)
-                ortho_strip_c.append(cnstrnt)
+                collect('ortho_strip', cnstrnt)
 
     # Any odd number's odd-predecessor is in one of the diagonals containing it.
-    diag_strip_c = []
     for n in range(3, max_possible_number + 1, 2):
         for l, c in itertools.product(range(height), range(width)):
             if puzzle[l][c] == TO_BE_FILLED:
@@ -103,15 +101,9 @@ def solve_puzzle_zipline(puzzle, *, height, width):
                 strip_contains_predecessor = Or([ cell == n-1
                     for cell in other_cells_in_diagonal_strip ])
                 cnstrnt = Implies(board[l][c] == n, strip_contains_predecessor)
-                diag_strip_c.append(cnstrnt)
-
-    s = Solver()
-
-    s.add( range_c + distinct_c + instance_c + ortho_sum_c + ortho_strip_c  + diag_strip_c )
+                collect('diag_strip', cnstrnt)
 
-    s.check()
-    m = s.model()
-    return [ [m[cell] for cell in row] for row in board ]
+    return solve_board(s, board)
 
 if __name__ == "__main__":
     # The following encoded puzzle is from https://www.janko.at/Raetsel/Zipline/007.a.htm by author Elliott Line
@@ -0,0 +1,118 @@
+import argparse
+import functools
+import io
+import json
+import multiprocessing
+import os
+import signal
+import socketserver
+import stat
+import sys
+import threading
+import time
+import registry
+from batch_solve import solve_record, add_solve_arguments, solve_options, parse_record
+
+# A long-lived solver: puzzle records (json lines, see batch_solve.py) are read on stdin, or from the connections to
+# a unix socket, and the results are written back (json lines, in completion order) as soon as they are found.
+# The worker processes are started once: z3 and the solver modules (with their module-level setup, e.g. NONETS_IDS
+# in solve-killer-sudoku.py) are loaded when a worker starts, the tables (see table_store.py) the first time they are
+# used. Each result has its timings: solve_time (in the worker) and latency (from the request read to the result).
+
+# the record is solved in a worker
+def solve_timed(record, **options):
+    start = time.perf_counter()
+    res = solve_record(record, **options)
+    res['solve_time'] = time.perf_counter() - start
+    return res
+
+# A worker is terminated (SIGTERM) at once, even in the middle of a z3 check: it does not inherit the handler of the
+# daemon (a python handler would only run once the check is over).
+def init_worker(preload):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    registry.preload(preload)
+
+# Solve the records of lines (json lines) on pool, write(result) is called for each one (from another thread).
+# max_pending: records read ahead of their results (reading waits for the results beyond that)
+# Returns when all the results are written.
+def serve_lines(pool, lines, write, *, max_pending, **options):
+    solve_ = functools.partial(solve_timed, **options)
+    slots = threading.Semaphore(max_pending)
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        received = time.perf_counter()
+        try:
+            record = parse_record(line)
+        except ValueError as e: # one bad line should not bring down the daemon
+            write({'error': f'{type(e).__name__}: {e}'})
+            continue
+        def done(res, received=received):
+            res['latency'] = time.perf_counter() - received
+            write(res)
+            slots.release()
+        def failed(e, record=record):
+            write({'id': record.get('id'), 'type': record.get('type'), 'error': f'{type(e).__name__}: {e}'})
+            slots.release()
+        slots.acquire()
+        pool.apply_async(solve_, (record,), callback=done, error_callback=failed)
+    for _ in range(max_pending):
+        slots.acquire()
+
+def json_writer(f):
+    lock = threading.Lock() # the results of a connection are written by the pool's threads
+    def write(res):
+        with lock:
+            f.write(json.dumps(res) + '\n')
+            f.flush()
+    return write
+
+# Each connection to the socket is a stream of requests, answered on the same connection (all connections share the
+# workers).
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        out = json_writer(io.TextIOWrapper(self.wfile, encoding='utf-8', write_through=True))
+        def write(res):
+            try:
+                out(res)
+            except OSError: # the client is gone: its remaining results are dropped
+                pass
+        serve_lines(self.server.pool, io.TextIOWrapper(self.rfile, encoding='utf-8'), write, **self.server.options)
+
+def serve_socket(pool, path, **options):
+    # the socket file of a previous daemon (that did not exit cleanly) is replaced
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)
+    with socketserver.ThreadingUnixStreamServer(path, RequestHandler) as server:
+        server.daemon_threads = True
+        server.pool = pool
+        server.options = options
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Solve the puzzles (json lines) read on stdin or on a unix socket, with warm worker processes.')
+    parser.add_argument('--socket', metavar='PATH', default=None, help='serve the connections to this unix socket (default: serve stdin)')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='number of worker processes (default: number of cpus)')
+    parser.add_argument('--max-pending', type=int, default=None, metavar='N',
+            help='requests (per connection) read ahead of their results (default: twice the number of workers)')
+    add_solve_arguments(parser)
+    parser.set_defaults(preload=None) # all the puzzle types are loaded when a worker starts, unless --preload is given
+    args = parser.parse_args()
+
+    processes = args.processes or os.cpu_count() or 1
+    options = dict(solve_options(args), max_pending=args.max_pending or 2 * processes)
+    preload = registry.kinds() if args.preload is None else args.preload
+    # stopped (SIGTERM) as by a ctrl-c: the workers are terminated and the socket file removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with multiprocessing.Pool(processes, initializer=init_worker, initargs=(preload,)) as pool:
+        try:
+            if args.socket is None:
+                serve_lines(pool, sys.stdin, json_writer(sys.stdout), **options)
+            else:
+                serve_socket(pool, args.socket, **options)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,132 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# A solve session is opened around a call to a solve_* function (see registry.run).
+# more_z3.solve_board/check_solver report to the current session, if any.
+# Without a session, solving is done exactly as before: nothing is recorded.
+
+_current_session = ContextVar('solve_session', default=None)
+
+def current_session():
+    return _current_session.get()
+
+# size of the constraints: number of distinct terms (sub-expressions shared in the DAG are counted once)
+# and of distinct (uninterpreted) constants: the z3 variables the constraints are about
+def count_terms(constraints):
+    # imported here: importing registry (and this module) does not load z3
+    from z3 import is_const, Z3_OP_UNINTERPRETED
+    seen, variables = set(), set()
+    todo = list(constraints)
+    while todo:
+        expr = todo.pop()
+        if expr.get_id() in seen:
+            continue
+        seen.add(expr.get_id())
+        if is_const(expr) and expr.decl().kind() == Z3_OP_UNINTERPRETED:
+            variables.add(expr.get_id())
+        else:
+            todo.extend(expr.children())
+    return len(seen), len(variables)
+
+# status: 'sat' (a solution was found), 'unsat' (there is none) or 'unknown' (e.g. out of time: see stats['reason_unknown'])
+# unique: whether the solution is the only one (None: not checked, or unknown)
+# elapsed: seconds, from the start of the solve (building the constraints included, counting them excepted)
+@dataclass
+class SolveResult:
+    solution: object
+    stats: dict = field(default_factory=dict)
+    unique: bool = None
+    status: str = 'sat'
+    elapsed: float = None
+
+# raised by on_solution to stop the enumeration of the solutions
+class StopEnumeration(Exception):
+    pass
+
+# raised (by more_z3.solve_board...) instead of reading a model that is not there
+class NoSolution(Exception):
+    def __init__(self, status, reason=None):
+        super().__init__(status if reason is None else f'{status}: {reason}')
+        self.status = status
+        self.reason = reason
+
+# resources used by the solver s so far
+def rlimit_count(s):
+    z3_stats = s.statistics()
+    return z3_stats.get_key_value('rlimit count') if 'rlimit count' in z3_stats.keys() else 0
+
+# check_unique: once a solution is found, the solver is checked again with it blocked (see more_z3.solve_board)
+# on_solution: all the solutions are enumerated (see more_z3.solve_board), each one is passed to on_solution
+# timeout (seconds), rlimit (z3 resource units): budget of the whole solve. Each check gets what is left of it
+# (z3 counts them per check): when it is exhausted, the check returns unknown.
+# cancelled: a threading.Event set (by another thread) to stop the solve. No check is started once it is set: the
+# solve ends with NoSolution('unknown', 'canceled'). The check in progress is stopped by interrupting its z3 context.
+# with_counts: the size of the constraints (nb_terms, nb_variables) is counted at the first check. The walk of all the
+# terms takes time (count_time): it is not part of the budget.
+class SolveSession:
+    def __init__(self, *, check_unique=False, on_solution=None, timeout=None, rlimit=None, cancelled=None,
+            with_counts=False):
+        self.started = time.perf_counter()
+        self.stats = {'nb_checks': 0, 'check_time': 0.0}
+        self.check_unique = check_unique
+        self.unique = None
+        self.on_solution = on_solution
+        self.timeout = timeout
+        self.rlimit = rlimit
+        self.rlimit_used = 0
+        self.cancelled = cancelled
+        self.with_counts = with_counts
+
+    def _record_encoding(self, s):
+        # Everything that happens before the first check is building the constraints.
+        if 'encode_time' in self.stats:
+            return
+        self.stats['encode_time'] = time.perf_counter() - self.started
+        assertions = s.assertions()
+        self.stats['nb_assertions'] = len(assertions)
+        if self.with_counts:
+            start = time.perf_counter()
+            self.stats['nb_terms'], self.stats['nb_variables'] = count_terms(assertions)
+            self.stats['count_time'] = time.perf_counter() - start
+
+    # seconds spent on the solve so far (counting the terms excepted)
+    def elapsed(self):
+        return time.perf_counter() - self.started - self.stats.get('count_time', 0.0)
+
+    def _set_limits(self, s):
+        # 0 would mean no limit: at least 1
+        if self.timeout is not None:
+            s.set(timeout=max(1, int((self.timeout - self.elapsed()) * 1000)))
+        if self.rlimit is not None:
+            s.set(rlimit=max(1, self.rlimit - self.rlimit_used))
+
+    def check(self, s, *assumptions):
+        if self.cancelled is not None and self.cancelled.is_set():
+            raise NoSolution('unknown', 'canceled')
+        self._record_encoding(s)
+        self._set_limits(s)
+        start = time.perf_counter()
+        count = rlimit_count(s)
+        res = s.check(*assumptions)
+        self.rlimit_used += rlimit_count(s) - count
+        self.stats['check_time'] += time.perf_counter() - start
+        self.stats['nb_checks'] += 1
+        z3_stats = s.statistics()
+        self.stats['z3'] = { key: z3_stats.get_key_value(key) for key in z3_stats.keys() }
+        return res
+
+    def close(self):
+        self.stats['total_time'] = time.perf_counter() - self.started
+
+@contextmanager
+def solve_session(*, check_unique=False, on_solution=None, timeout=None, rlimit=None, cancelled=None, with_counts=False):
+    session = SolveSession(check_unique=check_unique, on_solution=on_solution, timeout=timeout, rlimit=rlimit,
+            cancelled=cancelled, with_counts=with_counts)
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+        session.close()
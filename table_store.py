@@ -0,0 +1,112 @@
+import array
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Sequence
+
+# Combinatorial tables (permutations, patterns of runs, distributions...) are computed once and stored on disk.
+# Later calls (and other processes, e.g. the batch_solve workers) memory-map the stored table.
+# A table is a list of rows of small ints, all rows having the same length.
+# File: header (magic, format version, table version, typecode, number of rows, row length) + the values (little endian).
+# The table version is given by the caller: it is bumped when the table's computation changes.
+
+FORMAT_VERSION = 1
+MAGIC = b'PZTB'
+HEADER = struct.Struct('<4sHHcxII')
+
+# PUZZLES_TABLE_DIR='' disables the store: tables are computed in each process
+TABLE_DIR = os.environ.get('PUZZLES_TABLE_DIR',
+        os.path.join(os.path.expanduser('~'), '.cache', 'puzzles-z3', 'tables'))
+
+# rows of a stored table: tuples, read from the (memory-mapped) values
+class Table(Sequence):
+    def __init__(self, values, nb_rows, row_length):
+        self.values = values
+        self.nb_rows = nb_rows
+        self.row_length = row_length
+
+    def __len__(self):
+        return self.nb_rows
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [ self[j] for j in range(*i.indices(self.nb_rows)) ]
+        if i < 0:
+            i += self.nb_rows
+        if not 0 <= i < self.nb_rows:
+            raise IndexError('table index out of range')
+        return tuple(self.values[i * self.row_length:(i + 1) * self.row_length])
+
+# smallest (signed) typecode for the values
+def get_typecode(values):
+    low, high = min(values, default=0), max(values, default=0)
+    for typecode in 'bhiq':
+        limit = 2 ** (8 * array.array(typecode).itemsize - 1)
+        if -limit <= low and high < limit:
+            return typecode
+    raise ValueError('Table values do not fit in 64 bits')
+
+def table_path(name, version):
+    return os.path.join(TABLE_DIR, f'{name}.v{version}.tbl')
+
+def write_table(path, version, rows):
+    row_length = len(rows[0]) if rows else 0
+    assert all(len(row) == row_length for row in rows), 'The rows of a table have the same length'
+    values = array.array(get_typecode([ val for row in rows for val in row ]), [ val for row in rows for val in row ])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # written aside then renamed: a concurrent reader never sees a partial table
+    f = tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False)
+    try:
+        with f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version, values.typecode.encode(), len(rows), row_length))
+            f.write(values.tobytes())
+        os.chmod(f.name, 0o644)
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+# None if the file is missing or is not a table of this version
+def read_table(path, version):
+    try:
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError): # ValueError: empty file
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, format_version, table_version, typecode, nb_rows, row_length = HEADER.unpack_from(data)
+    if (magic, format_version, table_version) != (MAGIC, FORMAT_VERSION, version) or typecode not in (b'b', b'h', b'i', b'q'):
+        return None
+    typecode = typecode.decode()
+    if len(data) - HEADER.size != nb_rows * row_length * array.array(typecode).itemsize:
+        return None
+    if sys.byteorder == 'little':
+        values = memoryview(data)[HEADER.size:].cast(typecode)
+    else:
+        values = array.array(typecode, data[HEADER.size:])
+        values.byteswap()
+    return Table(values, nb_rows, row_length)
+
+_tables = {}
+
+# The table called name (with its parameters, e.g. 'towers-permutations-5'): read from the store, or computed by
+# compute() (an iterable of rows) and stored.
+def load_table(name, version, compute):
+    if (name, version) in _tables:
+        return _tables[(name, version)]
+    table = read_table(table_path(name, version), version) if TABLE_DIR else None
+    if table is None:
+        rows = [ tuple(row) for row in compute() ]
+        if TABLE_DIR:
+            try:
+                write_table(table_path(name, version), version, rows)
+            except OSError: # e.g. read only file system: the table is not stored
+                pass
+        table = rows
+    _tables[(name, version)] = table
+    return table
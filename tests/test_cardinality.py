@@ -0,0 +1,33 @@
+import itertools
+import pytest
+from z3 import Bool, Not, Solver, sat
+from more_z3 import Exactly, AtMost, AtLeast, CARDINALITY_ENCODINGS
+
+CONSTRAINTS = [
+        (Exactly, lambda count, k: count == k),
+        (AtMost, lambda count, k: count <= k),
+        (AtLeast, lambda count, k: count >= k),
+        ]
+
+# every assignment of the literals satisfies the constraint iff its count of true literals does
+@pytest.mark.parametrize('encoding', CARDINALITY_ENCODINGS)
+@pytest.mark.parametrize('constraint, expected', CONSTRAINTS, ids=[ c.__name__ for c, _ in CONSTRAINTS ])
+def test_cardinality(encoding, constraint, expected):
+    for n in range(5):
+        lits = [ Bool(f'x{i}') for i in range(n) ]
+        for k in range(n + 2):
+            s = Solver()
+            s.add(constraint(*lits, k, encoding=encoding))
+            for values in itertools.product([False, True], repeat=n):
+                assumptions = [ lit if value else Not(lit) for lit, value in zip(lits, values) ]
+                assert (s.check(*assumptions) == sat) == expected(sum(values), k), (n, k, values)
+
+# the literals can be expressions, e.g. comparisons of cells
+@pytest.mark.parametrize('encoding', CARDINALITY_ENCODINGS)
+def test_cardinality_of_expressions(encoding):
+    from z3 import Ints
+    a, b, c = Ints('a b c')
+    s = Solver()
+    s.add(Exactly(a == 1, b == 1, c == 1, 2, encoding=encoding), a == 1, c == 2)
+    assert s.check() == sat
+    assert s.model()[b].as_long() == 1
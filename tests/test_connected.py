@@ -0,0 +1,59 @@
+import itertools
+import pytest
+from z3 import Bool, Not, Solver, sat
+from more_z3 import connected, CONNECTIVITY_ENCODINGS
+from puzzles_common import ortho_neighbours
+
+def grid(height, width):
+    return [ (l, c) for l in range(height) for c in range(width) ]
+
+# brute force: the cells are a single (non empty) region
+def is_connected(cells):
+    if not cells:
+        return False
+    seen, todo = set(), [ next(iter(cells)) ]
+    while todo:
+        cell = todo.pop()
+        if cell not in seen:
+            seen.add(cell)
+            todo.extend(neigh for neigh in ortho_neighbours(cell) if neigh in cells)
+    return seen == cells
+
+# every subset of the cells satisfies the constraint iff it is connected (and has the root)
+@pytest.mark.parametrize('encoding', CONNECTIVITY_ENCODINGS)
+@pytest.mark.parametrize('ordered_root', [True, False])
+@pytest.mark.parametrize('root', [None, (0, 0)])
+@pytest.mark.parametrize('height, width', [(2, 3), (3, 3)])
+def test_connected(encoding, ordered_root, root, height, width):
+    cells = grid(height, width)
+    active = { cell: Bool(f'a_{cell[0]}_{cell[1]}') for cell in cells }
+    s = Solver()
+    s.add(connected(cells, active, root=root, ordered_root=ordered_root, encoding=encoding))
+    for values in itertools.product([False, True], repeat=len(cells)):
+        subset = { cell for cell, value in zip(cells, values) if value }
+        assumptions = [ active[cell] if value else Not(active[cell]) for cell, value in zip(cells, values) ]
+        expected = is_connected(subset) and (root is None or root in subset)
+        assert (s.check(*assumptions) == sat) == expected, sorted(subset)
+
+# max_size bounds the size of the region: the regions up to that size are still allowed
+@pytest.mark.parametrize('encoding', CONNECTIVITY_ENCODINGS)
+def test_connected_max_size(encoding):
+    cells = grid(3, 3)
+    active = { cell: Bool(f'a_{cell[0]}_{cell[1]}') for cell in cells }
+    s = Solver()
+    s.add(connected(cells, active, max_size=4, encoding=encoding))
+    for values in itertools.product([False, True], repeat=len(cells)):
+        subset = { cell for cell, value in zip(cells, values) if value }
+        if len(subset) > 4:
+            continue
+        assumptions = [ active[cell] if value else Not(active[cell]) for cell, value in zip(cells, values) ]
+        assert (s.check(*assumptions) == sat) == is_connected(subset), sorted(subset)
+
+# cells always active are python bools
+def test_connected_constant_cells():
+    cells = grid(1, 3)
+    middle = Bool('middle')
+    s = Solver()
+    s.add(connected(cells, { (0, 0): True, (0, 1): middle, (0, 2): True }))
+    s.add(Not(middle))
+    assert s.check() != sat
@@ -0,0 +1,45 @@
+import random
+import pytest
+from polyominoes import polyominoes, mask_of, cells_of, fence_of
+from puzzles_common import inside_board, ortho_neighbours
+
+# the enumeration it replaces in solve-filling.py: grown cell by cell, duplicates removed by sorting
+def get_block(index_, *, nb_cells, is_valid_cell):
+    if nb_cells == 1:
+        return {(index_, )}
+    block_minus_1 = get_block(index_, nb_cells=nb_cells-1, is_valid_cell=is_valid_cell)
+    res = set()
+    for bl in block_minus_1:
+        for cell in bl:
+            for neigh in ortho_neighbours(cell):
+                if neigh not in bl and is_valid_cell(neigh):
+                    res.add(tuple(sorted([neigh, *bl])))
+    return res
+
+def random_valid(height, width, rng):
+    return { (l, c) for l in range(height) for c in range(width) if rng.random() < 0.7 }
+
+@pytest.mark.parametrize('height, width', [(1, 5), (3, 3), (4, 5)])
+def test_polyominoes_as_get_block(height, width):
+    rng = random.Random(height * width)
+    geom = {'height': height, 'width': width}
+    for valid_cells in [ {(l, c) for l in range(height) for c in range(width)} ] + [ random_valid(height, width, rng) for _ in range(5) ]:
+        valid = mask_of(valid_cells, width=width)
+        is_valid_cell = lambda cell: inside_board(cell, **geom) and cell in valid_cells
+        for root in [ (l, c) for l in range(height) for c in range(width) ]:
+            for size in range(1, 6):
+                res = polyominoes(root, size, valid, **geom)
+                # each polyomino exactly once
+                assert len(set(res)) == len(res)
+                blocks = { tuple(sorted(cells_of(mask, width=width))) for mask in res }
+                # (the root is valid, even when it is not among the valid cells)
+                expected = get_block(root, nb_cells=size,
+                        is_valid_cell=lambda cell: cell == root or is_valid_cell(cell))
+                assert blocks == expected, (root, size, sorted(valid_cells))
+
+def test_masks():
+    cells = [(0, 1), (1, 0), (2, 2)]
+    mask = mask_of(cells, width=3)
+    assert mask == 0b100001010
+    assert sorted(cells_of(mask, width=3)) == cells
+    assert sorted(cells_of(fence_of(mask_of([(0, 0)], width=3), height=3, width=3), width=3)) == [(0, 1), (1, 0)]
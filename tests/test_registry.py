@@ -0,0 +1,80 @@
+import itertools
+import pytest
+import registry
+from more_z3 import as_python
+
+N = 3
+
+def latin_squares(n):
+    rows = list(itertools.permutations(range(1, n + 1)))
+    for square in itertools.product(rows, repeat=n):
+        if all(len(set(col)) == n for col in zip(*square)):
+            yield [ list(row) for row in square ]
+
+def visible(line):
+    res, highest = 0, 0
+    for height in line:
+        if height > highest:
+            res, highest = res + 1, height
+    return res
+
+# the clues of a towers puzzle, as read from a solution (0: no clue)
+def clues_of(square, keep=lambda side, i: True):
+    cols = [ list(col) for col in zip(*square) ]
+    sides = {
+            'top': [ visible(col) for col in cols ],
+            'left': [ visible(row) for row in square ],
+            'right': [ visible(row[::-1]) for row in square ],
+            'bottom': [ visible(col[::-1]) for col in cols ],
+            }
+    return { side: [ clue if keep(side, i) else 0 for i, clue in enumerate(clues) ] for side, clues in sides.items() }
+
+def matching(clues):
+    return [ square for square in latin_squares(N) if all(
+            given == 0 or given == clue for side, clues_ in clues_of(square).items()
+            for given, clue in zip(clues[side], clues_)) ]
+
+NO_CLUES = { side: [0] * N for side in ('top', 'left', 'right', 'bottom') }
+SQUARE = [[1, 2, 3], [2, 3, 1], [3, 1, 2]]
+PARTIAL_CLUES = [
+        clues_of(SQUARE),
+        clues_of(SQUARE, lambda side, i: side in ('top', 'left')),
+        clues_of(SQUARE, lambda side, i: side == 'top'),
+        clues_of(SQUARE, lambda side, i: i == 0),
+        clues_of(SQUARE, lambda side, i: side == 'top' and i == 0),
+        clues_of(SQUARE, lambda side, i: side == 'left' and i == 1),
+        clues_of(SQUARE, lambda side, i: i == 1),
+        NO_CLUES,
+        ]
+
+def test_latin_squares():
+    assert len(list(latin_squares(N))) == 12
+
+@pytest.mark.parametrize('clues', PARTIAL_CLUES)
+def test_unique(clues):
+    expected = matching(clues)
+    res = registry.run('towers', n=N, check_unique=True, **clues)
+    assert as_python(res.solution) in expected
+    assert res.unique == (len(expected) == 1)
+
+@pytest.mark.parametrize('clues', PARTIAL_CLUES)
+def test_iter_solutions(clues):
+    solutions = [ as_python(solution) for solution in registry.iter_solutions('towers', n=N, **clues) ]
+    assert sorted(solutions) == sorted(matching(clues))
+
+def test_iter_solutions_limit():
+    solutions = registry.iter_solutions('towers', n=N, limit=5, **NO_CLUES)
+    assert len(list(solutions)) == 5
+    # stopped by the caller
+    solutions = registry.iter_solutions('towers', n=N, **NO_CLUES)
+    assert as_python(next(solutions)) in matching(NO_CLUES)
+    solutions.close()
+
+def test_status():
+    res = registry.run('towers', n=N, **clues_of(SQUARE))
+    assert res.status == 'sat' and res.stats['status'] == 'sat' and as_python(res.solution) == SQUARE
+    res = registry.run('towers', n=N, **dict(NO_CLUES, top=[3, 3, 0]))
+    assert res.status == 'unsat' and res.solution is None
+    res = registry.run('towers', n=N, rlimit=1, **NO_CLUES)
+    assert res.status == 'unknown' and res.solution is None
+    assert res.stats['reason_unknown']
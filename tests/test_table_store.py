@@ -0,0 +1,76 @@
+import pytest
+import table_store
+from table_store import load_table, read_table, write_table, table_path, HEADER
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(table_store, 'TABLE_DIR', str(tmp_path))
+    monkeypatch.setattr(table_store, '_tables', {})
+    return tmp_path
+
+ROWS = [ (1, -2, 3), (0, 0, 0), (127, -128, 5) ]
+
+def computed(rows):
+    calls = []
+    def compute():
+        calls.append(1)
+        return iter(rows)
+    return compute, calls
+
+def test_round_trip():
+    compute, calls = computed(ROWS)
+    assert list(load_table('t', 1, compute)) == ROWS
+    # another process: the table is read from the store
+    table_store._tables.clear()
+    table = load_table('t', 1, compute)
+    assert isinstance(table, table_store.Table)
+    assert list(table) == ROWS and len(table) == 3
+    assert table[-1] == ROWS[-1] and table[1:] == ROWS[1:]
+    assert len(calls) == 1
+
+@pytest.mark.parametrize('rows', [
+        [ (i, -i) for i in range(300) ], # 'h'
+        [ (2 ** 40, -2 ** 40) ], # 'q'
+        [ () for _ in range(4) ], # empty rows
+        [], # no row
+        ])
+def test_round_trip_typecodes(rows):
+    path = table_path('t', 1)
+    write_table(path, 1, rows)
+    table = read_table(path, 1)
+    assert table is not None and list(table) == rows
+
+def test_other_version_is_computed_again():
+    load_table('t', 1, computed(ROWS)[0])
+    table_store._tables.clear()
+    compute, calls = computed(ROWS[:1])
+    assert list(load_table('t', 2, compute)) == ROWS[:1]
+    assert len(calls) == 1
+    assert read_table(table_path('t', 1), 2) is None
+
+@pytest.mark.parametrize('corrupt', [
+        lambda data: data[:-1], # truncated values
+        lambda data: data[:HEADER.size - 1], # truncated header
+        lambda data: b'', # empty file
+        lambda data: b'XXXX' + data[4:], # bad magic
+        lambda data: data[:8] + b'z' + data[9:], # bad typecode
+        ])
+def test_corrupted_table_is_computed_again(corrupt):
+    path = table_path('t', 1)
+    write_table(path, 1, ROWS)
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(corrupt(data))
+    assert read_table(path, 1) is None
+    compute, calls = computed(ROWS)
+    assert list(load_table('t', 1, compute)) == ROWS
+    assert len(calls) == 1
+    # and stored again
+    assert list(read_table(path, 1)) == ROWS
+
+def test_disabled_store(monkeypatch, store):
+    monkeypatch.setattr(table_store, 'TABLE_DIR', '')
+    compute, calls = computed(ROWS)
+    assert load_table('t', 1, compute) == ROWS
+    assert list(store.iterdir()) == []